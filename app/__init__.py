@@ -1,6 +1,11 @@
+import click
 from flask import Flask
 from flask_cors import CORS
 from app.config import get_config
+from app.utils.json_provider import FastJSONProvider
+from app.utils.compression import Compression
+from app.utils.background import PeriodicTask
+from app.utils.events import event_bus
 
 def create_app(config_class=None):
     """Create and configure the Flask application."""
@@ -11,20 +16,52 @@ def create_app(config_class=None):
         config_class = get_config()
     app.config.from_object(config_class)
     
+    # Use the orjson-backed JSON provider
+    app.json = FastJSONProvider(app)
+    
     # Enable CORS
     CORS(app)
     
+    # Enable response compression
+    compression = Compression(app)
+    
     # Register error handlers
     register_error_handlers(app)
     
     # Register blueprints
     register_blueprints(app)
     
+    # Register background jobs and their CLI commands
+    register_jobs(app)
+    
     # Register a simple route for testing
     @app.route('/health')
     def health_check():
         return {'status': 'healthy', 'message': 'OnTheMove API is running'}
     
+    @app.route('/metrics/compression')
+    def compression_metrics():
+        return {'compression': compression.stats()}
+    
+    @app.route('/metrics/events')
+    def event_metrics():
+        return {'events': event_bus.stats()}
+    
+    @app.route('/metrics/live-locations')
+    def live_location_metrics():
+        from app.services.live_location_service import LiveLocationService
+        return {'live_locations': LiveLocationService.stats()}
+    
+    @app.route('/metrics/change-feed')
+    def change_feed_metrics():
+        consumer = app.extensions.get('change_feed')
+        return {'change_feed': consumer.stats() if consumer else None}
+    
+    @app.route('/metrics/stale-sweeper')
+    def stale_sweeper_metrics():
+        from app.services.sweeper_service import SweeperService
+        return {'stale_sweeper': SweeperService.stats()}
+    
     return app
 
 def register_blueprints(app):
@@ -38,6 +75,8 @@ def register_blueprints(app):
     from app.routes.trips import trips_bp
     from app.routes.ride_requests import ride_requests_bp
     from app.routes.ratings import ratings_bp
+    from app.routes.schedules import schedules_bp
+    from app.routes.dashboard import dashboard_bp
     
     # Register blueprints
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
@@ -48,9 +87,60 @@ def register_blueprints(app):
     app.register_blueprint(trips_bp, url_prefix='/api/trips')
     app.register_blueprint(ride_requests_bp, url_prefix='/api/ride-requests')
     app.register_blueprint(ratings_bp, url_prefix='/api/ratings')
+    app.register_blueprint(schedules_bp, url_prefix='/api/schedules')
+    app.register_blueprint(dashboard_bp, url_prefix='/api/dashboard')
     
     # Additional blueprints will be registered here as they are created
 
+def register_jobs(app):
+    """Register background jobs as CLI commands, and start the enabled ones in this process."""
+    from app.services.schedule_service import ScheduleService
+    from app.services.trip_service import TripService
+    from app.services.sweeper_service import SweeperService
+    from app.utils.travel_time import build_zone_matrix
+    
+    @app.cli.command('materialize-trips')
+    def materialize_trips():
+        """Create the upcoming trips of all recurring trip schedules."""
+        print(ScheduleService.materialize_due())
+    
+    @app.cli.command('backfill-trip-metrics')
+    def backfill_trip_metrics():
+        """Store distance and duration on trips created before they were computed at write time."""
+        print(TripService.backfill_route_metrics())
+    
+    @app.cli.command('build-travel-matrix')
+    @click.argument('graph_path')
+    @click.option('--out', 'out_path', default=None, help='Matrix file to write, TRAVEL_TIME_MATRIX_PATH by default')
+    @click.option('--bounds', nargs=4, type=float, required=True, help='MIN_LAT MIN_LNG MAX_LAT MAX_LNG of the covered area')
+    @click.option('--cell-km', type=float, default=1.0, help='Zone size in kilometres')
+    @click.option('--bucket-minutes', type=click.IntRange(1, 1440), default=180, help='Length of a time-of-day bucket')
+    def build_travel_matrix(graph_path, out_path, bounds, cell_km, bucket_minutes):
+        """Build the zone travel time matrix from a road graph CSV, offline (see app.utils.travel_time)."""
+        out_path = out_path or app.config['TRAVEL_TIME_MATRIX_PATH']
+        zones = build_zone_matrix(graph_path, out_path, *bounds, cell_km, bucket_minutes)
+        print({'zones': zones, 'path': out_path})
+    
+    @app.cli.command('sweep-stale')
+    def sweep_stale():
+        """Expire scheduled trips that never started and ride requests nobody answered."""
+        print(SweeperService.sweep())
+    
+    if app.config['SCHEDULE_MATERIALIZER_ENABLED']:
+        app.extensions['schedule_materializer'] = PeriodicTask(
+            'schedule-materializer', app.config['SCHEDULE_MATERIALIZE_INTERVAL'], ScheduleService.materialize_due
+        ).start()
+    
+    # Every worker may run the sweeper; the job lease lets one of them sweep at a time
+    if app.config['STALE_SWEEPER_ENABLED']:
+        app.extensions['stale_sweeper'] = PeriodicTask(
+            'stale-sweeper', app.config['STALE_SWEEP_INTERVAL'], SweeperService.sweep
+        ).start()
+    
+    if app.config['CHANGE_FEED_ENABLED']:
+        from app.services.change_feed_service import ChangeFeedService
+        app.extensions['change_feed'] = ChangeFeedService.create_consumer().start()
+
 def register_error_handlers(app):
     """Register error handlers."""
     @app.errorhandler(400)
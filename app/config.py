@@ -15,6 +15,102 @@ class Config:
     SUPABASE_URL = os.environ.get('SUPABASE_URL')
     SUPABASE_KEY = os.environ.get('SUPABASE_KEY')
     SUPABASE_SERVICE_KEY = os.environ.get('SUPABASE_SERVICE_KEY')
+    
+    # Maximum number of Supabase queries a single request may run concurrently
+    MAX_CONCURRENT_QUERIES = int(os.environ.get('MAX_CONCURRENT_QUERIES', 4))
+    
+    # Serve enrichment-heavy read endpoints through the async PostgREST client
+    ASYNC_READS_ENABLED = os.environ.get('ASYNC_READS_ENABLED', 'false').lower() == 'true'
+    
+    # Serialize responses with orjson when it is installed
+    JSON_USE_ORJSON = os.environ.get('JSON_USE_ORJSON', 'true').lower() == 'true'
+    
+    # Response compression (see app.utils.compression)
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BR_LEVEL = int(os.environ.get('COMPRESS_BR_LEVEL', 4))
+    COMPRESS_ZSTD_LEVEL = int(os.environ.get('COMPRESS_ZSTD_LEVEL', 3))
+    
+    # Keyset pagination page sizes (see app.utils.pagination)
+    PAGE_SIZE_DEFAULT = int(os.environ.get('PAGE_SIZE_DEFAULT', 20))
+    PAGE_SIZE_MAX = int(os.environ.get('PAGE_SIZE_MAX', 100))
+    
+    # Delta syncs re-read rows updated this many seconds before the cursor, since updated_at comes from
+    # app server clocks and a row can commit after a later-stamped one (see app.utils.sync)
+    SYNC_SAFETY_WINDOW = int(os.environ.get('SYNC_SAFETY_WINDOW', 30))
+    
+    # Corridor matching of rides to trips (see app.services.matching_service)
+    MATCH_CORRIDOR_KM = float(os.environ.get('MATCH_CORRIDOR_KM', 2.0))
+    MATCH_MAX_DETOUR_KM = float(os.environ.get('MATCH_MAX_DETOUR_KM', 5.0))
+    MATCH_INDEX_TTL = int(os.environ.get('MATCH_INDEX_TTL', 60))
+    MATCH_DEPARTURE_BUCKET_SECONDS = int(os.environ.get('MATCH_DEPARTURE_BUCKET_SECONDS', 3600))
+    
+    # Batch assignment of pending ride requests (see app.services.assignment_service)
+    ASSIGN_MAX_TRIP_DETOUR_KM = float(os.environ.get('ASSIGN_MAX_TRIP_DETOUR_KM', 10.0))
+    ASSIGN_TIME_TOLERANCE_MIN = int(os.environ.get('ASSIGN_TIME_TOLERANCE_MIN', 30))
+    
+    # Most ride requests one bulk accept/reject call may update
+    BULK_STATUS_MAX_ITEMS = int(os.environ.get('BULK_STATUS_MAX_ITEMS', 100))
+    
+    # Most trip ids one batch get may ask for
+    TRIP_BATCH_MAX_IDS = int(os.environ.get('TRIP_BATCH_MAX_IDS', 100))
+    
+    # Recurring trip schedules (see app.services.schedule_service)
+    SCHEDULE_HORIZON_DAYS = int(os.environ.get('SCHEDULE_HORIZON_DAYS', 14))
+    SCHEDULE_MATERIALIZER_ENABLED = os.environ.get('SCHEDULE_MATERIALIZER_ENABLED', 'false').lower() == 'true'
+    SCHEDULE_MATERIALIZE_INTERVAL = int(os.environ.get('SCHEDULE_MATERIALIZE_INTERVAL', 900))
+    
+    # Expiry of scheduled trips that never started and ride requests left unanswered (see app.services.sweeper_service)
+    STALE_SWEEPER_ENABLED = os.environ.get('STALE_SWEEPER_ENABLED', 'false').lower() == 'true'
+    STALE_SWEEP_INTERVAL = int(os.environ.get('STALE_SWEEP_INTERVAL', 300))
+    STALE_TRIP_GRACE_MINUTES = int(os.environ.get('STALE_TRIP_GRACE_MINUTES', 120))
+    STALE_REQUEST_GRACE_MINUTES = int(os.environ.get('STALE_REQUEST_GRACE_MINUTES', 15))
+    STALE_SWEEP_BATCH_SIZE = int(os.environ.get('STALE_SWEEP_BATCH_SIZE', 500))
+    STALE_SWEEP_LEASE_TTL = int(os.environ.get('STALE_SWEEP_LEASE_TTL', 600))
+    
+    # Ride request event streams (see app.utils.events and app.utils.sse)
+    # EVENTS_BROKER is 'memory' (one process) or 'local' (all worker processes on this host)
+    EVENTS_BROKER = os.environ.get('EVENTS_BROKER', 'memory')
+    EVENTS_BROKER_DIR = os.environ.get('EVENTS_BROKER_DIR', '/tmp/onthemove-events')
+    SSE_QUEUE_SIZE = int(os.environ.get('SSE_QUEUE_SIZE', 100))
+    SSE_HEARTBEAT_INTERVAL = int(os.environ.get('SSE_HEARTBEAT_INTERVAL', 15))
+    SSE_MAX_DURATION = int(os.environ.get('SSE_MAX_DURATION', 300))
+    SSE_RETRY_MS = int(os.environ.get('SSE_RETRY_MS', 3000))
+    # Each stream holds one of a worker's WEB_THREADS threads (the gunicorn --threads setting in Procfile) for up to
+    # SSE_MAX_DURATION, so streams are capped below the thread count and SSE_RESERVED_THREADS stay free for other requests
+    WEB_THREADS = int(os.environ.get('WEB_THREADS', 32))
+    SSE_RESERVED_THREADS = int(os.environ.get('SSE_RESERVED_THREADS', 8))
+    SSE_MAX_CONNECTIONS = int(os.environ.get('SSE_MAX_CONNECTIONS', max(WEB_THREADS - SSE_RESERVED_THREADS, 1)))
+    
+    # Database change feed keeping per-worker indexes and caches fresh (see app.services.change_feed_service)
+    CHANGE_FEED_ENABLED = os.environ.get('CHANGE_FEED_ENABLED', 'false').lower() == 'true'
+    CHANGE_FEED_QUEUE_SIZE = int(os.environ.get('CHANGE_FEED_QUEUE_SIZE', 10000))
+    CHANGE_FEED_BATCH_SIZE = int(os.environ.get('CHANGE_FEED_BATCH_SIZE', 500))
+    CHANGE_FEED_PUT_TIMEOUT = float(os.environ.get('CHANGE_FEED_PUT_TIMEOUT', 1.0))
+    CHANGE_FEED_MAX_BACKOFF = int(os.environ.get('CHANGE_FEED_MAX_BACKOFF', 30))
+    FEED_CACHE_SIZE = int(os.environ.get('FEED_CACHE_SIZE', 10000))
+    
+    # Live driver locations during in-progress trips (see app.services.live_location_service)
+    LIVE_LOCATION_BUFFER_SIZE = int(os.environ.get('LIVE_LOCATION_BUFFER_SIZE', 256))
+    LIVE_LOCATION_MAX_PINGS = int(os.environ.get('LIVE_LOCATION_MAX_PINGS', 100))
+    LIVE_LOCATION_MAX_CLOCK_SKEW = int(os.environ.get('LIVE_LOCATION_MAX_CLOCK_SKEW', 60))
+    LIVE_LOCATION_IDLE_TIMEOUT = int(os.environ.get('LIVE_LOCATION_IDLE_TIMEOUT', 1800))
+    # Seconds a worker trusts a tracked trip to still be in progress; with the change feed down, it checks again after this
+    LIVE_LOCATION_STATUS_TTL = int(os.environ.get('LIVE_LOCATION_STATUS_TTL', 30))
+    LIVE_LOCATION_PERSIST_ENABLED = os.environ.get('LIVE_LOCATION_PERSIST_ENABLED', 'false').lower() == 'true'
+    LIVE_LOCATION_SAMPLE_INTERVAL = int(os.environ.get('LIVE_LOCATION_SAMPLE_INTERVAL', 30))
+    LIVE_LOCATION_SAMPLE_DISTANCE_M = int(os.environ.get('LIVE_LOCATION_SAMPLE_DISTANCE_M', 200))
+    LIVE_LOCATION_FLUSH_INTERVAL = int(os.environ.get('LIVE_LOCATION_FLUSH_INTERVAL', 10))
+    
+    # Trip duration estimates (see app.utils.travel_time). TRAVEL_TIME_ESTIMATOR is 'constant', or 'zone_matrix'
+    # to look durations up in a matrix file built with `flask build-travel-matrix`
+    TRAVEL_TIME_ESTIMATOR = os.environ.get('TRAVEL_TIME_ESTIMATOR', 'constant')
+    TRAVEL_TIME_MATRIX_PATH = os.environ.get('TRAVEL_TIME_MATRIX_PATH', 'data/travel_time_matrix.bin')
+    TRAVEL_TIME_AVERAGE_SPEED_KMH = float(os.environ.get('TRAVEL_TIME_AVERAGE_SPEED_KMH', 40.0))
+    
+    # Rows fetched from Supabase per page when streaming exports
+    EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 500))
 
 class DevelopmentConfig(Config):
     """Development configuration."""
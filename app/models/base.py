@@ -0,0 +1,22 @@
+class SlottedModel:
+    """
+    Base class for table models. Subclasses declare __slots__ as their full column
+    projection, so instances carry no per-object __dict__.
+    """
+    
+    __slots__ = ()
+    
+    @classmethod
+    def row_to_dict(cls, data):
+        """
+        Convert a row to its response dictionary.
+        Rows that already hold exactly the model's columns are returned as-is instead of
+        being copied through from_dict().to_dict().
+        """
+        if not data:
+            return None
+        
+        if len(data) == len(cls.__slots__) and data.keys() == cls.FIELD_SET:
+            return data
+        
+        return cls.from_dict(data).to_dict()
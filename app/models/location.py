@@ -1,6 +1,23 @@
-class Location:
+from app.models.base import SlottedModel
+
+class Location(SlottedModel):
     """Location model for interacting with the locations table in Supabase."""
     
+    TABLE = 'locations'
+    
+    # Columns fetched per use case, see app.utils.query
+    PROJECTIONS = {
+        'full': ('id', 'user_id', 'name', 'address', 'latitude', 'longitude', 'is_favorite',
+                 'created_at', 'updated_at'),
+        'id': ('id',),
+        'favorite': ('id', 'is_favorite')
+    }
+    
+    PROJECTIONS['sync'] = PROJECTIONS['full'] + ('deleted_at',)
+    
+    __slots__ = PROJECTIONS['full']
+    FIELD_SET = frozenset(__slots__)
+    
     def __init__(self, id=None, user_id=None, name=None, address=None, 
                  latitude=None, longitude=None, is_favorite=False,
                  created_at=None, updated_at=None):
@@ -1,6 +1,23 @@
-class Person:
+from app.models.base import SlottedModel
+
+class Person(SlottedModel):
     """Person model for interacting with the people table in Supabase."""
     
+    TABLE = 'people'
+    
+    # Columns fetched per use case, see app.utils.query
+    PROJECTIONS = {
+        'full': ('id', 'user_id', 'name', 'email', 'phone', 'profile_image_url', 'is_favorite',
+                 'created_at', 'updated_at'),
+        'id': ('id',),
+        'favorite': ('id', 'is_favorite')
+    }
+    
+    PROJECTIONS['sync'] = PROJECTIONS['full'] + ('deleted_at',)
+    
+    __slots__ = PROJECTIONS['full']
+    FIELD_SET = frozenset(__slots__)
+    
     def __init__(self, id=None, user_id=None, name=None, email=None, 
                  phone=None, profile_image_url=None, is_favorite=False,
                  created_at=None, updated_at=None):
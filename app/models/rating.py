@@ -1,6 +1,20 @@
-class Rating:
+from app.models.base import SlottedModel
+
+class Rating(SlottedModel):
     """Model for a rating."""
     
+    TABLE = 'ratings'
+    
+    # Columns fetched per use case, see app.utils.query
+    PROJECTIONS = {
+        'full': ('id', 'trip_id', 'rater_id', 'rated_user_id', 'rating', 'comment', 'created_at'),
+        'id': ('id',),
+        'rating': ('rating',)
+    }
+    
+    __slots__ = PROJECTIONS['full']
+    FIELD_SET = frozenset(__slots__)
+    
     def __init__(self, id=None, trip_id=None, rater_id=None, rated_user_id=None, 
                  rating=None, comment=None, created_at=None):
         """Initialize a Rating object."""
@@ -0,0 +1,51 @@
+from app.models.base import SlottedModel
+
+class RefreshToken(SlottedModel):
+    """RefreshToken model for interacting with the refresh_tokens table in Supabase."""
+    
+    TABLE = 'refresh_tokens'
+    
+    # Columns fetched per use case, see app.utils.query
+    PROJECTIONS = {
+        'full': ('id', 'user_id', 'token', 'expires_at', 'created_at', 'is_revoked'),
+        'owner': ('user_id',),
+        'validity': ('user_id', 'expires_at')
+    }
+    
+    __slots__ = PROJECTIONS['full']
+    FIELD_SET = frozenset(__slots__)
+    
+    def __init__(self, id=None, user_id=None, token=None, expires_at=None,
+                 created_at=None, is_revoked=False):
+        self.id = id
+        self.user_id = user_id
+        self.token = token
+        self.expires_at = expires_at
+        self.created_at = created_at
+        self.is_revoked = is_revoked
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Create a RefreshToken instance from a dictionary."""
+        if not data:
+            return None
+        
+        return cls(
+            id=data.get('id'),
+            user_id=data.get('user_id'),
+            token=data.get('token'),
+            expires_at=data.get('expires_at'),
+            created_at=data.get('created_at'),
+            is_revoked=data.get('is_revoked', False)
+        )
+    
+    def to_dict(self):
+        """Convert RefreshToken instance to a dictionary."""
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'token': self.token,
+            'expires_at': self.expires_at,
+            'created_at': self.created_at,
+            'is_revoked': self.is_revoked
+        } 
@@ -1,6 +1,43 @@
-class RideRequest:
+from app.models.base import SlottedModel
+
+class RideRequest(SlottedModel):
     """RideRequest model for interacting with the ride_requests table in Supabase."""
     
+    TABLE = 'ride_requests'
+    
+    # Statuses whose seats are taken on the trip (and earned once it is completed)
+    SEAT_HOLDING_STATUSES = ('accepted', 'completed')
+    
+    # Dependent ride request transitions applied when a trip changes status, as trip status -> (from statuses, to status)
+    TRIP_CASCADES = {
+        'cancelled': (('pending', 'accepted'), 'cancelled'),
+        'in_progress': (('pending',), 'rejected'),
+        'completed': (('accepted',), 'completed'),
+        'expired': (('pending', 'accepted'), 'expired')
+    }
+    
+    # Columns fetched per use case, see app.utils.query
+    PROJECTIONS = {
+        'full': ('id', 'trip_id', 'passenger_id',
+                 'pickup_latitude', 'pickup_longitude', 'pickup_address',
+                 'dropoff_latitude', 'dropoff_longitude', 'dropoff_address',
+                 'status', 'seats_requested', 'message',
+                 'created_at', 'updated_at'),
+        'id': ('id',),
+        'status': ('id', 'status'),
+        'seats': ('seats_requested',),
+        'trip_seats': ('trip_id', 'seats_requested'),
+        'transition': ('id', 'trip_id', 'passenger_id', 'status', 'seats_requested'),
+        'transition_route': ('id', 'trip_id', 'passenger_id', 'status', 'seats_requested',
+                             'pickup_latitude', 'pickup_longitude', 'dropoff_latitude', 'dropoff_longitude'),
+        'participant': ('pickup_address', 'dropoff_address', 'seats_requested', 'status'),
+        'history': ('id', 'pickup_address', 'dropoff_address', 'status', 'seats_requested',
+                    'created_at', 'updated_at')
+    }
+    
+    __slots__ = PROJECTIONS['full']
+    FIELD_SET = frozenset(__slots__)
+    
     def __init__(self, id=None, trip_id=None, passenger_id=None, 
                  pickup_latitude=None, pickup_longitude=None, pickup_address=None,
                  dropoff_latitude=None, dropoff_longitude=None, dropoff_address=None,
@@ -15,7 +52,7 @@ class RideRequest:
         self.dropoff_latitude = dropoff_latitude
         self.dropoff_longitude = dropoff_longitude
         self.dropoff_address = dropoff_address
-        self.status = status  # 'pending', 'accepted', 'rejected', 'cancelled', 'completed'
+        self.status = status  # 'pending', 'accepted', 'rejected', 'cancelled', 'completed', 'expired'
         self.seats_requested = seats_requested
         self.message = message
         self.created_at = created_at
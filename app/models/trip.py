@@ -1,11 +1,47 @@
-class Trip:
+from app.models.base import SlottedModel
+
+class Trip(SlottedModel):
     """Trip model for interacting with the trips table in Supabase."""
     
+    TABLE = 'trips'
+    
+    # Columns fetched per use case, see app.utils.query
+    PROJECTIONS = {
+        'full': ('id', 'driver_id', 'vehicle_id',
+                 'start_latitude', 'start_longitude', 'start_address',
+                 'end_latitude', 'end_longitude', 'end_address',
+                 'start_time', 'end_time', 'status',
+                 'available_seats', 'price', 'description',
+                 'route_distance_km', 'duration_min',
+                 'created_at', 'updated_at'),
+        'id': ('id',),
+        'status': ('id', 'status'),
+        'capacity': ('id', 'driver_id', 'status', 'available_seats'),
+        'route': ('id', 'status', 'start_latitude', 'start_longitude', 'end_latitude', 'end_longitude', 'start_time'),
+        'card': ('id', 'driver_id', 'vehicle_id',
+                 'start_latitude', 'start_longitude', 'start_address',
+                 'end_latitude', 'end_longitude', 'end_address',
+                 'start_time', 'status', 'available_seats', 'price',
+                 'route_distance_km', 'duration_min'),
+        'search': ('id', 'driver_id',
+                   'start_latitude', 'start_longitude', 'end_latitude', 'end_longitude',
+                   'start_time', 'status', 'available_seats', 'price', 'route_distance_km'),
+        'stats': ('id', 'status', 'start_latitude', 'start_longitude',
+                  'end_latitude', 'end_longitude', 'price', 'route_distance_km'),
+        'history': ('id', 'start_address', 'end_address', 'start_time', 'status',
+                    'price', 'created_at', 'updated_at'),
+        'history_passenger': ('id', 'start_time', 'price')
+    }
+    
+    __slots__ = PROJECTIONS['full']
+    FIELD_SET = frozenset(__slots__)
+    
     def __init__(self, id=None, driver_id=None, vehicle_id=None, 
                  start_latitude=None, start_longitude=None, start_address=None,
                  end_latitude=None, end_longitude=None, end_address=None,
                  start_time=None, end_time=None, status=None,
                  available_seats=None, price=None, description=None,
+                 route_distance_km=None, duration_min=None,
                  created_at=None, updated_at=None):
         self.id = id
         self.driver_id = driver_id
@@ -18,10 +54,12 @@ class Trip:
         self.end_address = end_address
         self.start_time = start_time
         self.end_time = end_time
-        self.status = status  # 'scheduled', 'in_progress', 'completed', 'cancelled'
+        self.status = status  # 'scheduled', 'in_progress', 'completed', 'cancelled', 'expired'
         self.available_seats = available_seats
         self.price = price
         self.description = description
+        self.route_distance_km = route_distance_km  # start->end great-circle distance, stored at write time
+        self.duration_min = duration_min
         self.created_at = created_at
         self.updated_at = updated_at
     
@@ -47,6 +85,8 @@ class Trip:
             available_seats=data.get('available_seats'),
             price=data.get('price'),
             description=data.get('description'),
+            route_distance_km=data.get('route_distance_km'),
+            duration_min=data.get('duration_min'),
             created_at=data.get('created_at'),
             updated_at=data.get('updated_at')
         )
@@ -69,6 +109,8 @@ class Trip:
             'available_seats': self.available_seats,
             'price': self.price,
             'description': self.description,
+            'route_distance_km': self.route_distance_km,
+            'duration_min': self.duration_min,
             'created_at': self.created_at,
             'updated_at': self.updated_at
         } 
\ No newline at end of file
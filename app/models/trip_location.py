@@ -0,0 +1,50 @@
+from app.models.base import SlottedModel
+
+class TripLocation(SlottedModel):
+    """TripLocation model for interacting with the trip_locations table in Supabase (sampled live driver positions)."""
+    
+    TABLE = 'trip_locations'
+    
+    # Columns fetched per use case, see app.utils.query
+    PROJECTIONS = {
+        'full': ('id', 'trip_id', 'driver_id', 'latitude', 'longitude', 'recorded_at'),
+        'id': ('id',),
+        'position': ('latitude', 'longitude', 'recorded_at')
+    }
+    
+    __slots__ = PROJECTIONS['full']
+    FIELD_SET = frozenset(__slots__)
+    
+    def __init__(self, id=None, trip_id=None, driver_id=None, latitude=None, longitude=None, recorded_at=None):
+        self.id = id
+        self.trip_id = trip_id
+        self.driver_id = driver_id
+        self.latitude = latitude
+        self.longitude = longitude
+        self.recorded_at = recorded_at
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Create a TripLocation instance from a dictionary."""
+        if not data:
+            return None
+        
+        return cls(
+            id=data.get('id'),
+            trip_id=data.get('trip_id'),
+            driver_id=data.get('driver_id'),
+            latitude=data.get('latitude'),
+            longitude=data.get('longitude'),
+            recorded_at=data.get('recorded_at')
+        )
+    
+    def to_dict(self):
+        """Convert TripLocation instance to a dictionary."""
+        return {
+            'id': self.id,
+            'trip_id': self.trip_id,
+            'driver_id': self.driver_id,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'recorded_at': self.recorded_at
+        }
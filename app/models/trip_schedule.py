@@ -0,0 +1,99 @@
+from app.models.base import SlottedModel
+
+class TripSchedule(SlottedModel):
+    """TripSchedule model for interacting with the trip_schedules table in Supabase."""
+    
+    TABLE = 'trip_schedules'
+    
+    # Columns fetched per use case, see app.utils.query
+    PROJECTIONS = {
+        'full': ('id', 'driver_id', 'vehicle_id',
+                 'start_latitude', 'start_longitude', 'start_address',
+                 'end_latitude', 'end_longitude', 'end_address',
+                 'recurrence', 'first_departure', 'duration_minutes',
+                 'available_seats', 'price', 'description',
+                 'status', 'materialized_until', 'created_at', 'updated_at'),
+        'id': ('id',),
+        'status': ('id', 'status')
+    }
+    
+    __slots__ = PROJECTIONS['full']
+    FIELD_SET = frozenset(__slots__)
+    
+    def __init__(self, id=None, driver_id=None, vehicle_id=None,
+                 start_latitude=None, start_longitude=None, start_address=None,
+                 end_latitude=None, end_longitude=None, end_address=None,
+                 recurrence=None, first_departure=None, duration_minutes=None,
+                 available_seats=None, price=None, description=None,
+                 status=None, materialized_until=None, created_at=None, updated_at=None):
+        self.id = id
+        self.driver_id = driver_id
+        self.vehicle_id = vehicle_id
+        self.start_latitude = start_latitude
+        self.start_longitude = start_longitude
+        self.start_address = start_address
+        self.end_latitude = end_latitude
+        self.end_longitude = end_longitude
+        self.end_address = end_address
+        self.recurrence = recurrence  # RRULE, e.g. 'FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR'
+        self.first_departure = first_departure
+        self.duration_minutes = duration_minutes
+        self.available_seats = available_seats
+        self.price = price
+        self.description = description
+        self.status = status  # 'active', 'ended'
+        self.materialized_until = materialized_until
+        self.created_at = created_at
+        self.updated_at = updated_at
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Create a TripSchedule instance from a dictionary."""
+        if not data:
+            return None
+        
+        return cls(
+            id=data.get('id'),
+            driver_id=data.get('driver_id'),
+            vehicle_id=data.get('vehicle_id'),
+            start_latitude=data.get('start_latitude'),
+            start_longitude=data.get('start_longitude'),
+            start_address=data.get('start_address'),
+            end_latitude=data.get('end_latitude'),
+            end_longitude=data.get('end_longitude'),
+            end_address=data.get('end_address'),
+            recurrence=data.get('recurrence'),
+            first_departure=data.get('first_departure'),
+            duration_minutes=data.get('duration_minutes'),
+            available_seats=data.get('available_seats'),
+            price=data.get('price'),
+            description=data.get('description'),
+            status=data.get('status'),
+            materialized_until=data.get('materialized_until'),
+            created_at=data.get('created_at'),
+            updated_at=data.get('updated_at')
+        )
+    
+    def to_dict(self):
+        """Convert TripSchedule instance to a dictionary."""
+        return {
+            'id': self.id,
+            'driver_id': self.driver_id,
+            'vehicle_id': self.vehicle_id,
+            'start_latitude': self.start_latitude,
+            'start_longitude': self.start_longitude,
+            'start_address': self.start_address,
+            'end_latitude': self.end_latitude,
+            'end_longitude': self.end_longitude,
+            'end_address': self.end_address,
+            'recurrence': self.recurrence,
+            'first_departure': self.first_departure,
+            'duration_minutes': self.duration_minutes,
+            'available_seats': self.available_seats,
+            'price': self.price,
+            'description': self.description,
+            'status': self.status,
+            'materialized_until': self.materialized_until,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
+        }
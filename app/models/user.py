@@ -1,12 +1,32 @@
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
+from app.models.base import SlottedModel
 import logging
 
 logger = logging.getLogger(__name__)
 
-class User:
+class User(SlottedModel):
     """User model for interacting with the users table in Supabase."""
     
+    TABLE = 'users'
+    
+    # Columns fetched per use case, see app.utils.query
+    PROJECTIONS = {
+        'full': ('id', 'email', 'name', 'profile_image_url', 'phone', 'date_of_birth',
+                 'gender', 'institute', 'created_at', 'updated_at',
+                 'onboarding_completed', 'average_rating'),
+        'auth': ('id', 'email', 'name', 'profile_image_url', 'phone', 'date_of_birth',
+                 'gender', 'institute', 'created_at', 'updated_at',
+                 'onboarding_completed', 'average_rating', 'password_hash'),
+        'id': ('id',),
+        'summary': ('id', 'name', 'profile_image_url'),
+        'contact': ('id', 'name', 'profile_image_url', 'phone'),
+        'driver': ('id', 'name', 'profile_image_url', 'institute')
+    }
+    
+    __slots__ = PROJECTIONS['full']
+    FIELD_SET = frozenset(__slots__)
+    
     def __init__(self, id=None, email=None, name=None, profile_image_url=None, 
                  phone=None, date_of_birth=None, gender=None, institute=None,
                  created_at=None, updated_at=None, onboarding_completed=False,
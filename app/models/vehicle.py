@@ -1,6 +1,22 @@
-class Vehicle:
+from app.models.base import SlottedModel
+
+class Vehicle(SlottedModel):
     """Vehicle model for interacting with the vehicles table in Supabase."""
     
+    TABLE = 'vehicles'
+    
+    # Columns fetched per use case, see app.utils.query
+    PROJECTIONS = {
+        'full': ('id', 'user_id', 'make', 'model', 'year', 'color', 'license_plate',
+                 'capacity', 'image_url', 'created_at', 'updated_at'),
+        'id': ('id',)
+    }
+    
+    PROJECTIONS['sync'] = PROJECTIONS['full'] + ('deleted_at',)
+    
+    __slots__ = PROJECTIONS['full']
+    FIELD_SET = frozenset(__slots__)
+    
     def __init__(self, id=None, user_id=None, make=None, model=None, year=None,
                  color=None, license_plate=None, capacity=None, image_url=None,
                  created_at=None, updated_at=None):
@@ -0,0 +1,22 @@
+from flask import Blueprint, jsonify
+from app.services.dashboard_service import DashboardService
+from app.utils.auth import token_required
+from app.utils.json_provider import json_response
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+dashboard_bp = Blueprint('dashboard', __name__)
+
+@dashboard_bp.route('/driver', methods=['GET'])
+@token_required
+def get_driver_dashboard(user_id):
+    """Get the driver home screen data in one call."""
+    logger.info(f"Request to get driver dashboard for user: {user_id}")
+    
+    result = DashboardService.get_driver_dashboard(user_id)
+    if not result['success']:
+        return jsonify(result), 500
+    
+    return json_response(result)
@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from app.services.location_service import LocationService
 from app.utils.auth import token_required
+from app.utils.etag import conditional_json_response
+from app.utils.sync import parse_since
 import logging
 
 # Set up logging
@@ -15,9 +17,16 @@ def get_locations(user_id):
     logger.info(f"Request to get all locations for user: {user_id}")
     
     # Get locations
-    result = LocationService.get_user_locations(user_id)
+    since = request.args.get('since')
+    if since:
+        try:
+            parse_since(since)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
     
-    return jsonify(result), 200
+    result = LocationService.get_user_locations(user_id, since)
+    
+    return conditional_json_response(result, result.get('locations'))
 
 @locations_bp.route('/<location_id>', methods=['GET'])
 @token_required
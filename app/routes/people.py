@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from app.services.person_service import PersonService
 from app.utils.auth import token_required
+from app.utils.etag import conditional_json_response
+from app.utils.sync import parse_since
 import logging
 
 # Set up logging
@@ -15,9 +17,16 @@ def get_people(user_id):
     logger.info(f"Request to get all people for user: {user_id}")
     
     # Get people
-    result = PersonService.get_user_people(user_id)
+    since = request.args.get('since')
+    if since:
+        try:
+            parse_since(since)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
     
-    return jsonify(result), 200
+    result = PersonService.get_user_people(user_id, since)
+    
+    return conditional_json_response(result, result.get('people'))
 
 @people_bp.route('/<person_id>', methods=['GET'])
 @token_required
@@ -1,6 +1,10 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app.services.rating_service import RatingService
+from app.services.async_rating_service import AsyncRatingService
+from app.utils.supabase_client import async_supabase_admin
 from app.utils.auth import token_required
+from app.utils.json_provider import json_response
+from app.utils.pagination import page_args
 import logging
 
 # Set up logging
@@ -10,17 +14,27 @@ ratings_bp = Blueprint('ratings', __name__)
 
 @ratings_bp.route('', methods=['GET'])
 @token_required
-def get_ratings(user_id):
+async def get_ratings(user_id):
     """Get ratings for the current user."""
     logger.info(f"Request to get ratings for user: {user_id}")
     
     # Check if user wants to see ratings they've given or received
     as_rater = request.args.get('as_rater', 'false').lower() == 'true'
     
+    # Pagination is opt-in, requested by passing limit or cursor
+    try:
+        page_size, cursor = page_args(request.args, 'created_at', required=False)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
     # Get ratings
-    result = RatingService.get_ratings(user_id, as_rater)
+    if current_app.config.get('ASYNC_READS_ENABLED'):
+        async with async_supabase_admin() as client:
+            result = await AsyncRatingService.get_ratings(client, user_id, as_rater, page_size, cursor)
+    else:
+        result = RatingService.get_ratings(user_id, as_rater, page_size, cursor)
     
-    return jsonify(result), 200
+    return json_response(result)
 
 @ratings_bp.route('/<rating_id>', methods=['GET'])
 @token_required
@@ -67,23 +81,31 @@ def submit_rating(user_id):
 
 @ratings_bp.route('/user/<user_id>', methods=['GET'])
 @token_required
-def get_user_ratings(current_user_id, user_id):
+async def get_user_ratings(current_user_id, user_id):
     """Get ratings for a specific user."""
     logger.info(f"Request to get ratings for user: {user_id}")
     
     # Get ratings
-    result = RatingService.get_user_ratings(user_id)
+    if current_app.config.get('ASYNC_READS_ENABLED'):
+        async with async_supabase_admin() as client:
+            result = await AsyncRatingService.get_user_ratings(client, user_id)
+    else:
+        result = RatingService.get_user_ratings(user_id)
     
-    return jsonify(result), 200
+    return json_response(result)
 
 @ratings_bp.route('/trip/<trip_id>', methods=['GET'])
 @token_required
-def get_trip_ratings(user_id, trip_id):
+async def get_trip_ratings(user_id, trip_id):
     """Get ratings for a specific trip."""
     logger.info(f"Request to get ratings for trip: {trip_id}")
     
     # Get ratings
-    result = RatingService.get_trip_ratings(trip_id, user_id)
+    if current_app.config.get('ASYNC_READS_ENABLED'):
+        async with async_supabase_admin() as client:
+            result = await AsyncRatingService.get_trip_ratings(client, trip_id, user_id)
+    else:
+        result = RatingService.get_trip_ratings(trip_id, user_id)
     
     if not result['success']:
         return jsonify(result), 404
@@ -1,6 +1,14 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app.services.ride_request_service import RideRequestService
+from app.services.async_ride_request_service import AsyncRideRequestService
+from app.services.matching_service import MatchingService
+from app.services.assignment_service import AssignmentService
+from app.utils.supabase_client import async_supabase_admin
 from app.utils.auth import token_required
+from app.utils.pagination import page_args, parse_page_size
+from app.utils.events import event_bus
+from app.utils.sse import sse_response
+from app.utils.compression import no_compression
 import logging
 
 # Set up logging
@@ -10,15 +18,25 @@ ride_requests_bp = Blueprint('ride_requests', __name__)
 
 @ride_requests_bp.route('', methods=['GET'])
 @token_required
-def get_ride_requests(user_id):
+async def get_ride_requests(user_id):
     """Get all ride requests for a user."""
     logger.info(f"Request to get ride requests for user: {user_id}")
     
     # Check if user wants to see requests as a driver
     is_driver = request.args.get('is_driver', 'false').lower() == 'true'
     
+    # Pagination is opt-in, requested by passing limit or cursor
+    try:
+        page_size, cursor = page_args(request.args, 'created_at', required=False)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
     # Get ride requests
-    result = RideRequestService.get_ride_requests(user_id, is_driver)
+    if current_app.config.get('ASYNC_READS_ENABLED'):
+        async with async_supabase_admin() as client:
+            result = await AsyncRideRequestService.get_ride_requests(client, user_id, is_driver, page_size, cursor)
+    else:
+        result = RideRequestService.get_ride_requests(user_id, is_driver, page_size, cursor)
     
     return jsonify(result), 200
 
@@ -34,15 +52,124 @@ def get_pending_ride_requests(user_id, trip_id):
     
     return jsonify(result), 200
 
+@ride_requests_bp.route('/pending/<trip_id>', methods=['PUT'])
+@token_required
+def bulk_update_pending_ride_requests(user_id, trip_id):
+    """Accept or reject several pending ride requests for a trip in one call (driver only)."""
+    logger.info(f"Request to bulk update pending ride requests for trip: {trip_id} by driver: {user_id}")
+    
+    data = request.get_json(silent=True) or {}
+    updates = data.get('updates')
+    
+    # Validate the batch shape; per-item problems are reported in the results
+    if not isinstance(updates, list) or not updates:
+        logger.warning("Missing or empty updates list")
+        return jsonify({'success': False, 'message': 'updates must be a non-empty list'}), 400
+    
+    if len(updates) > current_app.config['BULK_STATUS_MAX_ITEMS']:
+        logger.warning(f"Too many updates in batch: {len(updates)}")
+        return jsonify({'success': False, 'message': f"At most {current_app.config['BULK_STATUS_MAX_ITEMS']} updates per request"}), 400
+    
+    if not all(isinstance(item, dict) for item in updates):
+        logger.warning("Malformed update item")
+        return jsonify({'success': False, 'message': 'Each update must be an object with id and status'}), 400
+    
+    result = RideRequestService.bulk_update_ride_request_status(trip_id, user_id, updates)
+    
+    if not result['success']:
+        return jsonify(result), 400
+    
+    return jsonify(result), 200
+
+@ride_requests_bp.route('/pending/<trip_id>/events', methods=['GET'])
+@no_compression
+@token_required
+def stream_trip_ride_request_events(user_id, trip_id):
+    """Stream new ride requests and status changes for a trip as Server-Sent Events (driver only)."""
+    logger.info(f"Request to stream ride request events for trip: {trip_id}, user: {user_id}")
+    
+    if event_bus.connection_count() >= current_app.config['SSE_MAX_CONNECTIONS']:
+        logger.warning("Too many open event streams")
+        return jsonify({'success': False, 'message': 'Too many open event streams, retry later'}), 503, {'Retry-After': '10'}
+    
+    # Subscribe before taking the snapshot so no change falls in between
+    subscription = event_bus.subscribe(f"trip:{trip_id}")
+    result = RideRequestService.get_pending_requests_for_trip(trip_id, user_id)
+    if not result['success']:
+        subscription.close()
+        return jsonify(result), 400
+    
+    return sse_response(subscription, [('snapshot', result)])
+
+@ride_requests_bp.route('/<request_id>/events', methods=['GET'])
+@no_compression
+@token_required
+def stream_ride_request_events(user_id, request_id):
+    """Stream status changes of a ride request and its trip as Server-Sent Events."""
+    logger.info(f"Request to stream events for ride request: {request_id}, user: {user_id}")
+    
+    if event_bus.connection_count() >= current_app.config['SSE_MAX_CONNECTIONS']:
+        logger.warning("Too many open event streams")
+        return jsonify({'success': False, 'message': 'Too many open event streams, retry later'}), 503, {'Retry-After': '10'}
+    
+    # Subscribe before taking the snapshot so no change falls in between
+    subscription = event_bus.subscribe(f"ride_request:{request_id}")
+    result = RideRequestService.get_ride_request_stream_state(request_id, user_id)
+    if not result['success']:
+        subscription.close()
+        return jsonify(result), 404
+    
+    subscription.add(f"trip_status:{result['trip']['id']}")
+    return sse_response(subscription, [('snapshot', result)])
+
+@ride_requests_bp.route('/assignments', methods=['GET'])
+@token_required
+def get_assignment_proposals(user_id):
+    """Propose how to assign the pending requests on the current driver's trips in a time window."""
+    logger.info(f"Request to propose assignments for driver: {user_id}")
+    
+    # Validate required parameters
+    for param in ['window_start', 'window_end']:
+        if param not in request.args:
+            logger.warning(f"Missing required parameter: {param}")
+            return jsonify({'success': False, 'message': f'Missing required parameter: {param}'}), 400
+    
+    result = AssignmentService.propose_assignments(request.args['window_start'], request.args['window_end'], driver_id=user_id)
+    if not result['success']:
+        return jsonify(result), 500
+    
+    return jsonify(result), 200
+
 @ride_requests_bp.route('/<request_id>', methods=['GET'])
 @token_required
-def get_ride_request(user_id, request_id):
+async def get_ride_request(user_id, request_id):
     """Get a ride request by ID."""
     logger.info(f"Request to get ride request: {request_id} for user: {user_id}")
     
     # Get ride request
-    result = RideRequestService.get_ride_request_by_id(request_id, user_id)
+    if current_app.config.get('ASYNC_READS_ENABLED'):
+        async with async_supabase_admin() as client:
+            result = await AsyncRideRequestService.get_ride_request_by_id(client, request_id, user_id)
+    else:
+        result = RideRequestService.get_ride_request_by_id(request_id, user_id)
+    
+    if not result['success']:
+        return jsonify(result), 404
+    
+    return jsonify(result), 200
+
+@ride_requests_bp.route('/<request_id>/matches', methods=['GET'])
+@token_required
+def get_ride_request_matches(user_id, request_id):
+    """Find scheduled trips that fit a ride request's pickup and dropoff."""
+    logger.info(f"Request to match trips for ride request: {request_id}, user: {user_id}")
+    
+    try:
+        limit = parse_page_size(request.args.get('limit'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     
+    result = MatchingService.match_ride_request(request_id, user_id, limit)
     if not result['success']:
         return jsonify(result), 404
     
@@ -0,0 +1,60 @@
+from flask import Blueprint, request, jsonify
+from app.services.schedule_service import ScheduleService
+from app.utils.auth import token_required
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+schedules_bp = Blueprint('schedules', __name__)
+
+@schedules_bp.route('', methods=['GET'])
+@token_required
+def get_schedules(user_id):
+    """Get the current driver's recurring trip schedules."""
+    logger.info(f"Request to get trip schedules for driver: {user_id}")
+    
+    result = ScheduleService.get_driver_schedules(user_id)
+    if not result['success']:
+        return jsonify(result), 500
+    
+    return jsonify(result), 200
+
+@schedules_bp.route('/create', methods=['POST'])
+@token_required
+def create_schedule(user_id):
+    """Create a recurring trip schedule; its upcoming trips are created right away."""
+    logger.info(f"Request to create trip schedule for driver: {user_id}")
+    data = request.get_json()
+    
+    # Validate required fields
+    required_fields = [
+        'vehicle_id',
+        'start_latitude', 'start_longitude', 'start_address',
+        'end_latitude', 'end_longitude', 'end_address',
+        'recurrence', 'first_departure', 'available_seats', 'price'
+    ]
+    for field in required_fields:
+        if field not in data:
+            logger.warning(f"Missing required field: {field}")
+            return jsonify({'success': False, 'message': f'Missing required field: {field}'}), 400
+    
+    result = ScheduleService.create_schedule(user_id, data)
+    
+    if not result['success']:
+        return jsonify(result), 400
+    
+    return jsonify(result), 201
+
+@schedules_bp.route('/<schedule_id>/end', methods=['PUT'])
+@token_required
+def end_schedule(user_id, schedule_id):
+    """Stop a recurring trip schedule from creating more trips."""
+    logger.info(f"Request to end trip schedule: {schedule_id} by driver: {user_id}")
+    
+    result = ScheduleService.end_schedule(schedule_id, user_id)
+    
+    if not result['success']:
+        return jsonify(result), 400
+    
+    return jsonify(result), 200
@@ -1,6 +1,15 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app.services.trip_service import TripService
+from app.services.async_trip_service import AsyncTripService
+from app.services.matching_service import MatchingService
+from app.services.live_location_service import LiveLocationService
+from app.utils.supabase_client import async_supabase_admin
 from app.utils.auth import token_required
+from app.utils.json_provider import json_response
+from app.utils.etag import conditional_json_response
+from app.utils.export import EXPORT_FORMATS, export_response
+from app.utils.pagination import page_args, parse_page_size
+from app.utils.timestamps import to_epoch
 import datetime
 import logging
 
@@ -9,6 +18,19 @@ logger = logging.getLogger(__name__)
 
 trips_bp = Blueprint('trips', __name__)
 
+# Column order of the CSV trip history export
+HISTORY_EXPORT_COLUMNS = ['id', 'ride_request_id', 'role', 'start_address', 'end_address', 'start_time', 'status',
+                          'passengers', 'seats', 'price', 'earnings', 'created_at', 'completed_at']
+
+def search_sort_args(near):
+    """Read the sort parameter of the search endpoints. Returns (sort, sort_column), raises ValueError if invalid."""
+    sort = request.args.get('sort') or ('distance' if near else 'departure')
+    if sort not in TripService.SEARCH_SORTS:
+        raise ValueError(f"Sort must be one of: {', '.join(TripService.SEARCH_SORTS)}")
+    if sort == 'distance' and not near:
+        raise ValueError('Sorting by distance requires near_latitude and near_longitude')
+    return sort, TripService.SEARCH_SORTS[sort]
+
 @trips_bp.route('', methods=['GET'])
 @token_required
 def get_trips(user_id):
@@ -31,24 +53,34 @@ def get_trips(user_id):
     if 'start_time_before' in request.args:
         filters['start_time_before'] = request.args.get('start_time_before')
     
+    # Pagination
+    try:
+        page_size, cursor = page_args(request.args, 'start_time')
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
     # Get trips
-    result = TripService.get_trips(filters)
+    result = TripService.get_trips(filters, page_size, cursor)
     
-    return jsonify(result), 200
+    return json_response(result)
 
 @trips_bp.route('/upcoming', methods=['GET'])
 @token_required
-def get_upcoming_trips(user_id):
+async def get_upcoming_trips(user_id):
     """Get upcoming trips for the authenticated user."""
     logger.info(f"Request to get upcoming trips for user: {user_id}")
     
     role = request.args.get('role', 'both')  # 'driver', 'passenger', or 'both'
     
-    result = TripService.get_upcoming_trips(user_id, role)
+    if current_app.config.get('ASYNC_READS_ENABLED'):
+        async with async_supabase_admin() as client:
+            result = await AsyncTripService.get_upcoming_trips(client, user_id, role)
+    else:
+        result = TripService.get_upcoming_trips(user_id, role)
     if not result['success']:
         return jsonify(result), 500  # Use 500 for server errors
     
-    return jsonify(result), 200
+    return conditional_json_response(result)
 
 @trips_bp.route('/search/enriched', methods=['GET'])
 @token_required
@@ -66,25 +98,92 @@ def search_enriched_trips(user_id):
         'max_price': request.args.get('max_price')
     }
     
-    result = TripService.search_enriched_trips(user_id, filters)
+    # Sorting and pagination
+    near = bool(filters['near_latitude'] and filters['near_longitude'])
+    try:
+        sort, sort_column = search_sort_args(near)
+        page_size, cursor = page_args(request.args, sort_column, required=False)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    result = TripService.search_enriched_trips(user_id, filters, page_size, cursor, sort)
     if not result['success']:
         return jsonify(result), 500  # Use 500 for server errors
     
-    return jsonify(result), 200
+    return json_response(result)
+
+@trips_bp.route('/match', methods=['GET'])
+@token_required
+def match_trips(user_id):
+    """Find scheduled trips whose route passes both a pickup and a dropoff point."""
+    logger.info(f"Request to match trips for user: {user_id}")
+    
+    # Validate required parameters
+    required_params = ['pickup_latitude', 'pickup_longitude', 'dropoff_latitude', 'dropoff_longitude']
+    for param in required_params:
+        if param not in request.args:
+            logger.warning(f"Missing required parameter: {param}")
+            return jsonify({'success': False, 'message': f'Missing required parameter: {param}'}), 400
+    
+    try:
+        pickup = (float(request.args['pickup_latitude']), float(request.args['pickup_longitude']))
+        dropoff = (float(request.args['dropoff_latitude']), float(request.args['dropoff_longitude']))
+        seats = int(request.args.get('seats', 1))
+        limit = parse_page_size(request.args.get('limit'))
+        # Optional departure window of ISO 8601 timestamps, rejected here if unreadable
+        departs_after = request.args.get('departs_after')
+        departs_before = request.args.get('departs_before')
+        for value in (departs_after, departs_before):
+            if value:
+                to_epoch(value)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    result = MatchingService.match_trips(pickup, dropoff, seats, limit, exclude_driver_id=user_id,
+                                         departs_after=departs_after, departs_before=departs_before)
+    if not result['success']:
+        return jsonify(result), 500
+    
+    return json_response(result)
+
+@trips_bp.route('/batch', methods=['GET'])
+@token_required
+def get_trips_batch(user_id):
+    """Get several trips by ID in one call, e.g. ?ids=a,b,c."""
+    trip_ids = [trip_id.strip() for trip_id in request.args.get('ids', '').split(',') if trip_id.strip()]
+    logger.info(f"Request to get {len(trip_ids)} trips by ID")
+    
+    if not trip_ids:
+        logger.warning("Missing required parameter: ids")
+        return jsonify({'success': False, 'message': 'Missing required parameter: ids'}), 400
+    
+    if len(trip_ids) > current_app.config['TRIP_BATCH_MAX_IDS']:
+        logger.warning(f"Too many trip ids: {len(trip_ids)}")
+        return jsonify({'success': False, 'message': f"At most {current_app.config['TRIP_BATCH_MAX_IDS']} ids per request"}), 400
+    
+    result = TripService.get_trips_by_ids(trip_ids)
+    if not result['success']:
+        return jsonify(result), 500
+    
+    return conditional_json_response(result, result['trips'])
 
 @trips_bp.route('/<trip_id>', methods=['GET'])
 @token_required
-def get_trip(user_id, trip_id):
+async def get_trip(user_id, trip_id):
     """Get a trip by ID."""
     logger.info(f"Request to get trip: {trip_id}")
     
     # Get trip
-    result = TripService.get_trip_by_id(trip_id)
+    if current_app.config.get('ASYNC_READS_ENABLED'):
+        async with async_supabase_admin() as client:
+            result = await AsyncTripService.get_trip_by_id(client, trip_id)
+    else:
+        result = TripService.get_trip_by_id(trip_id)
     
     if not result['success']:
         return jsonify(result), 404
     
-    return jsonify(result), 200
+    return conditional_json_response(result, [result['trip']])
 
 @trips_bp.route('/create', methods=['POST'])
 @token_required
@@ -157,6 +256,44 @@ def start_trip(user_id, trip_id):
     
     return jsonify(result), 200
 
+@trips_bp.route('/<trip_id>/location', methods=['POST'])
+@token_required
+def report_location(user_id, trip_id):
+    """Report the driver's position on an in-progress trip: one ping or {'pings': [...]}."""
+    # Called every few seconds per driver, so only logged at debug level
+    logger.debug(f"Location pings for trip: {trip_id} from user: {user_id}")
+    
+    try:
+        pings = LiveLocationService.parse_pings(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    result = LiveLocationService.record_pings(trip_id, user_id, pings)
+    
+    if not result['success']:
+        return jsonify(result), 400
+    
+    return json_response(result, 202)
+
+@trips_bp.route('/<trip_id>/location', methods=['GET'])
+@token_required
+def get_location(user_id, trip_id):
+    """Get the driver's latest position on an in-progress trip; ?since=<epoch seconds> adds the recent track."""
+    logger.debug(f"Request for live location of trip: {trip_id} by user: {user_id}")
+    
+    since = request.args.get('since')
+    try:
+        since = float(since) if since is not None else None
+    except ValueError:
+        return jsonify({'success': False, 'message': 'since must be epoch seconds'}), 400
+    
+    result = LiveLocationService.get_location(trip_id, user_id, since)
+    
+    if not result['success']:
+        return jsonify(result), 404
+    
+    return json_response(result)
+
 @trips_bp.route('/<trip_id>/complete', methods=['PUT'])
 @token_required
 def complete_trip(user_id, trip_id):
@@ -198,10 +335,18 @@ def search_trips(user_id):
         filters['near_longitude'] = request.args.get('near_longitude')
         filters['radius_km'] = request.args.get('radius_km', '1')  # Default radius is 1 km
     
+    # Sorting and pagination, which is opt-in here and requested by passing limit or cursor
+    near = 'near_latitude' in filters
+    try:
+        sort, sort_column = search_sort_args(near)
+        page_size, cursor = page_args(request.args, sort_column, required=False)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
     # Search trips
-    result = TripService.search_trips(filters)
+    result = TripService.search_trips(filters, page_size, cursor, sort)
     
-    return jsonify(result), 200
+    return json_response(result)
 
 @trips_bp.route('/stats', methods=['GET'])
 @token_required
@@ -242,7 +387,27 @@ def get_trip_history(user_id):
     # Get trip history
     result = TripService.get_trip_history(user_id, filters)
     
-    return jsonify(result), 200
+    return json_response(result)
+
+@trips_bp.route('/history/export', methods=['GET'])
+@token_required
+def export_trip_history(user_id):
+    """Stream the current user's complete trip history and earnings as NDJSON or CSV."""
+    logger.info(f"Request to export trip history for user: {user_id}")
+    
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'success': False, 'message': f"Format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    
+    # Add filters
+    filters = {}
+    for field in ['role', 'status', 'from_date', 'to_date']:
+        if field in request.args:
+            filters[field] = request.args.get(field)
+    
+    chunks = TripService.iter_trip_history(user_id, filters)
+    
+    return export_response(chunks, export_format, 'trip-history', HISTORY_EXPORT_COLUMNS)
 
 @trips_bp.route('/<trip_id>/participants', methods=['GET'])
 @token_required
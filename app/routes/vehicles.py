@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from app.services.vehicle_service import VehicleService
 from app.utils.auth import token_required
+from app.utils.etag import conditional_json_response
+from app.utils.sync import parse_since
 
 vehicles_bp = Blueprint('vehicles', __name__)
 
@@ -8,10 +10,17 @@ vehicles_bp = Blueprint('vehicles', __name__)
 @token_required
 def get_vehicles(user_id):
     """Get all vehicles for current user."""
+    since = request.args.get('since')
+    if since:
+        try:
+            parse_since(since)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+    
     # Get vehicles
-    result = VehicleService.get_user_vehicles(user_id)
+    result = VehicleService.get_user_vehicles(user_id, since)
     
-    return jsonify(result), 200
+    return conditional_json_response(result, result.get('vehicles'))
 
 @vehicles_bp.route('/<vehicle_id>', methods=['GET'])
 @token_required
@@ -0,0 +1,95 @@
+import time
+from app.utils.supabase_client import supabase_admin
+from app.models.trip import Trip
+from app.models.ride_request import RideRequest
+from app.utils.query import select
+from app.utils.assignment import assign_requests
+from app.config import get_config
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+config = get_config()
+
+# Trip ids per in_() filter, to keep request URLs short
+ID_CHUNK_SIZE = 200
+
+class AssignmentService:
+    """Service for proposing batch assignments of pending ride requests to scheduled trips."""
+    
+    @staticmethod
+    def propose_assignments(window_start, window_end, driver_id=None):
+        """
+        Propose an assignment of the pending ride requests for scheduled trips departing in a time window.
+        Passengers may be moved to another trip in the window that fits their pickup and dropoff, to fill
+        as many seats as possible. With driver_id, only that driver's trips are considered.
+        Nothing is written; the proposals can be applied with the ride request status endpoints.
+        """
+        try:
+            logger.info(f"Proposing assignments for trips between {window_start} and {window_end}, driver: {driver_id}")
+            
+            query = select(supabase_admin, Trip, 'card')\
+                .eq('status', 'scheduled')\
+                .gte('start_time', window_start)\
+                .lte('start_time', window_end)
+            
+            if driver_id:
+                query = query.eq('driver_id', driver_id)
+            
+            trips = query.execute().data
+            trip_ids = [trip['id'] for trip in trips]
+            
+            # Load pending requests and accepted seats for the trips, a chunk of ids at a time
+            requests = []
+            accepted_seats = {}
+            for i in range(0, len(trip_ids), ID_CHUNK_SIZE):
+                chunk = trip_ids[i:i + ID_CHUNK_SIZE]
+                requests.extend(select(supabase_admin, RideRequest, 'transition_route').in_('trip_id', chunk).eq('status', 'pending').execute().data)
+                for req in select(supabase_admin, RideRequest, 'trip_seats').in_('trip_id', chunk).eq('status', 'accepted').execute().data:
+                    accepted_seats[req['trip_id']] = accepted_seats.get(req['trip_id'], 0) + int(req['seats_requested'])
+            
+            started = time.perf_counter()
+            assignments, unassigned = assign_requests(
+                trips, requests, accepted_seats,
+                config.MATCH_CORRIDOR_KM,
+                config.MATCH_MAX_DETOUR_KM,
+                config.ASSIGN_MAX_TRIP_DETOUR_KM,
+                config.ASSIGN_TIME_TOLERANCE_MIN * 60
+            )
+            solve_ms = (time.perf_counter() - started) * 1000
+            
+            requests_by_id = {req['id']: req for req in requests}
+            proposals = []
+            for request_id, (trip_id, detour) in assignments.items():
+                req = requests_by_id[request_id]
+                proposals.append({
+                    'ride_request_id': request_id,
+                    'trip_id': trip_id,
+                    'requested_trip_id': req['trip_id'],
+                    'reassigned': trip_id != req['trip_id'],
+                    'seats': int(req['seats_requested']),
+                    'detour_km': detour
+                })
+            
+            seats_requested = sum(int(req['seats_requested']) for req in requests)
+            seats_filled = sum(proposal['seats'] for proposal in proposals)
+            logger.info(f"Assigned {len(proposals)} of {len(requests)} requests ({seats_filled}/{seats_requested} seats) "
+                        f"to {len(trips)} trips in {solve_ms:.1f} ms")
+            
+            return {
+                'success': True,
+                'assignments': proposals,
+                'unassigned': unassigned,
+                'stats': {
+                    'trips': len(trips),
+                    'requests': len(requests),
+                    'seats_requested': seats_requested,
+                    'seats_filled': seats_filled,
+                    'solve_ms': round(solve_ms, 1)
+                }
+            }
+            
+        except Exception as e:
+            logger.error(f"Error proposing assignments: {str(e)}")
+            return {'success': False, 'message': str(e)}
@@ -0,0 +1,152 @@
+from app.models.rating import Rating
+from app.models.ride_request import RideRequest
+from app.models.user import User
+from app.services.async_trip_service import AsyncTripService
+from app.utils.concurrency import gather_bounded
+from app.utils.query import select
+from app.utils.pagination import keyset_query, keyset_result
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class AsyncRatingService:
+    """Async read paths for ratings, used by async views when ASYNC_READS_ENABLED is set."""
+    
+    @staticmethod
+    async def get_ratings(client, user_id, as_rater=False, page_size=None, cursor=None):
+        """
+        Get all ratings for a user.
+        With a page_size, one page ordered by (created_at, id), newest first, is returned along with a next_cursor.
+        """
+        try:
+            logger.info(f"Getting ratings (async) for user: {user_id}, as_rater: {as_rater}")
+            
+            query = select(client, Rating)
+            
+            if as_rater:
+                query = query.eq('rater_id', user_id)
+            else:
+                query = query.eq('rated_user_id', user_id)
+            
+            if page_size:
+                response = await keyset_query(query, 'created_at', page_size, cursor, desc=True).execute()
+                rows, next_cursor = keyset_result(response.data, 'created_at', page_size)
+            else:
+                rows, next_cursor = (await query.execute()).data, None
+            
+            ratings = [Rating.row_to_dict(rating) for rating in rows]
+            logger.info(f"Found {len(ratings)} ratings for user: {user_id}")
+            
+            await AsyncRatingService.enrich_ratings(client, ratings, with_trip=True, with_rated_user=True)
+            
+            result = {
+                'success': True,
+                'ratings': ratings
+            }
+            if page_size:
+                result['next_cursor'] = next_cursor
+            
+            return result
+            
+        except Exception as e:
+            logger.error(f"Error getting ratings (async): {str(e)}")
+            return {'success': False, 'message': str(e)}
+    
+    @staticmethod
+    async def get_user_ratings(client, user_id):
+        """Get all ratings for a specific user."""
+        try:
+            logger.info(f"Getting ratings (async) for user: {user_id}")
+            
+            response = await select(client, Rating).eq('rated_user_id', user_id).execute()
+            
+            ratings = [Rating.row_to_dict(rating) for rating in response.data]
+            logger.info(f"Found {len(ratings)} ratings for user: {user_id}")
+            
+            # Calculate average rating
+            if ratings:
+                average_rating = sum(rating['rating'] for rating in ratings) / len(ratings)
+            else:
+                average_rating = 0
+            
+            await AsyncRatingService.enrich_ratings(client, ratings, with_trip=True, with_rated_user=False)
+            
+            return {
+                'success': True,
+                'ratings': ratings,
+                'average_rating': round(average_rating, 1),
+                'total_ratings': len(ratings)
+            }
+            
+        except Exception as e:
+            logger.error(f"Error getting user ratings (async): {str(e)}")
+            return {'success': False, 'message': str(e)}
+    
+    @staticmethod
+    async def get_trip_ratings(client, trip_id, user_id=None):
+        """Get all ratings for a specific trip."""
+        try:
+            logger.info(f"Getting ratings (async) for trip: {trip_id}")
+            
+            trip_response = await AsyncTripService.get_trip_by_id(client, trip_id)
+            if not trip_response['success']:
+                logger.warning(f"Trip not found: {trip_id}")
+                return {'success': False, 'message': 'Trip not found'}
+            
+            trip = trip_response['trip']
+            
+            # Check if user is authorized to view ratings for this trip
+            if user_id and trip['driver_id'] != user_id:
+                ride_request_response = await select(client, RideRequest, 'id').eq('trip_id', trip_id).eq('passenger_id', user_id).execute()
+                
+                if not ride_request_response.data:
+                    logger.warning(f"User {user_id} is not authorized to view ratings for trip {trip_id}")
+                    return {'success': False, 'message': 'Not authorized to view ratings for this trip'}
+            
+            response = await select(client, Rating).eq('trip_id', trip_id).execute()
+            
+            ratings = [Rating.row_to_dict(rating) for rating in response.data]
+            logger.info(f"Found {len(ratings)} ratings for trip: {trip_id}")
+            
+            await AsyncRatingService.enrich_ratings(client, ratings, with_trip=False, with_rated_user=True)
+            
+            return {
+                'success': True,
+                'trip': trip,
+                'ratings': ratings
+            }
+            
+        except Exception as e:
+            logger.error(f"Error getting trip ratings (async): {str(e)}")
+            return {'success': False, 'message': str(e)}
+    
+    @staticmethod
+    async def enrich_ratings(client, ratings, with_trip, with_rated_user):
+        """Attach trip, rater and rated user information to ratings, fetching each distinct row once."""
+        trip_ids = list(dict.fromkeys(rating['trip_id'] for rating in ratings)) if with_trip else []
+        
+        user_ids = [rating['rater_id'] for rating in ratings]
+        if with_rated_user:
+            user_ids += [rating['rated_user_id'] for rating in ratings]
+        user_ids = list(dict.fromkeys(user_ids))
+        
+        async def fetch_users():
+            if not user_ids:
+                return {}
+            response = await select(client, User, 'summary').in_('id', user_ids).execute()
+            return {user['id']: user for user in response.data}
+        
+        users, *trip_responses = await gather_bounded(
+            fetch_users(),
+            *(AsyncTripService.get_trip_by_id(client, trip_id) for trip_id in trip_ids)
+        )
+        trips = {trip_id: trip_response['trip'] for trip_id, trip_response in zip(trip_ids, trip_responses) if trip_response['success']}
+        
+        for rating in ratings:
+            if rating['trip_id'] in trips:
+                rating['trip'] = trips[rating['trip_id']]
+            if rating['rater_id'] in users:
+                rating['rater'] = users[rating['rater_id']]
+            if with_rated_user and rating['rated_user_id'] in users:
+                rating['rated_user'] = users[rating['rated_user_id']]
@@ -0,0 +1,108 @@
+from app.models.ride_request import RideRequest
+from app.models.trip import Trip
+from app.services.async_trip_service import AsyncTripService
+from app.utils.concurrency import gather_bounded
+from app.utils.query import select
+from app.utils.pagination import keyset_query, keyset_result
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class AsyncRideRequestService:
+    """Async read paths for ride requests, used by async views when ASYNC_READS_ENABLED is set."""
+    
+    @staticmethod
+    async def get_ride_requests(client, user_id, is_driver=False, page_size=None, cursor=None):
+        """
+        Get all ride requests for a user.
+        With a page_size, one page ordered by (created_at, id), newest first, is returned along with a next_cursor.
+        """
+        try:
+            logger.info(f"Getting ride requests (async) for user: {user_id}, is_driver: {is_driver}")
+            
+            query = select(client, RideRequest)
+            
+            if is_driver:
+                # Get trips where user is the driver
+                trips_response = await select(client, Trip, 'id').eq('driver_id', user_id).execute()
+                
+                if not trips_response.data:
+                    logger.info(f"No trips found for driver: {user_id}")
+                    return {'success': True, 'ride_requests': []}
+                
+                trip_ids = [trip['id'] for trip in trips_response.data]
+                query = query.in_('trip_id', trip_ids)
+            else:
+                # Get ride requests where user is the passenger
+                query = query.eq('passenger_id', user_id)
+            
+            if page_size:
+                response = await keyset_query(query, 'created_at', page_size, cursor, desc=True).execute()
+                rows, next_cursor = keyset_result(response.data, 'created_at', page_size)
+            else:
+                rows, next_cursor = (await query.execute()).data, None
+            
+            ride_requests = [RideRequest.row_to_dict(request) for request in rows]
+            logger.info(f"Found {len(ride_requests)} ride requests for user: {user_id}")
+            
+            # Fetch each distinct trip once, concurrently
+            trip_ids = list(dict.fromkeys(request['trip_id'] for request in ride_requests))
+            trip_responses = await gather_bounded(*(AsyncTripService.get_trip_by_id(client, trip_id) for trip_id in trip_ids))
+            trips = {trip_id: trip_response['trip'] for trip_id, trip_response in zip(trip_ids, trip_responses) if trip_response['success']}
+            
+            for request in ride_requests:
+                if request['trip_id'] in trips:
+                    request['trip'] = trips[request['trip_id']]
+            
+            result = {
+                'success': True,
+                'ride_requests': ride_requests
+            }
+            if page_size:
+                result['next_cursor'] = next_cursor
+            
+            return result
+            
+        except Exception as e:
+            logger.error(f"Error getting ride requests (async): {str(e)}")
+            return {'success': False, 'message': str(e)}
+    
+    @staticmethod
+    async def get_ride_request_by_id(client, request_id, user_id=None):
+        """Get a ride request by ID."""
+        try:
+            logger.info(f"Getting ride request by ID (async): {request_id}, user_id: {user_id}")
+            
+            query = select(client, RideRequest).eq('id', request_id)
+            
+            if user_id:
+                query = query.eq('passenger_id', user_id)
+            
+            response = await query.execute()
+            
+            if not response.data:
+                logger.info(f"Ride request not found: {request_id}")
+                return {'success': False, 'message': 'Ride request not found'}
+            
+            ride_request = RideRequest.from_dict(response.data[0])
+            ride_request_data = ride_request.to_dict()
+            
+            trip_response = await AsyncTripService.get_trip_by_id(client, ride_request.trip_id)
+            if trip_response['success']:
+                ride_request_data['trip'] = trip_response['trip']
+                
+                # If user_id is provided but not the passenger, check if they're the driver
+                if user_id and ride_request.passenger_id != user_id:
+                    if trip_response['trip']['driver_id'] != user_id:
+                        logger.warning(f"User {user_id} is not authorized to view this ride request")
+                        return {'success': False, 'message': 'Not authorized to view this ride request'}
+            
+            return {
+                'success': True,
+                'ride_request': ride_request_data
+            }
+            
+        except Exception as e:
+            logger.error(f"Error getting ride request (async): {str(e)}")
+            return {'success': False, 'message': str(e)}
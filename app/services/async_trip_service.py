@@ -0,0 +1,110 @@
+from datetime import datetime
+from app.models.trip import Trip
+from app.models.vehicle import Vehicle
+from app.models.ride_request import RideRequest
+from app.models.user import User
+from app.services.trip_service import TripService
+from app.services.matching_service import MatchingService
+from app.utils.concurrency import gather_bounded
+from app.utils.query import select, embed
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class AsyncTripService:
+    """Async read paths for trips, used by async views when ASYNC_READS_ENABLED is set."""
+    
+    @staticmethod
+    async def get_trip_by_id(client, trip_id):
+        """Get a trip by ID."""
+        try:
+            logger.info(f"Getting trip by ID (async): {trip_id}")
+            
+            response = await select(client, Trip).eq('id', trip_id).execute()
+            
+            if not response.data:
+                logger.info(f"Trip not found: {trip_id}")
+                return {'success': False, 'message': 'Trip not found'}
+            
+            trip_data = Trip.row_to_dict(response.data[0])
+            
+            # Get vehicle information if vehicle_id exists
+            if trip_data['vehicle_id']:
+                vehicle_response = await select(client, Vehicle).eq('id', trip_data['vehicle_id']).execute()
+                if vehicle_response.data:
+                    trip_data['vehicle'] = Vehicle.row_to_dict(vehicle_response.data[0])
+            
+            return {
+                'success': True,
+                'trip': trip_data
+            }
+            
+        except Exception as e:
+            logger.error(f"Error getting trip (async): {str(e)}")
+            return {'success': False, 'message': str(e)}
+    
+    @staticmethod
+    async def get_upcoming_trips(client, user_id, role='both'):
+        """Get upcoming trips for a user with enriched data."""
+        try:
+            logger.info(f"Fetching upcoming trips (async) for user: {user_id}, role: {role}")
+            now = datetime.now().isoformat()
+            
+            async def fetch_driver_trips():
+                # While the change feed keeps the upcoming trip index current, the driver's trips come from it
+                index = MatchingService.get_live_index()
+                if index is not None:
+                    return [(Trip.from_dict(trip_data), True) for trip_data in index.driver_trips(user_id)]
+                response = await select(client, Trip, 'card')\
+                    .eq('driver_id', user_id)\
+                    .eq('status', 'scheduled')\
+                    .gt('start_time', now)\
+                    .execute()
+                return [(Trip.from_dict(trip_data), True) for trip_data in response.data]
+            
+            async def fetch_passenger_trips():
+                response = await select(client, RideRequest, 'id', embed(Trip, 'card'))\
+                    .eq('passenger_id', user_id)\
+                    .in_('status', ['accepted', 'pending'])\
+                    .execute()
+                return [(Trip.from_dict(req_data['trips']), False) for req_data in response.data
+                        if req_data['trips'] and req_data['trips']['status'] == 'scheduled' and req_data['trips']['start_time'] > now]
+            
+            fetchers = []
+            if role in ['driver', 'both']:
+                fetchers.append(fetch_driver_trips())
+            if role in ['passenger', 'both']:
+                fetchers.append(fetch_passenger_trips())
+            
+            trips = [item for items in await gather_bounded(*fetchers) for item in items]
+            
+            # Enrich all trips concurrently
+            upcoming_trips = await gather_bounded(*(
+                AsyncTripService.enrich_trip_data(client, trip, user_id, is_driver)
+                for trip, is_driver in trips
+            ))
+            
+            upcoming_trips.sort(key=lambda x: x['start_time'])
+            
+            logger.info(f"Found {len(upcoming_trips)} upcoming trips for user: {user_id}")
+            return {
+                'success': True,
+                'trips': upcoming_trips
+            }
+            
+        except Exception as e:
+            logger.error(f"Error fetching upcoming trips (async): {str(e)}")
+            return {'success': False, 'message': str(e)}
+    
+    @staticmethod
+    async def enrich_trip_data(client, trip, user_id, is_driver):
+        """Enrich trip data with participants and metrics."""
+        driver_response, passengers_response = await gather_bounded(
+            select(client, User, 'summary').eq('id', trip.driver_id).execute(),
+            select(client, RideRequest, 'seats').eq('trip_id', trip.id).in_('status', RideRequest.SEAT_HOLDING_STATUSES).execute()
+        )
+        driver = driver_response.data[0] if driver_response.data else {'id': trip.driver_id, 'name': 'Unknown', 'profile_image_url': None}
+        passengers_count = sum(int(req['seats_requested']) for req in passengers_response.data)
+        
+        return TripService.build_enriched_trip(trip, driver, passengers_count, is_driver)
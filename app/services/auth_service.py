@@ -1,7 +1,9 @@
 from datetime import datetime, timedelta
 from app.utils.supabase_client import supabase, supabase_admin
 from app.models.user import User
+from app.models.refresh_token import RefreshToken
 from app.utils.auth import generate_access_token, generate_refresh_token
+from app.utils.query import select
 import logging
 
 # Set up logging
@@ -20,7 +22,7 @@ class AuthService:
             email = email.lower().strip()
             
             # Check if user already exists
-            response = supabase.table('users').select('*').eq('email', email).execute()
+            response = select(supabase, User, 'id').eq('email', email).execute()
             if response.data:
                 return {'success': False, 'message': 'User with this email already exists'}
             
@@ -86,7 +88,7 @@ class AuthService:
             logger.info(f"Login attempt for email: {email}")
             
             # Get user by email - use admin client to bypass RLS
-            response = supabase_admin.table('users').select('*').eq('email', email).execute()
+            response = select(supabase_admin, User, 'auth').eq('email', email).execute()
             
             if not response.data:
                 logger.info(f"No user found with email: {email}")
@@ -146,7 +148,7 @@ class AuthService:
             logger.info(f"Attempting to refresh token: {refresh_token[:10]}...")
             
             # Check if refresh token exists and is valid - use admin client to bypass RLS
-            response = supabase_admin.table('refresh_tokens').select('*').eq('token', refresh_token).eq('is_revoked', False).execute()
+            response = select(supabase_admin, RefreshToken, 'validity').eq('token', refresh_token).eq('is_revoked', False).execute()
             
             if not response.data:
                 logger.info("Refresh token not found or revoked")
@@ -194,7 +196,7 @@ class AuthService:
             logger.info(f"Attempting to logout with token: {refresh_token[:10]}...")
             
             # Check if token exists before revoking
-            response = supabase_admin.table('refresh_tokens').select('*').eq('token', refresh_token).execute()
+            response = select(supabase_admin, RefreshToken, 'owner').eq('token', refresh_token).execute()
             
             if not response.data:
                 logger.info("Refresh token not found")
@@ -0,0 +1,52 @@
+from app.services.matching_service import MatchingService
+from app.services.trip_service import TripService
+from app.services.ride_request_service import RideRequestService
+from app.services.rating_service import RatingService
+from app.services.user_service import UserService
+from app.utils.change_feed import ChangeFeedConsumer, RealtimeFeed, TableHandler, realtime_url
+from app.config import get_config
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+config = get_config()
+
+class ChangeFeedService:
+    """Service wiring database changes to the per-worker indexes, caches and event streams that depend on them."""
+    
+    @staticmethod
+    def build_handlers():
+        """Return the TableHandler of every table the feed follows."""
+        return {
+            'trips': TableHandler(
+                TripService.apply_trip_changes,
+                resync=MatchingService.resync_index,
+                suspend=MatchingService.suspend_index
+            ),
+            'ride_requests': TableHandler(RideRequestService.apply_ride_request_changes),
+            'ratings': TableHandler(
+                RatingService.apply_rating_changes,
+                resync=lambda: RatingService.reset_received_cache(True),
+                suspend=lambda: RatingService.reset_received_cache(False)
+            ),
+            'users': TableHandler(
+                UserService.apply_user_changes,
+                resync=lambda: UserService.reset_summary_cache(True),
+                suspend=lambda: UserService.reset_summary_cache(False)
+            )
+        }
+    
+    @staticmethod
+    def create_consumer(feed=None):
+        """Build a consumer of feed, by default the project's realtime server, as configured by the CHANGE_FEED_* settings."""
+        if feed is None:
+            feed = RealtimeFeed(realtime_url(config.SUPABASE_URL, config.SUPABASE_SERVICE_KEY))
+        return ChangeFeedConsumer(
+            feed,
+            ChangeFeedService.build_handlers(),
+            queue_size=config.CHANGE_FEED_QUEUE_SIZE,
+            batch_size=config.CHANGE_FEED_BATCH_SIZE,
+            put_timeout=config.CHANGE_FEED_PUT_TIMEOUT,
+            max_backoff=config.CHANGE_FEED_MAX_BACKOFF
+        )
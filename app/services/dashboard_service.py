@@ -0,0 +1,93 @@
+from datetime import datetime
+import time
+from app.utils.supabase_client import supabase_admin
+from app.models.trip import Trip
+from app.models.ride_request import RideRequest
+from app.models.vehicle import Vehicle
+from app.services.trip_service import TripService, ID_CHUNK_SIZE
+from app.services.user_service import UserService
+from app.services.vehicle_service import VehicleService
+from app.utils.concurrency import run_concurrently
+from app.utils.query import select, embed
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class DashboardService:
+    """Service for composite screens that would otherwise need several API calls."""
+    
+    @staticmethod
+    def get_driver_dashboard(driver_id):
+        """
+        Get everything the driver home screen shows in one payload: upcoming trips, trip statistics,
+        ride requests on the driver's trips and the driver's vehicles.
+        The payloads match /api/trips/upcoming?role=driver, /api/trips/stats, /api/ride-requests?is_driver=true
+        and /api/vehicles. The driver's trips are fetched once and shared by all of them.
+        """
+        try:
+            started = time.perf_counter()
+            logger.info(f"Building driver dashboard for: {driver_id}")
+            
+            # Everything keyed only by the driver, concurrently
+            trips_response, vehicles_result, driver, passenger_requests_response = run_concurrently(
+                lambda: select(supabase_admin, Trip, 'full', embed(Vehicle)).eq('driver_id', driver_id).execute(),
+                lambda: VehicleService.get_user_vehicles(driver_id),
+                lambda: UserService.get_user_summary(driver_id),
+                lambda: select(supabase_admin, RideRequest, 'status').eq('passenger_id', driver_id).execute()
+            )
+            fetched_ms = (time.perf_counter() - started) * 1000
+            
+            if not vehicles_result['success']:
+                raise Exception(vehicles_result['message'])
+            
+            trips_by_id = {}
+            for row in trips_response.data:
+                vehicle = row.pop('vehicles', None)
+                trip_data = Trip.row_to_dict(row)
+                if vehicle:
+                    trip_data['vehicle'] = Vehicle.row_to_dict(vehicle)
+                trips_by_id[trip_data['id']] = trip_data
+            
+            # Ride requests on those trips, a chunk of trip ids per query
+            trip_ids = list(trips_by_id)
+            chunks = [trip_ids[i:i + ID_CHUNK_SIZE] for i in range(0, len(trip_ids), ID_CHUNK_SIZE)]
+            ride_requests = []
+            for rows in run_concurrently(*(
+                (lambda chunk=chunk: select(supabase_admin, RideRequest).in_('trip_id', chunk).execute().data)
+                for chunk in chunks
+            )):
+                ride_requests.extend(RideRequest.row_to_dict(req) for req in rows)
+            ride_requests.sort(key=lambda req: req['created_at'] or '', reverse=True)
+            
+            seats_by_trip = {}
+            for req in ride_requests:
+                if req['status'] in RideRequest.SEAT_HOLDING_STATUSES:
+                    seats_by_trip[req['trip_id']] = seats_by_trip.get(req['trip_id'], 0) + int(req['seats_requested'])
+                req['trip'] = trips_by_id[req['trip_id']]
+            
+            # Upcoming trips, as /api/trips/upcoming?role=driver
+            now = datetime.now().isoformat()
+            upcoming_trips = [
+                TripService.build_enriched_trip(Trip.from_dict(trip_data), driver, seats_by_trip.get(trip_id, 0), True)
+                for trip_id, trip_data in trips_by_id.items()
+                if trip_data['status'] == 'scheduled' and trip_data['start_time'] > now
+            ]
+            upcoming_trips.sort(key=lambda x: x['start_time'])
+            
+            stats = TripService.build_trip_stats(list(trips_by_id.values()), passenger_requests_response.data, seats_by_trip)
+            
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            logger.info(f"Built driver dashboard for {driver_id} in {elapsed_ms:.1f} ms "
+                        f"({fetched_ms:.1f} ms first fetch, {len(trips_by_id)} trips, {len(ride_requests)} ride requests)")
+            return {
+                'success': True,
+                'upcoming_trips': upcoming_trips,
+                'stats': stats,
+                'ride_requests': ride_requests,
+                'vehicles': vehicles_result['vehicles']
+            }
+            
+        except Exception as e:
+            logger.error(f"Error building driver dashboard: {str(e)}")
+            return {'success': False, 'message': str(e)}
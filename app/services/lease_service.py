@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+import os
+import socket
+import uuid
+from app.utils.supabase_client import supabase_admin
+from postgrest.types import ReturnMethod
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class LeaseService:
+    """
+    Service for named leases in the job_leases table, so a background job runs on one worker at a time.
+    
+    A lease is held until its expires_at; holders renew it while they work and release it when done,
+    or hold it until the job is next due so other workers do not run it again in between.
+    A worker that dies holding a lease only blocks the job until the lease expires. Leases are claimed
+    with conditional updates, so two workers can never both see their claim succeed.
+    """
+    
+    # Identifies this process as a lease holder
+    HOLDER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    
+    @staticmethod
+    def acquire(name, ttl):
+        """Take or renew the named lease for ttl seconds. Returns True if this process now holds it."""
+        now = datetime.utcnow()
+        claim = {'holder': LeaseService.HOLDER, 'expires_at': (now + timedelta(seconds=ttl)).isoformat()}
+        
+        # Renew our own lease, or take over one whose holder let it expire
+        response = supabase_admin.table('job_leases').update(claim)\
+            .eq('name', name)\
+            .eq('holder', LeaseService.HOLDER)\
+            .execute()
+        if response.data:
+            return True
+        response = supabase_admin.table('job_leases').update(claim)\
+            .eq('name', name)\
+            .lt('expires_at', now.isoformat())\
+            .execute()
+        if response.data:
+            return True
+        
+        # The lease row may not exist yet; of concurrent inserts only the first is kept
+        response = supabase_admin.table('job_leases')\
+            .upsert({'name': name, **claim}, on_conflict='name', ignore_duplicates=True)\
+            .execute()
+        return bool(response.data)
+    
+    @staticmethod
+    def release(name, until=None):
+        """
+        Give up the named lease if this process holds it, so the next run anywhere can start right away.
+        With until (a UTC datetime), keep it until then instead; this process can still renew it earlier.
+        """
+        try:
+            supabase_admin.table('job_leases')\
+                .update({'expires_at': (until or datetime.utcnow()).isoformat()}, returning=ReturnMethod.minimal)\
+                .eq('name', name)\
+                .eq('holder', LeaseService.HOLDER)\
+                .execute()
+        except Exception as e:
+            # The lease still expires on its own
+            logger.error(f"Error releasing lease {name}: {str(e)}")
@@ -0,0 +1,217 @@
+from datetime import datetime, timezone
+import threading
+import time
+from app.utils.supabase_client import supabase_admin
+from app.models.trip import Trip
+from app.models.ride_request import RideRequest
+from app.models.trip_location import TripLocation
+from app.utils.live_location import LiveLocationStore
+from app.utils.background import PeriodicTask
+from app.utils.change_feed import feed_connected
+from app.utils.query import select
+from app.utils.timestamps import to_epoch
+from app.config import get_config
+from postgrest.types import ReturnMethod
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+config = get_config()
+
+# Sampled positions per batched insert
+INSERT_CHUNK_SIZE = 500
+
+class LiveLocationService:
+    """
+    Service for the driver's live position during in-progress trips.
+    
+    Pings are kept per worker in a fixed-size ring per trip (LIVE_LOCATION_BUFFER_SIZE positions), so
+    ingesting one costs no database write and the latest position is read in O(1). With
+    LIVE_LOCATION_PERSIST_ENABLED, pings are downsampled and the samples written to trip_locations in
+    batches; workers that never received a trip's pings then serve its latest sample instead.
+    The upkeep task starts with the first tracked trip, so CLI commands and processes that never
+    see a trip in progress run no extra thread.
+    """
+    
+    _store = LiveLocationStore(
+        config.LIVE_LOCATION_BUFFER_SIZE,
+        sample=config.LIVE_LOCATION_PERSIST_ENABLED,
+        sample_interval=config.LIVE_LOCATION_SAMPLE_INTERVAL,
+        sample_distance_m=config.LIVE_LOCATION_SAMPLE_DISTANCE_M
+    )
+    _maintainer = PeriodicTask('live-locations', config.LIVE_LOCATION_FLUSH_INTERVAL, lambda: LiveLocationService.maintain())
+    _maintainer_lock = threading.Lock()
+    
+    @staticmethod
+    def start_tracking(trip_id, driver_id):
+        """Start tracking a trip that went in progress; its driver and accepted passengers may follow it."""
+        response = select(supabase_admin, RideRequest, 'transition')\
+            .eq('trip_id', trip_id)\
+            .in_('status', RideRequest.SEAT_HOLDING_STATUSES)\
+            .execute()
+        with LiveLocationService._maintainer_lock:
+            LiveLocationService._maintainer.start()
+        return LiveLocationService._store.start(trip_id, driver_id, [req['passenger_id'] for req in response.data])
+    
+    @staticmethod
+    def end_tracking(trip_id):
+        """Stop tracking a trip that is no longer in progress."""
+        LiveLocationService._store.end(trip_id)
+    
+    @staticmethod
+    def get_track(trip_id):
+        """
+        Return this worker's track of a trip. A trip started through another worker is loaded on first use.
+        Returns None if the trip is not in progress.
+        
+        Unless the change feed is connected to end tracks as trips change, a track's trip status is read
+        again once LIVE_LOCATION_STATUS_TTL seconds have passed, since another worker may have ended the trip.
+        """
+        track = LiveLocationService._store.get(trip_id)
+        if track is not None and time.monotonic() - track.checked_at > config.LIVE_LOCATION_STATUS_TTL and not feed_connected('trips'):
+            response = select(supabase_admin, Trip, 'capacity').eq('id', trip_id).execute()
+            if not response.data or response.data[0]['status'] != 'in_progress':
+                LiveLocationService.end_tracking(trip_id)
+                return None
+            track.checked_at = time.monotonic()
+        if track is None:
+            response = select(supabase_admin, Trip, 'capacity').eq('id', trip_id).execute()
+            if response.data and response.data[0]['status'] == 'in_progress':
+                track = LiveLocationService.start_tracking(trip_id, response.data[0]['driver_id'])
+        return track
+    
+    @staticmethod
+    def parse_pings(data):
+        """
+        Read pings from a request body: one {latitude, longitude, timestamp} object or {'pings': [...]}.
+        timestamp is in epoch seconds and defaults to now. Returns (timestamp, latitude, longitude) tuples,
+        raises ValueError if any ping is invalid.
+        """
+        pings = data.get('pings') if isinstance(data, dict) and 'pings' in data else [data]
+        if not isinstance(pings, list) or not pings:
+            raise ValueError('Expected a ping or a non-empty pings list')
+        if len(pings) > config.LIVE_LOCATION_MAX_PINGS:
+            raise ValueError(f"At most {config.LIVE_LOCATION_MAX_PINGS} pings per request")
+        
+        now = time.time()
+        parsed = []
+        for ping in pings:
+            try:
+                latitude, longitude = float(ping['latitude']), float(ping['longitude'])
+                timestamp = float(ping.get('timestamp') or now)
+            except (KeyError, TypeError, ValueError):
+                raise ValueError('Each ping needs numeric latitude and longitude, and an optional epoch timestamp')
+            if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                raise ValueError('Ping coordinates out of range')
+            if timestamp > now + config.LIVE_LOCATION_MAX_CLOCK_SKEW:
+                raise ValueError('Ping timestamp is in the future')
+            parsed.append((timestamp, latitude, longitude))
+        return parsed
+    
+    @staticmethod
+    def record_pings(trip_id, driver_id, pings):
+        """Store a batch of parsed pings from the trip's driver."""
+        try:
+            track = LiveLocationService.get_track(trip_id)
+            if track is None:
+                return {'success': False, 'message': 'Trip is not in progress'}
+            if track.driver_id != driver_id:
+                return {'success': False, 'message': 'Only the trip driver can report its location'}
+            
+            accepted = LiveLocationService._store.record(track, pings)
+            return {'success': True, 'accepted': accepted, 'skipped': len(pings) - accepted}
+            
+        except Exception as e:
+            logger.error(f"Error recording location pings: {str(e)}")
+            return {'success': False, 'message': str(e)}
+    
+    @staticmethod
+    def get_location(trip_id, user_id, since=None):
+        """
+        Get the driver's latest position on an in-progress trip, for its driver and accepted passengers.
+        With since (epoch seconds), also return the buffered positions after it, oldest first.
+        location_status says where the position came from: 'live' (this worker's buffer), 'persisted'
+        (trip_locations), 'no_position' (the driver has not reported one) or 'not_on_this_worker'
+        (persistence is off and no ping reached this worker; another one may have received them).
+        """
+        try:
+            track = LiveLocationService.get_track(trip_id)
+            if track is None:
+                return {'success': False, 'message': 'Trip is not in progress'}
+            if user_id not in track.participant_ids:
+                return {'success': False, 'message': 'Not authorized to follow this trip'}
+            
+            latest = track.ring.latest()
+            if latest is not None:
+                location, location_status = LiveLocationService.position_dict(latest), 'live'
+            elif config.LIVE_LOCATION_PERSIST_ENABLED:
+                location = LiveLocationService.get_persisted_location(trip_id)
+                location_status = 'persisted' if location else 'no_position'
+            else:
+                location, location_status = None, 'not_on_this_worker'
+            
+            result = {'success': True, 'trip_id': trip_id, 'location': location, 'location_status': location_status}
+            if since is not None:
+                with track.lock:
+                    positions = track.ring.since(since)
+                result['track'] = [LiveLocationService.position_dict(position) for position in positions]
+            return result
+            
+        except Exception as e:
+            logger.error(f"Error getting live location: {str(e)}")
+            return {'success': False, 'message': str(e)}
+    
+    @staticmethod
+    def position_dict(position):
+        """Convert a (timestamp, latitude, longitude) position to its response dictionary."""
+        timestamp, latitude, longitude = position
+        return {'latitude': latitude, 'longitude': longitude, 'timestamp': timestamp}
+    
+    @staticmethod
+    def get_persisted_location(trip_id):
+        """Get the newest sampled position of a trip from the database, or None."""
+        response = select(supabase_admin, TripLocation, 'position')\
+            .eq('trip_id', trip_id)\
+            .order('recorded_at', desc=True)\
+            .limit(1)\
+            .execute()
+        if not response.data:
+            return None
+        row = response.data[0]
+        return {'latitude': float(row['latitude']), 'longitude': float(row['longitude']), 'timestamp': to_epoch(row['recorded_at'])}
+    
+    @staticmethod
+    def flush_samples():
+        """Write the downsampled positions queued since the last flush, in batched inserts. Returns how many were written."""
+        samples = LiveLocationService._store.take_samples()
+        rows = [{
+            'trip_id': trip_id,
+            'driver_id': driver_id,
+            'latitude': latitude,
+            'longitude': longitude,
+            'recorded_at': datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None).isoformat()
+        } for trip_id, driver_id, timestamp, latitude, longitude in samples]
+        
+        written = 0
+        for i in range(0, len(rows), INSERT_CHUNK_SIZE):
+            try:
+                supabase_admin.table('trip_locations').insert(rows[i:i + INSERT_CHUNK_SIZE], returning=ReturnMethod.minimal).execute()
+                written += len(rows[i:i + INSERT_CHUNK_SIZE])
+            except Exception as e:
+                # Samples are a convenience; losing one batch only coarsens the stored track
+                logger.error(f"Failed to write {len(rows[i:i + INSERT_CHUNK_SIZE])} location samples: {str(e)}")
+        return written
+    
+    @staticmethod
+    def maintain():
+        """Periodic upkeep: persist queued samples, and stop tracking trips whose driver went quiet."""
+        written = LiveLocationService.flush_samples() if config.LIVE_LOCATION_PERSIST_ENABLED else 0
+        idle = LiveLocationService._store.sweep(time.time() - config.LIVE_LOCATION_IDLE_TIMEOUT)
+        if written or idle:
+            logger.info(f"Live locations: wrote {written} samples, stopped tracking {idle} idle trips")
+    
+    @staticmethod
+    def stats():
+        """Return this worker's live location counters."""
+        return LiveLocationService._store.stats()
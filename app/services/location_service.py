@@ -1,6 +1,8 @@
 from datetime import datetime
 from app.utils.supabase_client import supabase, supabase_admin
 from app.models.location import Location
+from app.utils.query import select
+from app.utils.sync import get_changes, sync_cursor
 import logging
 
 # Set up logging
@@ -10,20 +12,37 @@ class LocationService:
     """Service for handling location operations."""
     
     @staticmethod
-    def get_user_locations(user_id):
-        """Get all locations for a user."""
+    def get_user_locations(user_id, since=None):
+        """
+        Get all locations for a user.
+        With a since cursor, only locations changed after it are returned, plus the ids of deleted ones.
+        """
         try:
+            if since:
+                logger.info(f"Getting locations changes for user: {user_id} since: {since}")
+                
+                locations, deleted, cursor = get_changes(supabase_admin, Location, user_id, since)
+                logger.info(f"Found {len(locations)} changed and {len(deleted)} deleted locations for user: {user_id}")
+                
+                return {
+                    'success': True,
+                    'locations': locations,
+                    'deleted': deleted,
+                    'cursor': cursor
+                }
+            
             logger.info(f"Getting locations for user: {user_id}")
             
             # Use supabase_admin to bypass RLS policies
-            response = supabase_admin.table('locations').select('*').eq('user_id', user_id).execute()
+            response = select(supabase_admin, Location).eq('user_id', user_id).is_('deleted_at', 'null').execute()
             
-            locations = [Location.from_dict(location).to_dict() for location in response.data]
+            locations = [Location.row_to_dict(location) for location in response.data]
             logger.info(f"Found {len(locations)} locations for user: {user_id}")
             
             return {
                 'success': True,
-                'locations': locations
+                'locations': locations,
+                'cursor': sync_cursor(locations)
             }
             
         except Exception as e:
@@ -37,7 +56,7 @@ class LocationService:
             logger.info(f"Getting location by ID: {location_id}, user_id: {user_id}")
             
             # Use supabase_admin to bypass RLS policies
-            query = supabase_admin.table('locations').select('*').eq('id', location_id)
+            query = select(supabase_admin, Location).eq('id', location_id).is_('deleted_at', 'null')
             
             if user_id:
                 query = query.eq('user_id', user_id)
@@ -104,7 +123,7 @@ class LocationService:
             logger.info(f"Updating location: {location_id} for user: {user_id}")
             
             # Check if location exists and belongs to user
-            response = supabase_admin.table('locations').select('*').eq('id', location_id).eq('user_id', user_id).execute()
+            response = select(supabase_admin, Location, 'id').eq('id', location_id).eq('user_id', user_id).is_('deleted_at', 'null').execute()
             
             if not response.data:
                 logger.info(f"Location not found or does not belong to user: {location_id}")
@@ -144,15 +163,21 @@ class LocationService:
             logger.info(f"Deleting location: {location_id} for user: {user_id}")
             
             # Check if location exists and belongs to user
-            response = supabase_admin.table('locations').select('*').eq('id', location_id).eq('user_id', user_id).execute()
+            response = select(supabase_admin, Location, 'id').eq('id', location_id).eq('user_id', user_id).is_('deleted_at', 'null').execute()
             
             if not response.data:
                 logger.info(f"Location not found or does not belong to user: {location_id}")
                 return {'success': False, 'message': 'Location not found or does not belong to user'}
             
-            # Delete location
+            # Soft-delete location so delta syncs can report it
+            now = datetime.utcnow().isoformat()
+            delete_data = {
+                'deleted_at': now,
+                'updated_at': now
+            }
+            
             # Use supabase_admin to bypass RLS policies
-            response = supabase_admin.table('locations').delete().eq('id', location_id).eq('user_id', user_id).execute()
+            response = supabase_admin.table('locations').update(delete_data).eq('id', location_id).eq('user_id', user_id).execute()
             
             if not response.data:
                 logger.error("Failed to delete location")
@@ -172,7 +197,7 @@ class LocationService:
             logger.info(f"Toggling favorite status for location: {location_id}, user: {user_id}")
             
             # Check if location exists and belongs to user
-            response = supabase_admin.table('locations').select('*').eq('id', location_id).eq('user_id', user_id).execute()
+            response = select(supabase_admin, Location, 'favorite').eq('id', location_id).eq('user_id', user_id).is_('deleted_at', 'null').execute()
             
             if not response.data:
                 logger.info(f"Location not found or does not belong to user: {location_id}")
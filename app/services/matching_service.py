@@ -0,0 +1,193 @@
+from datetime import datetime
+import heapq
+import threading
+import time
+from app.utils.supabase_client import supabase_admin
+from app.models.trip import Trip
+from app.models.ride_request import RideRequest
+from app.utils.query import select, iter_pages
+from app.utils.spatial import score_corridor_match
+from app.utils.departures import UpcomingTripIndex, now_epoch
+from app.utils.timestamps import to_epoch
+from app.config import get_config
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+config = get_config()
+
+class MatchingService:
+    """
+    Service for matching a passenger's pickup and dropoff to scheduled trips along the same corridor.
+    
+    Trips are scored by how far the pickup and dropoff lie from the trip's start->end segment and by
+    the detour the driver would make to serve them. Candidates come from a per-worker UpcomingTripIndex
+    of upcoming scheduled trips, rebuilt every MATCH_INDEX_TTL seconds, or kept current by the change
+    feed while it is connected. Trips leave the index as they depart.
+    """
+    
+    _index = None
+    _index_built_at = 0.0
+    _index_lock = threading.Lock()
+    _index_live = False
+    
+    @staticmethod
+    def get_index():
+        """
+        Return the upcoming trip index, building it on first use, without the trips that have departed.
+        Unless the change feed keeps it current, once stale one request rebuilds it while concurrent
+        requests keep using the previous index.
+        """
+        if MatchingService._index is None:
+            with MatchingService._index_lock:
+                if MatchingService._index is None:
+                    MatchingService.refresh_index()
+        elif not MatchingService._index_live and time.monotonic() - MatchingService._index_built_at > config.MATCH_INDEX_TTL:
+            if MatchingService._index_lock.acquire(blocking=False):
+                try:
+                    MatchingService.refresh_index()
+                finally:
+                    MatchingService._index_lock.release()
+        
+        index = MatchingService._index
+        index.expire(now_epoch())
+        return index
+    
+    @staticmethod
+    def get_live_index():
+        """
+        Return the upcoming trip index while the change feed keeps it current, so it can answer queries
+        in place of the database; None otherwise.
+        """
+        if not MatchingService._index_live or MatchingService._index is None:
+            return None
+        return MatchingService.get_index()
+    
+    @staticmethod
+    def refresh_index():
+        """Rebuild the corridor index and swap it in."""
+        MatchingService._index = MatchingService.build_index()
+        MatchingService._index_built_at = time.monotonic()
+    
+    @staticmethod
+    def discard_trip(trip_id):
+        """Drop a trip that is no longer matchable from the current index, if one is built."""
+        index = MatchingService._index
+        if index is not None:
+            index.remove(trip_id)
+    
+    @staticmethod
+    def apply_trip_changes(changes):
+        """
+        Apply trip changes from the change feed to the current index, if one is built:
+        upcoming scheduled trips are (re)indexed, anything else is dropped.
+        """
+        index = MatchingService._index
+        if index is None:
+            return
+        now = now_epoch()
+        for change in changes:
+            trip = change.record
+            if change.type != 'DELETE' and trip.get('status') == 'scheduled' and trip.get('start_time') and to_epoch(trip['start_time']) > now:
+                index.add({field: trip.get(field) for field in Trip.PROJECTIONS['card']})
+            else:
+                index.remove(trip.get('id') or change.old_record.get('id'))
+    
+    @staticmethod
+    def resync_index():
+        """Rebuild the index when the change feed (re)connects; from then on the feed keeps it current."""
+        with MatchingService._index_lock:
+            MatchingService.refresh_index()
+            MatchingService._index_live = True
+    
+    @staticmethod
+    def suspend_index():
+        """Stop relying on the index while the change feed is down; it falls back to periodic rebuilds."""
+        MatchingService._index_live = False
+
+    @staticmethod
+    def build_index():
+        """Build an index of all upcoming scheduled trips."""
+        started = time.perf_counter()
+        now = datetime.now().isoformat()
+        index = UpcomingTripIndex(config.MATCH_CORRIDOR_KM, config.MATCH_DEPARTURE_BUCKET_SECONDS)
+        
+        def fetch_page(start, end):
+            return select(supabase_admin, Trip, 'card')\
+                .eq('status', 'scheduled')\
+                .gt('start_time', now)\
+                .order('id')\
+                .range(start, end)\
+                .execute().data
+        
+        for page in iter_pages(fetch_page, config.EXPORT_CHUNK_SIZE):
+            for trip in page:
+                index.add(trip)
+        
+        logger.info(f"Built upcoming trip index of {len(index)} trips in {(time.perf_counter() - started) * 1000:.1f} ms")
+        return index
+    
+    @staticmethod
+    def match_trips(pickup, dropoff, seats=1, limit=None, exclude_driver_id=None, departs_after=None, departs_before=None):
+        """
+        Find the scheduled trips that best serve a ride from pickup to dropoff, each a (lat, lng) pair,
+        optionally departing within [departs_after, departs_before] (ISO 8601 timestamps).
+        Returns up to limit trips with their match scores, lowest score_km first.
+        """
+        try:
+            started = time.perf_counter()
+            logger.info(f"Matching trips for pickup: {pickup}, dropoff: {dropoff}, seats: {seats}")
+            
+            start = to_epoch(departs_after) if departs_after else None
+            end = to_epoch(departs_before) if departs_before else None
+            candidates = MatchingService.get_index().candidates(pickup[0], pickup[1], dropoff[0], dropoff[1], start, end)
+            
+            def scored():
+                for trip in candidates:
+                    if int(trip['available_seats']) < seats:
+                        continue
+                    if exclude_driver_id and trip['driver_id'] == exclude_driver_id:
+                        continue
+                    match = score_corridor_match(trip, pickup, dropoff, config.MATCH_CORRIDOR_KM, config.MATCH_MAX_DETOUR_KM)
+                    if match:
+                        yield match['score_km'], trip['id'], dict(trip, match=match)
+            
+            best = heapq.nsmallest(limit or config.PAGE_SIZE_DEFAULT, scored(), key=lambda entry: (entry[0], entry[1]))
+            matches = [entry[2] for entry in best]
+            
+            logger.info(f"Matched {len(matches)} of {len(candidates)} candidate trips in {(time.perf_counter() - started) * 1000:.1f} ms")
+            return {
+                'success': True,
+                'trips': matches
+            }
+            
+        except Exception as e:
+            logger.error(f"Error matching trips: {str(e)}")
+            return {'success': False, 'message': str(e)}
+    
+    @staticmethod
+    def match_ride_request(request_id, user_id, limit=None):
+        """Find the trips that best serve an existing ride request's pickup and dropoff."""
+        try:
+            logger.info(f"Matching trips for ride request: {request_id}, user: {user_id}")
+            
+            response = select(supabase_admin, RideRequest).eq('id', request_id).eq('passenger_id', user_id).execute()
+            
+            if not response.data:
+                logger.info(f"Ride request not found or does not belong to user: {request_id}")
+                return {'success': False, 'message': 'Ride request not found'}
+            
+            ride_request = RideRequest.from_dict(response.data[0])
+            
+        except Exception as e:
+            logger.error(f"Error getting ride request for matching: {str(e)}")
+            return {'success': False, 'message': str(e)}
+        
+        return MatchingService.match_trips(
+            (float(ride_request.pickup_latitude), float(ride_request.pickup_longitude)),
+            (float(ride_request.dropoff_latitude), float(ride_request.dropoff_longitude)),
+            seats=int(ride_request.seats_requested or 1),
+            limit=limit,
+            exclude_driver_id=user_id
+        )
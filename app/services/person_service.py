@@ -1,6 +1,8 @@
 from datetime import datetime
 from app.utils.supabase_client import supabase, supabase_admin
 from app.models.person import Person
+from app.utils.query import select
+from app.utils.sync import get_changes, sync_cursor
 import logging
 
 # Set up logging
@@ -10,20 +12,37 @@ class PersonService:
     """Service for handling person operations."""
     
     @staticmethod
-    def get_user_people(user_id):
-        """Get all people for a user."""
+    def get_user_people(user_id, since=None):
+        """
+        Get all people for a user.
+        With a since cursor, only people changed after it are returned, plus the ids of deleted ones.
+        """
         try:
+            if since:
+                logger.info(f"Getting people changes for user: {user_id} since: {since}")
+                
+                people, deleted, cursor = get_changes(supabase_admin, Person, user_id, since)
+                logger.info(f"Found {len(people)} changed and {len(deleted)} deleted people for user: {user_id}")
+                
+                return {
+                    'success': True,
+                    'people': people,
+                    'deleted': deleted,
+                    'cursor': cursor
+                }
+            
             logger.info(f"Getting people for user: {user_id}")
             
             # Use supabase_admin to bypass RLS policies
-            response = supabase_admin.table('people').select('*').eq('user_id', user_id).execute()
+            response = select(supabase_admin, Person).eq('user_id', user_id).is_('deleted_at', 'null').execute()
             
-            people = [Person.from_dict(person).to_dict() for person in response.data]
+            people = [Person.row_to_dict(person) for person in response.data]
             logger.info(f"Found {len(people)} people for user: {user_id}")
             
             return {
                 'success': True,
-                'people': people
+                'people': people,
+                'cursor': sync_cursor(people)
             }
             
         except Exception as e:
@@ -37,7 +56,7 @@ class PersonService:
             logger.info(f"Getting person by ID: {person_id}, user_id: {user_id}")
             
             # Use supabase_admin to bypass RLS policies
-            query = supabase_admin.table('people').select('*').eq('id', person_id)
+            query = select(supabase_admin, Person).eq('id', person_id).is_('deleted_at', 'null')
             
             if user_id:
                 query = query.eq('user_id', user_id)
@@ -104,7 +123,7 @@ class PersonService:
             logger.info(f"Updating person: {person_id} for user: {user_id}")
             
             # Check if person exists and belongs to user
-            response = supabase_admin.table('people').select('*').eq('id', person_id).eq('user_id', user_id).execute()
+            response = select(supabase_admin, Person, 'id').eq('id', person_id).eq('user_id', user_id).is_('deleted_at', 'null').execute()
             
             if not response.data:
                 logger.info(f"Person not found or does not belong to user: {person_id}")
@@ -144,15 +163,21 @@ class PersonService:
             logger.info(f"Deleting person: {person_id} for user: {user_id}")
             
             # Check if person exists and belongs to user
-            response = supabase_admin.table('people').select('*').eq('id', person_id).eq('user_id', user_id).execute()
+            response = select(supabase_admin, Person, 'id').eq('id', person_id).eq('user_id', user_id).is_('deleted_at', 'null').execute()
             
             if not response.data:
                 logger.info(f"Person not found or does not belong to user: {person_id}")
                 return {'success': False, 'message': 'Person not found or does not belong to user'}
             
-            # Delete person
+            # Soft-delete person so delta syncs can report it
+            now = datetime.utcnow().isoformat()
+            delete_data = {
+                'deleted_at': now,
+                'updated_at': now
+            }
+            
             # Use supabase_admin to bypass RLS policies
-            response = supabase_admin.table('people').delete().eq('id', person_id).eq('user_id', user_id).execute()
+            response = supabase_admin.table('people').update(delete_data).eq('id', person_id).eq('user_id', user_id).execute()
             
             if not response.data:
                 logger.error("Failed to delete person")
@@ -172,7 +197,7 @@ class PersonService:
             logger.info(f"Toggling favorite status for person: {person_id}, user: {user_id}")
             
             # Check if person exists and belongs to user
-            response = supabase_admin.table('people').select('*').eq('id', person_id).eq('user_id', user_id).execute()
+            response = select(supabase_admin, Person, 'favorite').eq('id', person_id).eq('user_id', user_id).is_('deleted_at', 'null').execute()
             
             if not response.data:
                 logger.info(f"Person not found or does not belong to user: {person_id}")
@@ -1,23 +1,65 @@
 from datetime import datetime
 from app.utils.supabase_client import supabase, supabase_admin
 from app.models.rating import Rating
+from app.models.ride_request import RideRequest
+from app.models.user import User
 from app.services.trip_service import TripService
+from app.utils.query import select
+from app.utils.pagination import keyset_page
+from app.utils.cache import FeedCache
+from app.config import get_config
 import logging
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+config = get_config()
+
 class RatingService:
     """Service for handling rating operations."""
     
+    # Per-worker cache of the ratings each user received, kept fresh by the change feed
+    _received = FeedCache(config.FEED_CACHE_SIZE)
+    
+    @staticmethod
+    def get_received_ratings(user_id):
+        """Get the rating rows a user received; callers get their own copies."""
+        rows = RatingService._received.get(user_id)
+        if rows is None:
+            version = RatingService._received.version()
+            # Use supabase_admin to bypass RLS policies
+            rows = select(supabase_admin, Rating).eq('rated_user_id', user_id).execute().data
+            RatingService._received.set(user_id, rows, version)
+        return [dict(row) for row in rows]
+    
+    @staticmethod
+    def apply_rating_changes(changes):
+        """Drop cached ratings of the users whose ratings changed, as reported by the change feed."""
+        for change in changes:
+            rated_user_ids = {change.record.get('rated_user_id'), change.old_record.get('rated_user_id')} - {None}
+            if not rated_user_ids:
+                # A DELETE without REPLICA IDENTITY FULL only names the rating
+                RatingService._received.clear()
+                return
+            for rated_user_id in rated_user_ids:
+                RatingService._received.evict(rated_user_id)
+    
     @staticmethod
-    def get_ratings(user_id, as_rater=False):
-        """Get all ratings for a user."""
+    def reset_received_cache(enabled):
+        """Empty the received ratings cache, serving from it again only if enabled."""
+        RatingService._received.reset(enabled)
+    
+    @staticmethod
+    def get_ratings(user_id, as_rater=False, page_size=None, cursor=None):
+        """
+        Get all ratings for a user.
+        With a page_size, one page ordered by (created_at, id), newest first, is returned along with a next_cursor.
+        """
         try:
             logger.info(f"Getting ratings for user: {user_id}, as_rater: {as_rater}")
             
             # Use supabase_admin to bypass RLS policies
-            query = supabase_admin.table('ratings').select('*')
+            query = select(supabase_admin, Rating)
             
             if as_rater:
                 # Get ratings given by the user
@@ -26,9 +68,12 @@ class RatingService:
                 # Get ratings received by the user
                 query = query.eq('rated_user_id', user_id)
             
-            response = query.execute()
+            if page_size:
+                rows, next_cursor = keyset_page(query, 'created_at', page_size, cursor, desc=True)
+            else:
+                rows, next_cursor = query.execute().data, None
             
-            ratings = [Rating.from_dict(rating).to_dict() for rating in response.data]
+            ratings = [Rating.row_to_dict(rating) for rating in rows]
             logger.info(f"Found {len(ratings)} ratings for user: {user_id}")
             
             # Enrich ratings with trip and user information
@@ -39,19 +84,23 @@ class RatingService:
                     rating['trip'] = trip_response['trip']
                 
                 # Get rater information
-                rater_response = supabase_admin.table('users').select('id, name, profile_image_url').eq('id', rating['rater_id']).execute()
+                rater_response = select(supabase_admin, User, 'summary').eq('id', rating['rater_id']).execute()
                 if rater_response.data:
                     rating['rater'] = rater_response.data[0]
                 
                 # Get rated user information
-                rated_user_response = supabase_admin.table('users').select('id, name, profile_image_url').eq('id', rating['rated_user_id']).execute()
+                rated_user_response = select(supabase_admin, User, 'summary').eq('id', rating['rated_user_id']).execute()
                 if rated_user_response.data:
                     rating['rated_user'] = rated_user_response.data[0]
             
-            return {
+            result = {
                 'success': True,
                 'ratings': ratings
             }
+            if page_size:
+                result['next_cursor'] = next_cursor
+            
+            return result
             
         except Exception as e:
             logger.error(f"Error getting ratings: {str(e)}")
@@ -64,7 +113,7 @@ class RatingService:
             logger.info(f"Getting rating by ID: {rating_id}")
             
             # Use supabase_admin to bypass RLS policies
-            response = supabase_admin.table('ratings').select('*').eq('id', rating_id).execute()
+            response = select(supabase_admin, Rating).eq('id', rating_id).execute()
             
             if not response.data:
                 logger.info(f"Rating not found: {rating_id}")
@@ -89,12 +138,12 @@ class RatingService:
                 rating_data['trip'] = trip_response['trip']
             
             # Get rater information
-            rater_response = supabase_admin.table('users').select('id, name, profile_image_url').eq('id', rating.rater_id).execute()
+            rater_response = select(supabase_admin, User, 'summary').eq('id', rating.rater_id).execute()
             if rater_response.data:
                 rating_data['rater'] = rater_response.data[0]
             
             # Get rated user information
-            rated_user_response = supabase_admin.table('users').select('id, name, profile_image_url').eq('id', rating.rated_user_id).execute()
+            rated_user_response = select(supabase_admin, User, 'summary').eq('id', rating.rated_user_id).execute()
             if rated_user_response.data:
                 rating_data['rated_user'] = rated_user_response.data[0]
             
@@ -134,7 +183,7 @@ class RatingService:
             
             if not is_driver:
                 # Check if user was a passenger
-                ride_request_response = supabase_admin.table('ride_requests').select('*').eq('trip_id', trip_id).eq('passenger_id', rater_id).eq('status', 'accepted').execute()
+                ride_request_response = select(supabase_admin, RideRequest, 'id').eq('trip_id', trip_id).eq('passenger_id', rater_id).in_('status', RideRequest.SEAT_HOLDING_STATUSES).execute()
                 
                 if not ride_request_response.data:
                     logger.warning(f"User {rater_id} was not part of trip {trip_id}")
@@ -145,14 +194,14 @@ class RatingService:
             
             if not is_rated_driver:
                 # Check if rated user was a passenger
-                ride_request_response = supabase_admin.table('ride_requests').select('*').eq('trip_id', trip_id).eq('passenger_id', rated_user_id).eq('status', 'accepted').execute()
+                ride_request_response = select(supabase_admin, RideRequest, 'id').eq('trip_id', trip_id).eq('passenger_id', rated_user_id).in_('status', RideRequest.SEAT_HOLDING_STATUSES).execute()
                 
                 if not ride_request_response.data:
                     logger.warning(f"User {rated_user_id} was not part of trip {trip_id}")
                     return {'success': False, 'message': 'The user you are rating was not part of this trip'}
             
             # Check if user has already rated this user for this trip
-            existing_rating = supabase_admin.table('ratings').select('*').eq('trip_id', trip_id).eq('rater_id', rater_id).eq('rated_user_id', rated_user_id).execute()
+            existing_rating = select(supabase_admin, Rating, 'id').eq('trip_id', trip_id).eq('rater_id', rater_id).eq('rated_user_id', rated_user_id).execute()
             
             if existing_rating.data:
                 logger.warning(f"User {rater_id} has already rated user {rated_user_id} for trip {trip_id}")
@@ -197,10 +246,7 @@ class RatingService:
         try:
             logger.info(f"Getting ratings for user: {user_id}")
             
-            # Use supabase_admin to bypass RLS policies
-            response = supabase_admin.table('ratings').select('*').eq('rated_user_id', user_id).execute()
-            
-            ratings = [Rating.from_dict(rating).to_dict() for rating in response.data]
+            ratings = [Rating.row_to_dict(rating) for rating in RatingService.get_received_ratings(user_id)]
             logger.info(f"Found {len(ratings)} ratings for user: {user_id}")
             
             # Calculate average rating
@@ -217,7 +263,7 @@ class RatingService:
                     rating['trip'] = trip_response['trip']
                 
                 # Get rater information
-                rater_response = supabase_admin.table('users').select('id, name, profile_image_url').eq('id', rating['rater_id']).execute()
+                rater_response = select(supabase_admin, User, 'summary').eq('id', rating['rater_id']).execute()
                 if rater_response.data:
                     rating['rater'] = rater_response.data[0]
             
@@ -252,27 +298,27 @@ class RatingService:
                 
                 if not is_driver:
                     # Check if user was a passenger
-                    ride_request_response = supabase_admin.table('ride_requests').select('*').eq('trip_id', trip_id).eq('passenger_id', user_id).execute()
+                    ride_request_response = select(supabase_admin, RideRequest, 'id').eq('trip_id', trip_id).eq('passenger_id', user_id).execute()
                     
                     if not ride_request_response.data:
                         logger.warning(f"User {user_id} is not authorized to view ratings for trip {trip_id}")
                         return {'success': False, 'message': 'Not authorized to view ratings for this trip'}
             
             # Use supabase_admin to bypass RLS policies
-            response = supabase_admin.table('ratings').select('*').eq('trip_id', trip_id).execute()
+            response = select(supabase_admin, Rating).eq('trip_id', trip_id).execute()
             
-            ratings = [Rating.from_dict(rating).to_dict() for rating in response.data]
+            ratings = [Rating.row_to_dict(rating) for rating in response.data]
             logger.info(f"Found {len(ratings)} ratings for trip: {trip_id}")
             
             # Enrich ratings with user information
             for rating in ratings:
                 # Get rater information
-                rater_response = supabase_admin.table('users').select('id, name, profile_image_url').eq('id', rating['rater_id']).execute()
+                rater_response = select(supabase_admin, User, 'summary').eq('id', rating['rater_id']).execute()
                 if rater_response.data:
                     rating['rater'] = rater_response.data[0]
                 
                 # Get rated user information
-                rated_user_response = supabase_admin.table('users').select('id, name, profile_image_url').eq('id', rating['rated_user_id']).execute()
+                rated_user_response = select(supabase_admin, User, 'summary').eq('id', rating['rated_user_id']).execute()
                 if rated_user_response.data:
                     rating['rated_user'] = rated_user_response.data[0]
             
@@ -293,7 +339,7 @@ class RatingService:
             logger.info(f"Updating average rating for user: {user_id}")
             
             # Get all ratings for the user
-            response = supabase_admin.table('ratings').select('rating').eq('rated_user_id', user_id).execute()
+            response = select(supabase_admin, Rating, 'rating').eq('rated_user_id', user_id).execute()
             
             if not response.data:
                 logger.info(f"No ratings found for user: {user_id}")
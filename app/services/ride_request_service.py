@@ -1,7 +1,14 @@
 from datetime import datetime
 from app.utils.supabase_client import supabase, supabase_admin
 from app.models.ride_request import RideRequest
+from app.models.trip import Trip
+from app.models.user import User
 from app.services.trip_service import TripService
+from app.utils.query import select, embed
+from app.utils.pagination import keyset_page
+from app.utils.concurrency import run_concurrently
+from app.utils.events import event_bus
+from app.utils.change_feed import feed_connected
 import logging
 
 # Set up logging
@@ -11,17 +18,20 @@ class RideRequestService:
     """Service for handling ride request operations."""
     
     @staticmethod
-    def get_ride_requests(user_id, is_driver=False):
-        """Get all ride requests for a user."""
+    def get_ride_requests(user_id, is_driver=False, page_size=None, cursor=None):
+        """
+        Get all ride requests for a user.
+        With a page_size, one page ordered by (created_at, id), newest first, is returned along with a next_cursor.
+        """
         try:
             logger.info(f"Getting ride requests for user: {user_id}, is_driver: {is_driver}")
             
             # Use supabase_admin to bypass RLS policies
-            query = supabase_admin.table('ride_requests').select('*')
+            query = select(supabase_admin, RideRequest)
             
             if is_driver:
                 # Get trips where user is the driver
-                trips_response = supabase_admin.table('trips').select('id').eq('driver_id', user_id).execute()
+                trips_response = select(supabase_admin, Trip, 'id').eq('driver_id', user_id).execute()
                 
                 if not trips_response.data:
                     logger.info(f"No trips found for driver: {user_id}")
@@ -33,9 +43,12 @@ class RideRequestService:
                 # Get ride requests where user is the passenger
                 query = query.eq('passenger_id', user_id)
             
-            response = query.execute()
+            if page_size:
+                rows, next_cursor = keyset_page(query, 'created_at', page_size, cursor, desc=True)
+            else:
+                rows, next_cursor = query.execute().data, None
             
-            ride_requests = [RideRequest.from_dict(request).to_dict() for request in response.data]
+            ride_requests = [RideRequest.row_to_dict(request) for request in rows]
             logger.info(f"Found {len(ride_requests)} ride requests for user: {user_id}")
             
             # Enrich ride requests with trip information
@@ -44,10 +57,14 @@ class RideRequestService:
                 if trip_response['success']:
                     request['trip'] = trip_response['trip']
             
-            return {
+            result = {
                 'success': True,
                 'ride_requests': ride_requests
             }
+            if page_size:
+                result['next_cursor'] = next_cursor
+            
+            return result
             
         except Exception as e:
             logger.error(f"Error getting ride requests: {str(e)}")
@@ -60,7 +77,7 @@ class RideRequestService:
             logger.info(f"Getting ride request by ID: {request_id}, user_id: {user_id}")
             
             # Use supabase_admin to bypass RLS policies
-            query = supabase_admin.table('ride_requests').select('*').eq('id', request_id)
+            query = select(supabase_admin, RideRequest).eq('id', request_id)
             
             if user_id:
                 # Check if user is the passenger or the driver of the trip
@@ -115,7 +132,7 @@ class RideRequestService:
                 return {'success': False, 'message': f'Cannot request a ride for a trip with status: {trip["status"]}'}
             
             # Check if passenger has already requested this trip
-            existing_request = supabase_admin.table('ride_requests').select('*').eq('trip_id', data.get('trip_id')).eq('passenger_id', passenger_id).execute()
+            existing_request = select(supabase_admin, RideRequest, 'id').eq('trip_id', data.get('trip_id')).eq('passenger_id', passenger_id).execute()
             if existing_request.data:
                 logger.warning(f"Passenger {passenger_id} has already requested this trip")
                 return {'success': False, 'message': 'You have already requested this trip'}
@@ -163,6 +180,7 @@ class RideRequestService:
             
             ride_request = RideRequest.from_dict(response.data[0])
             logger.info(f"Ride request created successfully: {ride_request.id}")
+            RideRequestService.publish_event('ride_request.created', ride_request.to_dict())
             
             return {
                 'success': True,
@@ -180,7 +198,7 @@ class RideRequestService:
             logger.info(f"Updating ride request status: {request_id}, user_id: {user_id}, new_status: {new_status}, is_driver: {is_driver}")
             
             # Get the ride request
-            response = supabase_admin.table('ride_requests').select('*').eq('id', request_id).execute()
+            response = select(supabase_admin, RideRequest, 'transition').eq('id', request_id).execute()
             
             if not response.data:
                 logger.info(f"Ride request not found: {request_id}")
@@ -214,7 +232,7 @@ class RideRequestService:
                     trip = trip_response['trip']
                     
                     # Get all accepted ride requests for this trip
-                    accepted_requests = supabase_admin.table('ride_requests').select('*').eq('trip_id', ride_request.trip_id).eq('status', 'accepted').execute()
+                    accepted_requests = select(supabase_admin, RideRequest, 'seats').eq('trip_id', ride_request.trip_id).eq('status', 'accepted').execute()
                     
                     # Calculate total seats taken
                     seats_taken = sum(RideRequest.from_dict(req).seats_requested for req in accepted_requests.data)
@@ -252,6 +270,7 @@ class RideRequestService:
             
             updated_ride_request = RideRequest.from_dict(response.data[0])
             logger.info(f"Ride request status updated successfully: {updated_ride_request.id}, new status: {updated_ride_request.status}")
+            RideRequestService.publish_event('ride_request.status', updated_ride_request.to_dict())
             
             return {
                 'success': True,
@@ -266,7 +285,183 @@ class RideRequestService:
         except Exception as e:
             logger.error(f"Error updating ride request status: {str(e)}")
             return {'success': False, 'message': str(e)} 
+    
+    @staticmethod
+    def bulk_update_ride_request_status(trip_id, driver_id, updates):
+        """
+        Accept or reject several pending ride requests for one trip (driver only).
+        updates is a list of {'id': ..., 'status': 'accepted' | 'rejected'} items, applied in order.
+        Ownership and seat capacity are checked once for the whole batch; accepts that no longer fit
+        fail individually while the rest are applied. Each item's result is reported in request order.
+        """
+        try:
+            logger.info(f"Bulk updating {len(updates)} ride requests for trip: {trip_id}, driver: {driver_id}")
+            
+            # Load the trip and its open requests together
+            trip_response, requests_response = run_concurrently(
+                lambda: select(supabase_admin, Trip, 'capacity').eq('id', trip_id).execute(),
+                lambda: select(supabase_admin, RideRequest, 'transition')\
+                    .eq('trip_id', trip_id)\
+                    .in_('status', ['pending', 'accepted'])\
+                    .execute()
+            )
+            
+            if not trip_response.data:
+                logger.warning(f"Trip not found: {trip_id}")
+                return {'success': False, 'message': 'Trip not found'}
+            
+            trip = trip_response.data[0]
+            if trip['driver_id'] != driver_id:
+                logger.warning(f"User {driver_id} is not the driver of trip {trip_id}")
+                return {'success': False, 'message': 'Not authorized to update these ride requests'}
+            
+            ride_requests = {}
+            seats_taken = 0
+            for req_data in requests_response.data:
+                ride_request = RideRequest.from_dict(req_data)
+                ride_requests[ride_request.id] = ride_request
+                if ride_request.status == 'accepted':
+                    seats_taken += int(ride_request.seats_requested)
+            
+            # Validate every item against the snapshot, reserving seats as accepts are admitted
+            results = []
+            targets = {'accepted': [], 'rejected': []}
+            seen = set()
+            for item in updates:
+                request_id, new_status = item.get('id'), item.get('status')
+                result = {'id': request_id, 'success': False}
+                results.append(result)
+                ride_request = ride_requests.get(request_id)
+                
+                if request_id in seen:
+                    result['message'] = 'Duplicate ride request in batch'
+                elif new_status not in targets:
+                    result['message'] = f'Invalid status: {new_status}'
+                elif ride_request is None:
+                    result['message'] = 'Ride request not found'
+                elif ride_request.status != 'pending':
+                    result['message'] = f'Cannot update ride request with status: {ride_request.status}'
+                elif new_status == 'accepted' and seats_taken + int(ride_request.seats_requested) > trip['available_seats']:
+                    result['message'] = 'Not enough available seats'
+                else:
+                    if new_status == 'accepted':
+                        seats_taken += int(ride_request.seats_requested)
+                    targets[new_status].append(request_id)
+                    result['status'] = new_status
+                seen.add(request_id)
+            
+            # One conditional update per target status, sent concurrently; a request that stopped
+            # being pending since the snapshot is left untouched and reported as failed
+            now = datetime.utcnow().isoformat()
+            
+            def apply(new_status, request_ids):
+                return lambda: supabase_admin.table('ride_requests')\
+                    .update({'status': new_status, 'updated_at': now})\
+                    .in_('id', request_ids)\
+                    .eq('status', 'pending')\
+                    .execute()
+            
+            batches = [(new_status, request_ids) for new_status, request_ids in targets.items() if request_ids]
+            updated = set()
+            for response in run_concurrently(*(apply(new_status, request_ids) for new_status, request_ids in batches)):
+                updated.update(row['id'] for row in response.data)
+            
+            counts = {'accepted': 0, 'rejected': 0, 'failed': 0}
+            for result in results:
+                if 'status' not in result:
+                    counts['failed'] += 1
+                elif result['id'] in updated:
+                    result['success'] = True
+                    result['updated_at'] = now
+                    counts[result['status']] += 1
+                    ride_request = ride_requests[result['id']]
+                    ride_request.status, ride_request.updated_at = result['status'], now
+                    RideRequestService.publish_event('ride_request.status', ride_request.to_dict())
+                else:
+                    if result['status'] == 'accepted':
+                        seats_taken -= int(ride_requests[result['id']].seats_requested)
+                    del result['status']
+                    result['message'] = 'Ride request is no longer pending'
+                    counts['failed'] += 1
+            
+            logger.info(f"Bulk update for trip {trip_id}: {counts['accepted']} accepted, {counts['rejected']} rejected, {counts['failed']} failed")
+            return {
+                'success': True,
+                'message': f"{counts['accepted']} accepted, {counts['rejected']} rejected, {counts['failed']} failed",
+                'results': results,
+                'counts': counts,
+                'seats_remaining': trip['available_seats'] - seats_taken
+            }
+            
+        except Exception as e:
+            logger.error(f"Error bulk updating ride request status: {str(e)}")
+            return {'success': False, 'message': str(e)}
+        
+    @staticmethod
+    def publish_event(event_type, ride_request):
+        """
+        Push a ride request change to the event streams of the request and of its trip. Failures are only logged.
+        While the change feed is connected, every worker learns about the change from the feed instead.
+        """
+        if feed_connected('ride_requests'):
+            return
+        try:
+            event_bus.publish(*RideRequestService.build_event(event_type, ride_request))
+        except Exception as e:
+            logger.error(f"Error publishing ride request event: {str(e)}")
+    
+    @staticmethod
+    def build_event(event_type, ride_request):
+        """Return the (topics, event) pair announcing a ride request change."""
+        return (f"ride_request:{ride_request['id']}", f"trip:{ride_request['trip_id']}"), {
+            'type': event_type,
+            'ride_request_id': ride_request['id'],
+            'trip_id': ride_request['trip_id'],
+            'passenger_id': ride_request['passenger_id'],
+            'status': ride_request['status'],
+            'seats_requested': ride_request['seats_requested'],
+            'updated_at': ride_request['updated_at']
+        }
+    
+    @staticmethod
+    def apply_ride_request_changes(changes):
+        """Deliver ride request changes from the change feed to this worker's event stream subscribers."""
+        for change in changes:
+            # Deleted rows carry no trip to announce them on
+            if change.type == 'DELETE':
+                continue
+            event_type = 'ride_request.created' if change.type == 'INSERT' else 'ride_request.status'
+            event_bus.dispatch(*RideRequestService.build_event(event_type, change.record))
+    
+    @staticmethod
+    def get_ride_request_stream_state(request_id, user_id):
+        """Get the current status of a ride request and its trip, ensuring the user is its passenger or driver."""
+        try:
+            logger.info(f"Getting stream state for ride request: {request_id}, user: {user_id}")
+            
+            response = select(supabase_admin, RideRequest, 'transition').eq('id', request_id).execute()
+            if not response.data:
+                logger.info(f"Ride request not found: {request_id}")
+                return {'success': False, 'message': 'Ride request not found'}
+            
+            ride_request = response.data[0]
+            trip_response = select(supabase_admin, Trip, 'capacity').eq('id', ride_request['trip_id']).execute()
+            trip = trip_response.data[0] if trip_response.data else None
+            
+            if user_id != ride_request['passenger_id'] and (not trip or trip['driver_id'] != user_id):
+                logger.warning(f"User {user_id} is not authorized to view this ride request")
+                return {'success': False, 'message': 'Not authorized to view this ride request'}
+            
+            return {
+                'success': True,
+                'ride_request': ride_request,
+                'trip': {'id': ride_request['trip_id'], 'status': trip['status'] if trip else None}
+            }
         
+        except Exception as e:
+            logger.error(f"Error getting ride request stream state: {str(e)}")
+            return {'success': False, 'message': str(e)}
+    
     @staticmethod
     def get_pending_requests_for_trip(trip_id, user_id):
         """Get pending ride requests for a trip, ensuring the user is the driver."""
@@ -279,12 +474,12 @@ class RideRequestService:
                 logger.warning(f"User {user_id} not authorized to view requests for trip {trip_id}")
                 return {'success': False, 'message': 'Not authorized'}
             
-            response = supabase_admin.table('ride_requests').select('*')\
+            response = select(supabase_admin, RideRequest)\
                 .eq('trip_id', trip_id)\
                 .eq('status', 'pending')\
                 .execute()
             
-            requests = [RideRequest.from_dict(req).to_dict() for req in response.data]
+            requests = [RideRequest.row_to_dict(req) for req in response.data]
             logger.info(f"Found {len(requests)} pending requests for trip: {trip_id}")
             return {
                 'success': True,
@@ -302,12 +497,12 @@ class RideRequestService:
             if not trip_response['success'] or trip_response['trip']['driver_id'] != user_id:
                 return {'success': False, 'message': 'Not authorized'}
             
-            response = supabase_admin.table('ride_requests').select('*, users:passenger_id(id, name, profile_image_url, phone)')\
+            response = select(supabase_admin, RideRequest, 'full', embed(User, 'contact', via='passenger_id'))\
                 .eq('trip_id', trip_id)\
                 .eq('status', 'pending')\
                 .execute()
             
-            requests = [RideRequest.from_dict(req).to_dict() for req in response.data]
+            requests = [RideRequest.row_to_dict(req) for req in response.data]
             for req, raw_data in zip(requests, response.data):
                 req['passenger'] = {
                     'id': raw_data['users']['id'],
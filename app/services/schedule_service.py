@@ -0,0 +1,326 @@
+from datetime import datetime, timedelta
+import time
+from app.utils.supabase_client import supabase_admin
+from app.models.trip_schedule import TripSchedule
+from app.models.vehicle import Vehicle
+from app.services.vehicle_service import VehicleService
+from app.services.trip_service import TripService
+from app.utils.query import select, iter_pages
+from app.utils.recurrence import parse_departure, parse_recurrence, occurrences_between
+from app.config import get_config
+from postgrest.types import CountMethod, ReturnMethod
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+config = get_config()
+
+# Trip rows per batched insert, and schedule ids per in_() filter
+INSERT_CHUNK_SIZE = 500
+ID_CHUNK_SIZE = 200
+
+class ScheduleService:
+    """
+    Service for recurring trip schedules.
+    
+    A schedule holds a route, a vehicle and an RRULE. Its trips are materialized ahead of time into the
+    trips table, up to SCHEDULE_HORIZON_DAYS out, with one batched insert per run for all due schedules.
+    Each schedule records how far it has been materialized, so a run only touches schedules whose
+    watermark is behind the current horizon. The vehicle is checked once per schedule, not per trip.
+    """
+    
+    # Schedule fields copied onto every materialized trip
+    TRIP_FIELDS = (
+        'driver_id', 'vehicle_id',
+        'start_latitude', 'start_longitude', 'start_address',
+        'end_latitude', 'end_longitude', 'end_address',
+        'available_seats', 'price', 'description'
+    )
+    
+    @staticmethod
+    def horizon_end(now=None):
+        """
+        Return the end of the materialization window: midnight SCHEDULE_HORIZON_DAYS after today.
+        It only moves once a day, so repeated runs on the same day find nothing due.
+        """
+        now = now or datetime.now()
+        return datetime.combine(now.date() + timedelta(days=config.SCHEDULE_HORIZON_DAYS + 1), datetime.min.time())
+    
+    @staticmethod
+    def create_schedule(driver_id, data):
+        """Create a recurring trip schedule and materialize its trips within the horizon."""
+        try:
+            logger.info(f"Creating trip schedule for driver: {driver_id}")
+            
+            # Validate vehicle belongs to driver
+            vehicle_response = VehicleService.get_vehicle_by_id(data.get('vehicle_id'), driver_id)
+            if not vehicle_response['success']:
+                logger.warning(f"Vehicle not found or does not belong to driver: {data.get('vehicle_id')}")
+                return {'success': False, 'message': 'Vehicle not found or does not belong to driver'}
+            
+            # Validate required fields
+            required_fields = [
+                'start_latitude', 'start_longitude', 'start_address',
+                'end_latitude', 'end_longitude', 'end_address',
+                'recurrence', 'first_departure', 'available_seats', 'price'
+            ]
+            
+            for field in required_fields:
+                if field not in data or not data.get(field):
+                    logger.warning(f"Missing required field: {field}")
+                    return {'success': False, 'message': f'Missing required field: {field}'}
+            
+            try:
+                first_departure = parse_departure(data['first_departure'])
+                parse_recurrence(data['recurrence'], first_departure)
+                route = TripService.normalize_route(data)
+            except ValueError as e:
+                logger.warning(f"Invalid schedule: {str(e)}")
+                return {'success': False, 'message': str(e)}
+            
+            now = datetime.utcnow().isoformat()
+            schedule_data = {
+                'driver_id': driver_id,
+                'vehicle_id': data.get('vehicle_id'),
+                'start_latitude': route['start_latitude'],
+                'start_longitude': route['start_longitude'],
+                'start_address': data.get('start_address'),
+                'end_latitude': route['end_latitude'],
+                'end_longitude': route['end_longitude'],
+                'end_address': data.get('end_address'),
+                'recurrence': data['recurrence'].strip(),
+                'first_departure': first_departure.isoformat(),
+                'duration_minutes': data.get('duration_minutes'),
+                'available_seats': data.get('available_seats'),
+                'price': data.get('price'),
+                'description': data.get('description', ''),
+                'status': 'active',
+                'materialized_until': (first_departure - timedelta(seconds=1)).isoformat(),
+                'created_at': now,
+                'updated_at': now
+            }
+            
+            # Use supabase_admin to bypass RLS policies
+            response = supabase_admin.table('trip_schedules').insert(schedule_data).execute()
+            
+            if not response.data:
+                logger.error("Failed to create trip schedule")
+                return {'success': False, 'message': 'Failed to create trip schedule'}
+            
+            schedule = TripSchedule.row_to_dict(response.data[0])
+            logger.info(f"Trip schedule created successfully: {schedule['id']}")
+            
+            # The vehicle was just validated, so materialize straight away
+            stats = ScheduleService.materialize([schedule], ScheduleService.horizon_end())
+            schedule['materialized_until'] = stats['materialized_until']
+            schedule['status'] = 'ended' if stats['ended'] else 'active'
+            
+            return {
+                'success': True,
+                'schedule': schedule,
+                'trips_created': stats['trips_created']
+            }
+            
+        except Exception as e:
+            logger.error(f"Error creating trip schedule: {str(e)}")
+            return {'success': False, 'message': str(e)}
+    
+    @staticmethod
+    def get_driver_schedules(driver_id):
+        """Get all trip schedules of a driver."""
+        try:
+            logger.info(f"Fetching trip schedules for driver: {driver_id}")
+            
+            response = select(supabase_admin, TripSchedule)\
+                .eq('driver_id', driver_id)\
+                .order('created_at', desc=True)\
+                .execute()
+            
+            schedules = [TripSchedule.row_to_dict(schedule) for schedule in response.data]
+            logger.info(f"Found {len(schedules)} trip schedules for driver: {driver_id}")
+            return {
+                'success': True,
+                'schedules': schedules
+            }
+            
+        except Exception as e:
+            logger.error(f"Error fetching trip schedules: {str(e)}")
+            return {'success': False, 'message': str(e)}
+    
+    @staticmethod
+    def end_schedule(schedule_id, driver_id):
+        """Stop materializing a schedule. Trips already created are kept and can be cancelled individually."""
+        try:
+            logger.info(f"Ending trip schedule: {schedule_id} for driver: {driver_id}")
+            
+            # Use supabase_admin to bypass RLS policies
+            response = supabase_admin.table('trip_schedules')\
+                .update({'status': 'ended', 'updated_at': datetime.utcnow().isoformat()})\
+                .eq('id', schedule_id)\
+                .eq('driver_id', driver_id)\
+                .execute()
+            
+            if not response.data:
+                logger.info(f"Trip schedule not found or does not belong to driver: {schedule_id}")
+                return {'success': False, 'message': 'Trip schedule not found or does not belong to driver'}
+            
+            logger.info(f"Trip schedule ended successfully: {schedule_id}")
+            return {
+                'success': True,
+                'schedule': TripSchedule.row_to_dict(response.data[0])
+            }
+            
+        except Exception as e:
+            logger.error(f"Error ending trip schedule: {str(e)}")
+            return {'success': False, 'message': str(e)}
+    
+    @staticmethod
+    def materialize_due(now=None):
+        """
+        Materialize trips for every active schedule whose watermark is behind the current horizon.
+        Safe to run from several workers at once: trips are inserted with ON CONFLICT (schedule_id, start_time) DO NOTHING.
+        """
+        try:
+            started = time.perf_counter()
+            horizon_end = ScheduleService.horizon_end(now)
+            horizon_iso = horizon_end.isoformat()
+            
+            def fetch_page(start, end):
+                return select(supabase_admin, TripSchedule)\
+                    .eq('status', 'active')\
+                    .lt('materialized_until', horizon_iso)\
+                    .order('id')\
+                    .range(start, end)\
+                    .execute().data
+            
+            # Collect first so the watermark updates cannot shift the pages
+            schedules = [schedule for page in iter_pages(fetch_page, INSERT_CHUNK_SIZE) for schedule in page]
+            
+            # Check the vehicles of all due schedules at once
+            vehicle_ids = list({schedule['vehicle_id'] for schedule in schedules})
+            live_vehicles = set()
+            for i in range(0, len(vehicle_ids), ID_CHUNK_SIZE):
+                response = select(supabase_admin, Vehicle, 'id')\
+                    .in_('id', vehicle_ids[i:i + ID_CHUNK_SIZE])\
+                    .is_('deleted_at', 'null')\
+                    .execute()
+                live_vehicles.update(vehicle['id'] for vehicle in response.data)
+            
+            orphaned = [schedule['id'] for schedule in schedules if schedule['vehicle_id'] not in live_vehicles]
+            if orphaned:
+                logger.warning(f"Ending {len(orphaned)} trip schedules whose vehicle was deleted")
+                ScheduleService.set_status(orphaned, 'ended')
+            
+            stats = ScheduleService.materialize([schedule for schedule in schedules if schedule['vehicle_id'] in live_vehicles], horizon_end, now)
+            
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            logger.info(f"Materialized {stats['trips_created']} trips for {stats['schedules']} schedules up to {horizon_iso} in {elapsed_ms:.1f} ms")
+            return {
+                'success': True,
+                'schedules': stats['schedules'],
+                'trips_created': stats['trips_created'],
+                'ended': stats['ended'] + len(orphaned),
+                'materialized_until': horizon_iso,
+                'elapsed_ms': round(elapsed_ms, 1)
+            }
+            
+        except Exception as e:
+            logger.error(f"Error materializing scheduled trips: {str(e)}")
+            return {'success': False, 'message': str(e)}
+    
+    @staticmethod
+    def materialize(schedules, horizon_end, now=None):
+        """
+        Insert the trips of schedules that fall after their watermark (or now) and up to horizon_end,
+        then advance their watermarks to horizon_end. Schedules with no occurrences left are ended,
+        and so are schedules whose recurrence or first departure cannot be read.
+        
+        Watermarks advance only after the insert, so a run that fails or is killed midway is redone
+        by the next one. Schedules ended before the insert get no trips from the run.
+        """
+        now = now or datetime.now()
+        horizon_iso = horizon_end.isoformat()
+        created_at = datetime.utcnow().isoformat()
+        
+        trips_by_schedule = {}
+        ended = []
+        for schedule in schedules:
+            try:
+                first_departure = parse_departure(schedule['first_departure'])
+                recurrence = parse_recurrence(schedule['recurrence'], first_departure)
+                after = max(parse_departure(schedule['materialized_until']), now)
+                
+                trips = []
+                for departure in occurrences_between(recurrence, after, horizon_end):
+                    trip_data = {field: schedule[field] for field in ScheduleService.TRIP_FIELDS}
+                    # The estimated duration depends on the time of day of each departure
+                    trip_data.update(TripService.normalize_route({**schedule, 'start_time': departure}))
+                    trip_data.update({
+                        'schedule_id': schedule['id'],
+                        'start_time': departure.isoformat(),
+                        'end_time': (departure + timedelta(minutes=int(schedule['duration_minutes']))).isoformat() if schedule['duration_minutes'] else None,
+                        'status': 'scheduled',
+                        'created_at': created_at,
+                        'updated_at': created_at
+                    })
+                    trips.append(trip_data)
+                finished = recurrence.after(horizon_end) is None
+            except ValueError as e:
+                # One broken row must not hold up every other schedule on every run
+                logger.error(f"Ending invalid trip schedule {schedule['id']}: {str(e)}")
+                ended.append(schedule['id'])
+                continue
+            
+            trips_by_schedule[schedule['id']] = trips
+            if finished:
+                ended.append(schedule['id'])
+        
+        # Skip schedules ended since they were read, so they get no trips from this run
+        schedule_ids = list(trips_by_schedule)
+        active = set()
+        for i in range(0, len(schedule_ids), ID_CHUNK_SIZE):
+            response = select(supabase_admin, TripSchedule, 'id')\
+                .in_('id', schedule_ids[i:i + ID_CHUNK_SIZE])\
+                .eq('status', 'active')\
+                .execute()
+            active.update(row['id'] for row in response.data)
+        schedule_ids = [schedule_id for schedule_id in schedule_ids if schedule_id in active]
+        
+        # Use supabase_admin to bypass RLS policies; duplicates from an overlapping or interrupted run are skipped
+        rows = [trip for schedule_id in schedule_ids for trip in trips_by_schedule[schedule_id]]
+        trips_created = 0
+        for i in range(0, len(rows), INSERT_CHUNK_SIZE):
+            response = supabase_admin.table('trips')\
+                .upsert(rows[i:i + INSERT_CHUNK_SIZE], on_conflict='schedule_id,start_time', ignore_duplicates=True,
+                        count=CountMethod.exact, returning=ReturnMethod.minimal)\
+                .execute()
+            trips_created += response.count or 0
+        
+        # Advance the watermarks only once their trips are in; every schedule moves to the same one, so one update covers a chunk
+        for i in range(0, len(schedule_ids), ID_CHUNK_SIZE):
+            supabase_admin.table('trip_schedules')\
+                .update({'materialized_until': horizon_iso}, returning=ReturnMethod.minimal)\
+                .in_('id', schedule_ids[i:i + ID_CHUNK_SIZE])\
+                .eq('status', 'active')\
+                .execute()
+        
+        if ended:
+            ScheduleService.set_status(ended, 'ended')
+        
+        return {
+            'schedules': len(schedule_ids),
+            'trips_created': trips_created,
+            'ended': len(ended),
+            'materialized_until': horizon_iso
+        }
+    
+    @staticmethod
+    def set_status(schedule_ids, status):
+        """Set the status of several schedules, a chunk of ids per update."""
+        updated_at = datetime.utcnow().isoformat()
+        for i in range(0, len(schedule_ids), ID_CHUNK_SIZE):
+            supabase_admin.table('trip_schedules')\
+                .update({'status': status, 'updated_at': updated_at}, returning=ReturnMethod.minimal)\
+                .in_('id', schedule_ids[i:i + ID_CHUNK_SIZE])\
+                .execute()
@@ -0,0 +1,175 @@
+from datetime import datetime, timedelta
+import threading
+import time
+from app.utils.supabase_client import supabase_admin
+from app.models.trip import Trip
+from app.services.trip_service import TripService
+from app.services.ride_request_service import RideRequestService
+from app.services.lease_service import LeaseService
+from app.utils.query import select
+from app.config import get_config
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+config = get_config()
+
+class SweeperService:
+    """
+    Service expiring scheduled trips that never started and ride requests nobody answered.
+    
+    Scheduled trips more than STALE_TRIP_GRACE_MINUTES past their start_time become 'expired', and so do
+    their pending and accepted ride requests. Pending requests on trips more than STALE_REQUEST_GRACE_MINUTES
+    past departure expire even though the trip may still start late. Rows are updated in batches of
+    STALE_SWEEP_BATCH_SIZE, each update conditional on the status it expires, so reruns are harmless;
+    the 'stale-sweeper' lease, held until the next sweep is due, lets one worker sweep per interval.
+    """
+    
+    LEASE_NAME = 'stale-sweeper'
+    
+    _stats = {
+        'runs': 0, 'skipped': 0, 'errors': 0,
+        'trips_expired': 0, 'ride_requests_expired': 0,
+        'last_run_at': None, 'last_duration_ms': None
+    }
+    _stats_lock = threading.Lock()
+    
+    @staticmethod
+    def sweep(now=None):
+        """Expire stale trips and ride requests, unless another worker holds the sweeper lease."""
+        try:
+            started = time.perf_counter()
+            if not LeaseService.acquire(SweeperService.LEASE_NAME, config.STALE_SWEEP_LEASE_TTL):
+                logger.info("Stale sweep skipped, another worker holds the lease")
+                SweeperService.record(skipped=1)
+                return {'success': True, 'skipped': True}
+            
+            try:
+                now = now or datetime.now()
+                trips = SweeperService.expire_stale_trips(now - timedelta(minutes=config.STALE_TRIP_GRACE_MINUTES))
+                ride_requests = SweeperService.expire_stale_requests(now - timedelta(minutes=config.STALE_REQUEST_GRACE_MINUTES))
+            finally:
+                # Hold the lease until the next sweep is due, so other workers skip the runs in between
+                LeaseService.release(SweeperService.LEASE_NAME, until=datetime.utcnow() + timedelta(seconds=config.STALE_SWEEP_INTERVAL))
+            
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            SweeperService.record(
+                runs=1,
+                trips_expired=trips['trips'],
+                ride_requests_expired=trips['ride_requests'] + ride_requests,
+                last_run_at=datetime.utcnow().isoformat(),
+                last_duration_ms=round(elapsed_ms, 1)
+            )
+            logger.info(f"Expired {trips['trips']} stale trips and {trips['ride_requests'] + ride_requests} ride requests in {elapsed_ms:.1f} ms")
+            return {
+                'success': True,
+                'trips_expired': trips['trips'],
+                'ride_requests_expired': trips['ride_requests'] + ride_requests
+            }
+            
+        except Exception as e:
+            logger.error(f"Error sweeping stale trips: {str(e)}")
+            SweeperService.record(errors=1)
+            return {'success': False, 'message': str(e)}
+    
+    @staticmethod
+    def expire_stale_trips(cutoff):
+        """
+        Expire the scheduled trips that should have started before cutoff, with their open ride requests.
+        Returns the number of trips and of ride requests expired.
+        """
+        expired = {'trips': 0, 'ride_requests': 0}
+        
+        while True:
+            rows = SweeperService.select_stale_trips(cutoff).limit(config.STALE_SWEEP_BATCH_SIZE).execute().data
+            if not rows:
+                break
+            
+            # Only trips still scheduled change; one started or cancelled meanwhile is left alone
+            updated_at = datetime.utcnow().isoformat()
+            response = supabase_admin.table('trips')\
+                .update({'status': 'expired', 'updated_at': updated_at})\
+                .in_('id', [row['id'] for row in rows])\
+                .eq('status', 'scheduled')\
+                .execute()
+            trip_ids = [trip['id'] for trip in response.data]
+            if not trip_ids:
+                break
+            
+            ride_requests = TripService.cascade_ride_requests(trip_ids, 'expired', updated_at)
+            expired['trips'] += len(trip_ids)
+            expired['ride_requests'] += ride_requests['expired']
+            for trip_id in trip_ids:
+                TripService.invalidate_trip(trip_id)
+            
+            if not SweeperService.renew_lease():
+                break
+        
+        return expired
+    
+    @staticmethod
+    def expire_stale_requests(cutoff):
+        """
+        Expire the pending ride requests of scheduled trips that departed before cutoff.
+        Returns the number of ride requests expired.
+        """
+        expired = 0
+        last_id = None
+        
+        while True:
+            query = SweeperService.select_stale_trips(cutoff).limit(config.STALE_SWEEP_BATCH_SIZE)
+            if last_id is not None:
+                query = query.gt('id', last_id)
+            rows = query.execute().data
+            if not rows:
+                break
+            last_id = rows[-1]['id']
+            
+            response = supabase_admin.table('ride_requests')\
+                .update({'status': 'expired', 'updated_at': datetime.utcnow().isoformat()})\
+                .in_('trip_id', [row['id'] for row in rows])\
+                .eq('status', 'pending')\
+                .execute()
+            expired += len(response.data)
+            
+            for ride_request in response.data:
+                RideRequestService.publish_event('ride_request.status', ride_request)
+            
+            if not SweeperService.renew_lease():
+                break
+        
+        return expired
+    
+    @staticmethod
+    def renew_lease():
+        """Extend the sweeper lease between batches. Returns False if another worker took it over meanwhile."""
+        # Another worker may take over the job if this run outlives its lease
+        if LeaseService.acquire(SweeperService.LEASE_NAME, config.STALE_SWEEP_LEASE_TTL):
+            return True
+        logger.warning("Lost the stale sweeper lease, stopping")
+        return False
+    
+    @staticmethod
+    def select_stale_trips(cutoff):
+        """Start a select of the ids of scheduled trips departing before cutoff, in id order."""
+        return select(supabase_admin, Trip, 'id')\
+            .eq('status', 'scheduled')\
+            .lt('start_time', cutoff.isoformat())\
+            .order('id')
+    
+    @staticmethod
+    def record(**counters):
+        """Add to the sweeper counters; last_* values replace the previous ones."""
+        with SweeperService._stats_lock:
+            for key, value in counters.items():
+                if key.startswith('last_'):
+                    SweeperService._stats[key] = value
+                else:
+                    SweeperService._stats[key] += value
+    
+    @staticmethod
+    def stats():
+        """Return this worker's sweeper counters."""
+        with SweeperService._stats_lock:
+            return dict(SweeperService._stats)
@@ -1,24 +1,60 @@
 from datetime import datetime
+import uuid
 from app.utils.supabase_client import supabase, supabase_admin
 from app.models.trip import Trip
+from app.models.ride_request import RideRequest
+from app.models.user import User
+from app.models.vehicle import Vehicle
 from app.services.vehicle_service import VehicleService
+from app.services.matching_service import MatchingService
+from app.services.user_service import UserService
+from app.services.live_location_service import LiveLocationService
+from app.utils.concurrency import run_concurrently
+from app.utils.events import event_bus
+from app.utils.change_feed import feed_connected
+from app.utils.query import select, embed, iter_pages
+from postgrest.types import CountMethod, ReturnMethod
+from app.utils.pagination import keyset_page, top_k_page
+from app.utils.travel_time import travel_time_estimator
+from app.utils.timestamps import to_epoch
+from app.config import get_config
 import logging
 import math
+import time
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+config = get_config()
+
+# Ids per in_() filter, to keep request URLs short
+ID_CHUNK_SIZE = 200
+
 class TripService:
     """Service for handling trip operations."""
     
+    # Route columns normalized at write time, and what the stored route_distance_km and duration_min derive from
+    ROUTE_FIELDS = ('start_latitude', 'start_longitude', 'end_latitude', 'end_longitude')
+    COORDINATE_DECIMALS = 6  # about 0.1 m
+    
+    # Search sort orders, mapped to the field results (and their cursors) are ordered by
+    SEARCH_SORTS = {
+        'distance': 'distance_km',
+        'departure': 'start_time',
+        'price': 'price'
+    }
+    
     @staticmethod
-    def get_trips(filters=None):
-        """Get all trips with optional filters."""
+    def get_trips(filters=None, page_size=None, cursor=None):
+        """
+        Get one page of trips with optional filters, ordered by (start_time, id).
+        Pass the returned next_cursor back as cursor to get the following page.
+        """
         try:
-            logger.info(f"Getting trips with filters: {filters}")
+            logger.info(f"Getting trips with filters: {filters}, cursor: {cursor}")
             
             # Start with a base query
-            query = supabase_admin.table('trips').select('*')
+            query = select(supabase_admin, Trip)
             
             # Apply filters if provided
             if filters:
@@ -32,14 +68,15 @@ class TripService:
                     query = query.lte('start_time', filters['start_time_before'])
             
             # Execute the query
-            response = query.execute()
+            rows, next_cursor = keyset_page(query, 'start_time', page_size or config.PAGE_SIZE_DEFAULT, cursor)
             
-            trips = [Trip.from_dict(trip).to_dict() for trip in response.data]
+            trips = [Trip.row_to_dict(trip) for trip in rows]
             logger.info(f"Found {len(trips)} trips")
             
             return {
                 'success': True,
-                'trips': trips
+                'trips': trips,
+                'next_cursor': next_cursor
             }
             
         except Exception as e:
@@ -53,20 +90,18 @@ class TripService:
             logger.info(f"Getting trip by ID: {trip_id}")
             
             # Use supabase_admin to bypass RLS policies
-            response = supabase_admin.table('trips').select('*').eq('id', trip_id).execute()
+            response = select(supabase_admin, Trip).eq('id', trip_id).execute()
             
             if not response.data:
                 logger.info(f"Trip not found: {trip_id}")
                 return {'success': False, 'message': 'Trip not found'}
             
-            trip = Trip.from_dict(response.data[0])
+            trip_data = Trip.row_to_dict(response.data[0])
             logger.info(f"Found trip: {trip_id}")
             
             # Get vehicle information if vehicle_id exists
-            trip_data = trip.to_dict()
-            
-            if trip.vehicle_id:
-                vehicle = VehicleService.get_vehicle_by_id(trip.vehicle_id)
+            if trip_data['vehicle_id']:
+                vehicle = VehicleService.get_vehicle_by_id(trip_data['vehicle_id'])
                 if vehicle['success']:
                     trip_data['vehicle'] = vehicle['vehicle']
             
@@ -79,6 +114,54 @@ class TripService:
             logger.error(f"Error getting trip: {str(e)}")
             return {'success': False, 'message': str(e)}
     
+    @staticmethod
+    def get_trips_by_ids(trip_ids):
+        """
+        Get several trips by ID, each with its vehicle, in the order the ids were given.
+        Duplicate ids are returned once; ids with no trip, or that are not UUIDs, are listed in missing.
+        """
+        try:
+            trip_ids = list(dict.fromkeys(trip_ids))
+            logger.info(f"Getting {len(trip_ids)} trips by ID")
+            
+            # PostgREST rejects the whole in.(...) filter if any id is not a UUID
+            def is_uuid(trip_id):
+                try:
+                    uuid.UUID(str(trip_id))
+                    return True
+                except ValueError:
+                    return False
+            
+            valid_ids = [trip_id for trip_id in trip_ids if is_uuid(trip_id)]
+            
+            # One query per chunk of ids, with vehicles embedded, run concurrently
+            def fetch_chunk(chunk):
+                return lambda: select(supabase_admin, Trip, 'full', embed(Vehicle)).in_('id', chunk).execute().data
+            
+            chunks = [valid_ids[i:i + ID_CHUNK_SIZE] for i in range(0, len(valid_ids), ID_CHUNK_SIZE)]
+            trips_by_id = {}
+            for rows in run_concurrently(*(fetch_chunk(chunk) for chunk in chunks)):
+                for row in rows:
+                    vehicle = row.pop('vehicles', None)
+                    trip_data = Trip.row_to_dict(row)
+                    if vehicle:
+                        trip_data['vehicle'] = Vehicle.row_to_dict(vehicle)
+                    trips_by_id[trip_data['id']] = trip_data
+            
+            trips = [trips_by_id[trip_id] for trip_id in trip_ids if trip_id in trips_by_id]
+            missing = [trip_id for trip_id in trip_ids if trip_id not in trips_by_id]
+            
+            logger.info(f"Found {len(trips)} of {len(trip_ids)} trips")
+            return {
+                'success': True,
+                'trips': trips,
+                'missing': missing
+            }
+            
+        except Exception as e:
+            logger.error(f"Error getting trips by ID: {str(e)}")
+            return {'success': False, 'message': str(e)}
+    
     @staticmethod
     def create_trip(driver_id, data):
         """Create a new trip."""
@@ -103,16 +186,19 @@ class TripService:
                     logger.warning(f"Missing required field: {field}")
                     return {'success': False, 'message': f'Missing required field: {field}'}
             
+            try:
+                route = TripService.normalize_route(data)
+            except ValueError as e:
+                logger.warning(f"Invalid trip coordinates: {str(e)}")
+                return {'success': False, 'message': str(e)}
+            
             # Create trip
             trip_data = {
                 'driver_id': driver_id,
                 'vehicle_id': data.get('vehicle_id'),
-                'start_latitude': data.get('start_latitude'),
-                'start_longitude': data.get('start_longitude'),
                 'start_address': data.get('start_address'),
-                'end_latitude': data.get('end_latitude'),
-                'end_longitude': data.get('end_longitude'),
                 'end_address': data.get('end_address'),
+                **route,
                 'start_time': data.get('start_time'),
                 'end_time': data.get('end_time'),
                 'status': 'scheduled',
@@ -149,7 +235,7 @@ class TripService:
             logger.info(f"Updating trip: {trip_id} for driver: {driver_id}")
             
             # Check if trip exists and belongs to driver
-            response = supabase_admin.table('trips').select('*').eq('id', trip_id).eq('driver_id', driver_id).execute()
+            response = select(supabase_admin, Trip, 'route').eq('id', trip_id).eq('driver_id', driver_id).execute()
             
             if not response.data:
                 logger.info(f"Trip not found or does not belong to driver: {trip_id}")
@@ -172,6 +258,14 @@ class TripService:
             ]
             update_data = {k: v for k, v in data.items() if k in allowed_fields}
             
+            # A moved start or end changes the stored distance and duration, a new departure time the duration
+            if any(field in update_data for field in TripService.ROUTE_FIELDS + ('start_time',)):
+                try:
+                    update_data.update(TripService.normalize_route({**response.data[0], **update_data}))
+                except ValueError as e:
+                    logger.warning(f"Invalid trip coordinates: {str(e)}")
+                    return {'success': False, 'message': str(e)}
+            
             update_data['updated_at'] = datetime.utcnow().isoformat()
             logger.info(f"Updating trip fields: {', '.join(update_data.keys())}")
             
@@ -201,7 +295,7 @@ class TripService:
             logger.info(f"Cancelling trip: {trip_id} for driver: {driver_id}")
             
             # Check if trip exists and belongs to driver
-            response = supabase_admin.table('trips').select('*').eq('id', trip_id).eq('driver_id', driver_id).execute()
+            response = select(supabase_admin, Trip, 'status').eq('id', trip_id).eq('driver_id', driver_id).execute()
             
             if not response.data:
                 logger.info(f"Trip not found or does not belong to driver: {trip_id}")
@@ -231,11 +325,13 @@ class TripService:
             trip = Trip.from_dict(response.data[0])
             logger.info(f"Trip cancelled successfully: {trip_id}")
             
-            # TODO: Cancel all associated ride requests
+            ride_requests = TripService.cascade_ride_requests([trip_id], 'cancelled', update_data['updated_at'])
+            TripService.invalidate_trip(trip_id)
             
             return {
                 'success': True,
-                'trip': trip.to_dict()
+                'trip': trip.to_dict(),
+                'ride_requests': ride_requests
             }
             
         except Exception as e:
@@ -249,7 +345,7 @@ class TripService:
             logger.info(f"Starting trip: {trip_id} for driver: {driver_id}")
             
             # Check if trip exists and belongs to driver
-            response = supabase_admin.table('trips').select('*').eq('id', trip_id).eq('driver_id', driver_id).execute()
+            response = select(supabase_admin, Trip, 'status').eq('id', trip_id).eq('driver_id', driver_id).execute()
             
             if not response.data:
                 logger.info(f"Trip not found or does not belong to driver: {trip_id}")
@@ -279,9 +375,19 @@ class TripService:
             trip = Trip.from_dict(response.data[0])
             logger.info(f"Trip started successfully: {trip_id}")
             
+            ride_requests = TripService.cascade_ride_requests([trip_id], 'in_progress', update_data['updated_at'])
+            TripService.invalidate_trip(trip_id)
+            
+            # The driver's location pings are accepted from now on
+            try:
+                LiveLocationService.start_tracking(trip_id, driver_id)
+            except Exception as e:
+                logger.error(f"Error starting live tracking of trip {trip_id}, it starts on the first ping: {str(e)}")
+            
             return {
                 'success': True,
-                'trip': trip.to_dict()
+                'trip': trip.to_dict(),
+                'ride_requests': ride_requests
             }
             
         except Exception as e:
@@ -295,7 +401,7 @@ class TripService:
             logger.info(f"Completing trip: {trip_id} for driver: {driver_id}")
             
             # Check if trip exists and belongs to driver
-            response = supabase_admin.table('trips').select('*').eq('id', trip_id).eq('driver_id', driver_id).execute()
+            response = select(supabase_admin, Trip, 'status').eq('id', trip_id).eq('driver_id', driver_id).execute()
             
             if not response.data:
                 logger.info(f"Trip not found or does not belong to driver: {trip_id}")
@@ -325,11 +431,13 @@ class TripService:
             trip = Trip.from_dict(response.data[0])
             logger.info(f"Trip completed successfully: {trip_id}")
             
-            # TODO: Update all associated ride requests to completed
+            ride_requests = TripService.cascade_ride_requests([trip_id], 'completed', update_data['updated_at'])
+            TripService.invalidate_trip(trip_id)
             
             return {
                 'success': True,
-                'trip': trip.to_dict()
+                'trip': trip.to_dict(),
+                'ride_requests': ride_requests
             }
             
         except Exception as e:
@@ -337,13 +445,83 @@ class TripService:
             return {'success': False, 'message': str(e)}
     
     @staticmethod
-    def search_trips(filters):
-        """Search for trips based on filters."""
+    def cascade_ride_requests(trip_ids, trip_status, updated_at):
+        """
+        Move the dependent ride requests of trips along with their new status in one bulk update.
+        Returns the number of ride requests changed, keyed by their new status.
+        """
+        from_statuses, to_status = RideRequest.TRIP_CASCADES[trip_status]
+        
+        # Use supabase_admin to bypass RLS policies; only the row count comes back
+        response = supabase_admin.table('ride_requests')\
+            .update({'status': to_status, 'updated_at': updated_at}, count=CountMethod.exact, returning=ReturnMethod.minimal)\
+            .in_('trip_id', trip_ids)\
+            .in_('status', list(from_statuses))\
+            .execute()
+        
+        affected = response.count or 0
+        trips = f"trip {trip_ids[0]}" if len(trip_ids) == 1 else f"{len(trip_ids)} trips"
+        logger.info(f"Moved {affected} ride requests of {trips} from {', '.join(from_statuses)} to {to_status}")
+        
+        # Passengers following their requests learn about the trip change from one event;
+        # while the change feed is connected, every worker learns about it from the feed instead
+        if not feed_connected('trips'):
+            for trip_id in trip_ids:
+                try:
+                    event_bus.publish(*TripService.build_status_event(trip_id, trip_status, updated_at))
+                except Exception as e:
+                    logger.error(f"Error publishing trip status event: {str(e)}")
+        
+        return {to_status: affected}
+    
+    @staticmethod
+    def build_status_event(trip_id, trip_status, updated_at):
+        """Return the (topics, event) pair announcing a trip status change that cascades to ride requests."""
+        return (f"trip_status:{trip_id}",), {
+            'type': 'trip.status',
+            'trip_id': trip_id,
+            'status': trip_status,
+            'ride_request_status': RideRequest.TRIP_CASCADES[trip_status][1],
+            'updated_at': updated_at
+        }
+    
+    @staticmethod
+    def invalidate_trip(trip_id):
+        """Drop per-worker cached state for a trip after it changes status."""
+        MatchingService.discard_trip(trip_id)
+        LiveLocationService.end_tracking(trip_id)
+    
+    @staticmethod
+    def apply_trip_changes(changes):
+        """
+        Apply trip changes from the change feed: keep the corridor index current, stop live tracking of
+        trips no longer in progress, and tell this worker's passenger streams about status changes that
+        cascade to ride requests.
+        """
+        MatchingService.apply_trip_changes(changes)
+        for change in changes:
+            trip = change.record
+            status = trip.get('status')
+            if status != 'in_progress':
+                LiveLocationService.end_tracking(trip.get('id') or change.old_record.get('id'))
+            if change.type != 'UPDATE' or status not in RideRequest.TRIP_CASCADES:
+                continue
+            # The previous status is only known with REPLICA IDENTITY FULL; otherwise announce every such update
+            if change.old_record.get('status') == status:
+                continue
+            event_bus.dispatch(*TripService.build_status_event(trip['id'], status, trip.get('updated_at')))
+    
+    @staticmethod
+    def search_trips(filters, page_size=None, cursor=None, sort=None):
+        """
+        Search for trips based on filters, ordered by sort (one of SEARCH_SORTS).
+        With a page_size, only the top page_size trips are selected and a next_cursor is returned.
+        """
         try:
-            logger.info(f"Searching trips with filters: {filters}")
+            logger.info(f"Searching trips with filters: {filters}, sort: {sort}, cursor: {cursor}")
             
             # Start with a base query
-            query = supabase_admin.table('trips').select('*')
+            query = select(supabase_admin, Trip)
             
             # Apply filters
             if 'status' in filters:
@@ -364,42 +542,156 @@ class TripService:
             if 'max_price' in filters:
                 query = query.lte('price', filters['max_price'])
             
-            # Execute the query
-            response = query.execute()
-            
-            trips = [Trip.from_dict(trip).to_dict() for trip in response.data]
+            near = 'near_latitude' in filters and 'near_longitude' in filters and 'radius_km' in filters
+            sort_column = TripService.SEARCH_SORTS[sort or ('distance' if near else 'departure')]
+            next_cursor = None
             
-            # Apply coordinate-based filtering if provided
-            if 'near_latitude' in filters and 'near_longitude' in filters and 'radius_km' in filters:
+            if near:
                 lat = float(filters['near_latitude'])
                 lng = float(filters['near_longitude'])
                 radius = float(filters['radius_km'])
                 
-                # Filter trips by distance
-                filtered_trips = []
-                for trip in trips:
-                    # Calculate distance to start location
-                    distance = TripService.calculate_distance(
-                        lat, lng, 
-                        float(trip['start_latitude']), float(trip['start_longitude'])
-                    )
-                    if distance <= radius:
-                        trip['distance_km'] = round(distance, 2)
-                        filtered_trips.append(trip)
+                # Let the database discard trips outside the radius's bounding box
+                query = TripService.within_bounding_box(query, lat, lng, radius)
+            
+            if page_size and not near:
+                # Without a radius the database can page on the sort column directly
+                rows, next_cursor = keyset_page(query, sort_column, page_size, cursor)
+                trips = [Trip.row_to_dict(trip) for trip in rows]
+            else:
+                trips = (Trip.row_to_dict(trip) for trip in query.execute().data)
+                
+                # Apply coordinate-based filtering if provided
+                if near:
+                    trips = TripService.within_radius(trips, lat, lng, radius)
                 
-                trips = filtered_trips
+                sort_key = TripService.search_sort_key(sort_column)
+                if page_size:
+                    trips, next_cursor = top_k_page(trips, sort_column, page_size, cursor, sort_key)
+                else:
+                    trips = sorted(trips, key=lambda trip: (sort_key(trip), trip['id']))
             
             logger.info(f"Found {len(trips)} trips matching search criteria")
             
-            return {
+            result = {
                 'success': True,
                 'trips': trips
             }
+            if page_size:
+                result['next_cursor'] = next_cursor
+            
+            return result
             
         except Exception as e:
             logger.error(f"Error searching trips: {str(e)}")
             return {'success': False, 'message': str(e)}
     
+    @staticmethod
+    def search_sort_key(sort_column):
+        """Return the sort key function for a SEARCH_SORTS column."""
+        if sort_column == 'price':
+            return lambda trip: float(trip['price'])
+        return lambda trip: trip[sort_column]
+    
+    @staticmethod
+    def within_bounding_box(query, lat, lng, radius_km):
+        """Restrict a trips query to start points inside the bounding box of a search radius."""
+        lat_delta = radius_km / 111.32
+        query = query.gte('start_latitude', lat - lat_delta).lte('start_latitude', lat + lat_delta)
+        
+        # Longitude degrees shrink towards the poles; skip the longitude bound where it stops being useful
+        cos_lat = math.cos(math.radians(lat))
+        if cos_lat > 0.01:
+            lng_delta = radius_km / (111.32 * cos_lat)
+            if lng_delta < 180 and -180 <= lng - lng_delta and lng + lng_delta <= 180:
+                query = query.gte('start_longitude', lng - lng_delta).lte('start_longitude', lng + lng_delta)
+        
+        return query
+    
+    @staticmethod
+    def within_radius(trips, lat, lng, radius_km):
+        """Yield the trips whose start point is within radius_km, tagged with their distance_km."""
+        for trip in trips:
+            # Calculate distance to start location
+            distance = TripService.calculate_distance(lat, lng, trip['start_latitude'], trip['start_longitude'])
+            if distance <= radius_km:
+                trip['distance_km'] = round(distance, 2)
+                yield trip
+    
+    @staticmethod
+    def normalize_route(data):
+        """
+        Return the start and end coordinates in data as rounded floats, with the route_distance_km and
+        duration_min, ready to store on a trip. duration_min comes from the configured travel time estimator,
+        for data's start_time when given. Raises ValueError if a coordinate is not a number in range.
+        """
+        route = {}
+        for field in TripService.ROUTE_FIELDS:
+            try:
+                value = round(float(data[field]), TripService.COORDINATE_DECIMALS)
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f'Invalid {field}')
+            if abs(value) > (90 if field.endswith('latitude') else 180):
+                raise ValueError(f'{field} out of range')
+            route[field] = value
+        
+        distance = TripService.calculate_distance(
+            route['start_latitude'], route['start_longitude'],
+            route['end_latitude'], route['end_longitude']
+        )
+        route['route_distance_km'] = round(distance, 1)
+        route['duration_min'] = travel_time_estimator.estimate_minutes(
+            route['start_latitude'], route['start_longitude'],
+            route['end_latitude'], route['end_longitude'],
+            distance, data.get('start_time')
+        )
+        return route
+    
+    @staticmethod
+    def route_metrics(trip):
+        """Return a trip's stored (route_distance_km, duration_min); rows not backfilled yet are computed from their coordinates."""
+        if trip.route_distance_km is not None:
+            return trip.route_distance_km, trip.duration_min
+        route = TripService.normalize_route(trip.to_dict())
+        return route['route_distance_km'], route['duration_min']
+    
+    @staticmethod
+    def backfill_route_metrics(batch_size=None):
+        """
+        Store normalized coordinates, route_distance_km and duration_min on trips written before they were computed
+        at write time. Pages through those trips by id and updates a page's rows concurrently.
+        Safe to rerun; returns the number of trips updated and of trips whose coordinates are invalid.
+        """
+        batch_size = batch_size or config.EXPORT_CHUNK_SIZE
+        started = time.perf_counter()
+        updated = invalid = 0
+        last_id = None
+        
+        def backfill(row):
+            try:
+                route = TripService.normalize_route(row)
+            except ValueError as e:
+                logger.warning(f"Cannot backfill trip {row['id']}: {str(e)}")
+                return False
+            supabase_admin.table('trips').update(route, returning=ReturnMethod.minimal).eq('id', row['id']).execute()
+            return True
+        
+        while True:
+            query = select(supabase_admin, Trip, 'route').is_('route_distance_km', 'null').order('id').limit(batch_size)
+            if last_id is not None:
+                query = query.gt('id', last_id)
+            rows = query.execute().data
+            if not rows:
+                break
+            last_id = rows[-1]['id']
+            
+            results = run_concurrently(*((lambda row=row: backfill(row)) for row in rows))
+            updated += sum(results)
+            invalid += len(results) - sum(results)
+        
+        logger.info(f"Backfilled route metrics of {updated} trips ({invalid} invalid) in {time.perf_counter() - started:.1f}s")
+        return {'updated': updated, 'invalid': invalid}
+    
     @staticmethod
     def calculate_distance(lat1, lon1, lat2, lon2):
         """Calculate distance between two points in kilometers using the Haversine formula."""
@@ -429,65 +721,85 @@ class TripService:
         try:
             logger.info(f"Getting trip statistics for user: {user_id}")
             
-            # Get trips as driver
-            driver_trips_response = supabase_admin.table('trips').select('*').eq('driver_id', user_id).execute()
-            driver_trips = [Trip.from_dict(trip) for trip in driver_trips_response.data]
-            
-            # Count trips by status
-            trips_as_driver = {
-                'total': len(driver_trips),
-                'scheduled': sum(1 for trip in driver_trips if trip.status == 'scheduled'),
-                'in_progress': sum(1 for trip in driver_trips if trip.status == 'in_progress'),
-                'completed': sum(1 for trip in driver_trips if trip.status == 'completed'),
-                'cancelled': sum(1 for trip in driver_trips if trip.status == 'cancelled')
-            }
+            # Get trips as driver and ride requests as passenger concurrently
+            driver_trips_response, passenger_requests_response = run_concurrently(
+                lambda: select(supabase_admin, Trip, 'stats').eq('driver_id', user_id).execute(),
+                lambda: select(supabase_admin, RideRequest, 'status').eq('passenger_id', user_id).execute()
+            )
             
-            # Calculate total distance and earnings (for completed trips)
-            total_distance_km = 0
-            total_earnings = 0
-            
-            for trip in driver_trips:
-                if trip.status == 'completed':
-                    # Calculate distance using start and end coordinates
-                    distance = TripService.calculate_distance(
-                        float(trip.start_latitude), float(trip.start_longitude),
-                        float(trip.end_latitude), float(trip.end_longitude)
-                    )
-                    total_distance_km += distance
-                    
-                    # Calculate earnings based on price and accepted ride requests
-                    ride_requests_response = supabase_admin.table('ride_requests').select('*').eq('trip_id', trip.id).eq('status', 'accepted').execute()
-                    passengers_count = sum(int(req['seats_requested']) for req in ride_requests_response.data)
-                    total_earnings += float(trip.price) * passengers_count
-            
-            # Get ride requests as passenger
-            passenger_requests_response = supabase_admin.table('ride_requests').select('*').eq('passenger_id', user_id).execute()
-            passenger_requests = passenger_requests_response.data
-            
-            # Count ride requests by status
-            rides_as_passenger = {
-                'total': len(passenger_requests),
-                'pending': sum(1 for req in passenger_requests if req['status'] == 'pending'),
-                'accepted': sum(1 for req in passenger_requests if req['status'] == 'accepted'),
-                'completed': sum(1 for req in passenger_requests if req['status'] == 'completed'),
-                'rejected': sum(1 for req in passenger_requests if req['status'] == 'rejected'),
-                'cancelled': sum(1 for req in passenger_requests if req['status'] == 'cancelled')
-            }
+            # Passenger seats of all completed trips at once
+            completed_ids = [trip['id'] for trip in driver_trips_response.data if trip['status'] == 'completed']
+            seats_by_trip = TripService.get_seats_by_trip(completed_ids)
             
             return {
                 'success': True,
-                'stats': {
-                    'trips_as_driver': trips_as_driver,
-                    'rides_as_passenger': rides_as_passenger,
-                    'total_distance_km': round(total_distance_km, 2),
-                    'total_earnings': round(total_earnings, 2)
-                }
+                'stats': TripService.build_trip_stats(driver_trips_response.data, passenger_requests_response.data, seats_by_trip)
             }
             
         except Exception as e:
             logger.error(f"Error getting trip statistics: {str(e)}")
             return {'success': False, 'message': str(e)}
     
+    @staticmethod
+    def get_seats_by_trip(trip_ids):
+        """Return the seats taken on each of the given trips, a chunk of ids per query."""
+        seats_by_trip = {}
+        for i in range(0, len(trip_ids), ID_CHUNK_SIZE):
+            response = select(supabase_admin, RideRequest, 'trip_seats')\
+                .in_('trip_id', trip_ids[i:i + ID_CHUNK_SIZE])\
+                .in_('status', RideRequest.SEAT_HOLDING_STATUSES)\
+                .execute()
+            for req in response.data:
+                seats_by_trip[req['trip_id']] = seats_by_trip.get(req['trip_id'], 0) + int(req['seats_requested'])
+        return seats_by_trip
+    
+    @staticmethod
+    def build_trip_stats(driver_trips, passenger_requests, seats_by_trip):
+        """
+        Build the trip statistics payload from already fetched rows: the user's trips as driver,
+        their ride requests as passenger, and the seats taken on each completed trip.
+        """
+        driver_trips = [Trip.from_dict(trip) for trip in driver_trips]
+        
+        # Count trips by status
+        trips_as_driver = {
+            'total': len(driver_trips),
+            'scheduled': sum(1 for trip in driver_trips if trip.status == 'scheduled'),
+            'in_progress': sum(1 for trip in driver_trips if trip.status == 'in_progress'),
+            'completed': sum(1 for trip in driver_trips if trip.status == 'completed'),
+            'cancelled': sum(1 for trip in driver_trips if trip.status == 'cancelled'),
+            'expired': sum(1 for trip in driver_trips if trip.status == 'expired')
+        }
+        
+        # Calculate total distance and earnings (for completed trips)
+        total_distance_km = 0
+        total_earnings = 0
+        
+        for trip in driver_trips:
+            if trip.status == 'completed':
+                total_distance_km += TripService.route_metrics(trip)[0]
+                
+                # Calculate earnings based on price and seats taken
+                total_earnings += float(trip.price) * seats_by_trip.get(trip.id, 0)
+        
+        # Count ride requests by status
+        rides_as_passenger = {
+            'total': len(passenger_requests),
+            'pending': sum(1 for req in passenger_requests if req['status'] == 'pending'),
+            'accepted': sum(1 for req in passenger_requests if req['status'] == 'accepted'),
+            'completed': sum(1 for req in passenger_requests if req['status'] == 'completed'),
+            'rejected': sum(1 for req in passenger_requests if req['status'] == 'rejected'),
+            'cancelled': sum(1 for req in passenger_requests if req['status'] == 'cancelled'),
+            'expired': sum(1 for req in passenger_requests if req['status'] == 'expired')
+        }
+        
+        return {
+            'trips_as_driver': trips_as_driver,
+            'rides_as_passenger': rides_as_passenger,
+            'total_distance_km': round(total_distance_km, 2),
+            'total_earnings': round(total_earnings, 2)
+        }
+    
     @staticmethod
     def get_trip_history(user_id, filters=None):
         """Get trip history for a user."""
@@ -502,7 +814,7 @@ class TripService:
             
             # Get trips as driver
             if role in ['driver', 'both']:
-                driver_query = supabase_admin.table('trips').select('*').eq('driver_id', user_id)
+                driver_query = select(supabase_admin, Trip, 'history').eq('driver_id', user_id)
                 
                 # Apply filters
                 if filters:
@@ -519,31 +831,14 @@ class TripService:
                     trip = Trip.from_dict(trip_data)
                     
                     # Get passenger count
-                    passengers_response = supabase_admin.table('ride_requests').select('*').eq('trip_id', trip.id).eq('status', 'accepted').execute()
+                    passengers_response = select(supabase_admin, RideRequest, 'seats').eq('trip_id', trip.id).in_('status', RideRequest.SEAT_HOLDING_STATUSES).execute()
                     passenger_count = sum(int(req['seats_requested']) for req in passengers_response.data)
                     
-                    # Format trip for history
-                    trip_history = {
-                        'id': trip.id,
-                        'role': 'driver',
-                        'start_address': trip.start_address,
-                        'end_address': trip.end_address,
-                        'start_time': trip.start_time,
-                        'status': trip.status,
-                        'passengers': passenger_count,
-                        'price': float(trip.price),
-                        'created_at': trip.created_at
-                    }
-                    
-                    # Add completed_at if available
-                    if trip.status == 'completed' and trip.updated_at:
-                        trip_history['completed_at'] = trip.updated_at
-                    
-                    trips.append(trip_history)
+                    trips.append(TripService.format_driver_history(trip, passenger_count))
             
             # Get trips as passenger
             if role in ['passenger', 'both']:
-                passenger_query = supabase_admin.table('ride_requests').select('*, trips(*)').eq('passenger_id', user_id)
+                passenger_query = select(supabase_admin, RideRequest, 'history', embed(Trip, 'history_passenger')).eq('passenger_id', user_id)
                 
                 # Apply filters
                 if filters:
@@ -565,25 +860,7 @@ class TripService:
                         if 'to_date' in filters and trip_data['start_time'] > filters['to_date']:
                             continue
                     
-                    # Format trip for history
-                    trip_history = {
-                        'id': trip_data['id'],
-                        'ride_request_id': req_data['id'],
-                        'role': 'passenger',
-                        'start_address': req_data['pickup_address'],
-                        'end_address': req_data['dropoff_address'],
-                        'start_time': trip_data['start_time'],
-                        'status': req_data['status'],
-                        'seats': req_data['seats_requested'],
-                        'price': float(trip_data['price']),
-                        'created_at': req_data['created_at']
-                    }
-                    
-                    # Add completed_at if available
-                    if req_data['status'] == 'completed' and req_data['updated_at']:
-                        trip_history['completed_at'] = req_data['updated_at']
-                    
-                    trips.append(trip_history)
+                    trips.append(TripService.format_passenger_history(req_data))
             
             # Sort trips by start_time (descending)
             trips.sort(key=lambda x: x['start_time'], reverse=True)
@@ -617,6 +894,123 @@ class TripService:
             logger.error(f"Error getting trip history: {str(e)}")
             return {'success': False, 'message': str(e)}
     
+    @staticmethod
+    def format_driver_history(trip, passenger_count):
+        """Format a trip driven by the user as a history entry."""
+        trip_history = {
+            'id': trip.id,
+            'role': 'driver',
+            'start_address': trip.start_address,
+            'end_address': trip.end_address,
+            'start_time': trip.start_time,
+            'status': trip.status,
+            'passengers': passenger_count,
+            'price': float(trip.price),
+            'created_at': trip.created_at
+        }
+        
+        # Add completed_at if available
+        if trip.status == 'completed' and trip.updated_at:
+            trip_history['completed_at'] = trip.updated_at
+        
+        return trip_history
+    
+    @staticmethod
+    def format_passenger_history(req_data):
+        """Format a ride request (with its embedded trip) as a history entry."""
+        trip_data = req_data['trips']
+        trip_history = {
+            'id': trip_data['id'],
+            'ride_request_id': req_data['id'],
+            'role': 'passenger',
+            'start_address': req_data['pickup_address'],
+            'end_address': req_data['dropoff_address'],
+            'start_time': trip_data['start_time'],
+            'status': req_data['status'],
+            'seats': req_data['seats_requested'],
+            'price': float(trip_data['price']),
+            'created_at': req_data['created_at']
+        }
+        
+        # Add completed_at if available
+        if req_data['status'] == 'completed' and req_data['updated_at']:
+            trip_history['completed_at'] = req_data['updated_at']
+        
+        return trip_history
+    
+    @staticmethod
+    def iter_trip_history(user_id, filters=None, chunk_size=None):
+        """
+        Yield a user's complete trip history in chunks for export: driver trips (newest first), then passenger rides.
+        Each chunk is one page from Supabase, so memory use does not grow with the size of the history.
+        Driver entries include earnings (price times accepted seats) for completed trips.
+        """
+        filters = filters or {}
+        chunk_size = chunk_size or config.EXPORT_CHUNK_SIZE
+        role = filters.get('role', 'both')
+        
+        logger.info(f"Exporting trip history for user: {user_id} with filters: {filters}")
+        exported = 0
+        
+        try:
+            if role in ['driver', 'both']:
+                def fetch_driver_page(start, end):
+                    query = select(supabase_admin, Trip, 'history').eq('driver_id', user_id)
+                    if 'status' in filters:
+                        query = query.eq('status', filters['status'])
+                    if 'from_date' in filters:
+                        query = query.gte('start_time', filters['from_date'])
+                    if 'to_date' in filters:
+                        query = query.lte('start_time', filters['to_date'])
+                    return query.order('start_time', desc=True).order('id').range(start, end).execute().data
+                
+                for page in iter_pages(fetch_driver_page, chunk_size):
+                    # Passenger seats for the whole page, ID_CHUNK_SIZE trips per query
+                    seats_by_trip = TripService.get_seats_by_trip([trip_data['id'] for trip_data in page])
+                    
+                    chunk = []
+                    for trip_data in page:
+                        trip = Trip.from_dict(trip_data)
+                        trip_history = TripService.format_driver_history(trip, seats_by_trip.get(trip.id, 0))
+                        trip_history['earnings'] = trip_history['price'] * trip_history['passengers'] if trip.status == 'completed' else 0.0
+                        chunk.append(trip_history)
+                    
+                    exported += len(chunk)
+                    yield chunk
+            
+            if role in ['passenger', 'both']:
+                def fetch_passenger_page(start, end):
+                    query = select(supabase_admin, RideRequest, 'history', embed(Trip, 'history_passenger')).eq('passenger_id', user_id)
+                    if 'status' in filters:
+                        query = query.eq('status', filters['status'])
+                    return query.order('created_at', desc=True).order('id').range(start, end).execute().data
+                
+                for page in iter_pages(fetch_passenger_page, chunk_size):
+                    chunk = []
+                    for req_data in page:
+                        trip_data = req_data['trips']
+                        if not trip_data:
+                            continue
+                        
+                        # Skip if trip doesn't match date filters
+                        if 'from_date' in filters and trip_data['start_time'] < filters['from_date']:
+                            continue
+                        if 'to_date' in filters and trip_data['start_time'] > filters['to_date']:
+                            continue
+                        
+                        chunk.append(TripService.format_passenger_history(req_data))
+                    
+                    if chunk:
+                        exported += len(chunk)
+                        yield chunk
+            
+            logger.info(f"Exported {exported} history entries for user: {user_id}")
+            
+        except Exception as e:
+            # Headers are already sent, so abort the stream rather than end it looking complete
+            logger.error(f"Error exporting trip history after {exported} entries: {str(e)}")
+            raise
+    
     @staticmethod
     def get_trip_participants(trip_id, user_id=None):
         """Get participants (driver and passengers) for a trip."""
@@ -637,14 +1031,17 @@ class TripService:
                 
                 if not is_driver:
                     # Check if user is a passenger or has a pending request
-                    ride_request_response = supabase_admin.table('ride_requests').select('*').eq('trip_id', trip_id).eq('passenger_id', user_id).execute()
+                    ride_request_response = select(supabase_admin, RideRequest, 'id').eq('trip_id', trip_id).eq('passenger_id', user_id).execute()
                     
                     if not ride_request_response.data:
                         logger.warning(f"User {user_id} is not authorized to view participants for trip {trip_id}")
                         return {'success': False, 'message': 'Not authorized to view trip participants'}
             
-            # Get driver information
-            driver_response = supabase_admin.table('users').select('id, name, profile_image_url, phone').eq('id', trip['driver_id']).execute()
+            # Get driver information and passengers (accepted ride requests) concurrently
+            driver_response, passengers_response = run_concurrently(
+                lambda: select(supabase_admin, User, 'contact').eq('id', trip['driver_id']).execute(),
+                lambda: select(supabase_admin, RideRequest, 'participant', embed(User, 'summary', via='passenger_id')).eq('trip_id', trip_id).in_('status', RideRequest.SEAT_HOLDING_STATUSES).execute()
+            )
             
             if not driver_response.data:
                 logger.warning(f"Driver not found for trip: {trip_id}")
@@ -652,9 +1049,6 @@ class TripService:
             
             driver = driver_response.data[0]
             
-            # Get passengers (accepted ride requests)
-            passengers_response = supabase_admin.table('ride_requests').select('*, users:passenger_id(id, name, profile_image_url)').eq('trip_id', trip_id).in_('status', ['accepted', 'completed']).execute()
-            
             passengers = []
             for req in passengers_response.data:
                 if not req['users']:
@@ -692,34 +1086,45 @@ class TripService:
             logger.info(f"Fetching upcoming trips for user: {user_id}, role: {role}")
             now = datetime.now().isoformat()
             
-            upcoming_trips = []
-            
-            # Fetch trips as driver
-            if role in ['driver', 'both']:
-                driver_query = supabase_admin.table('trips').select('*')\
-                    .eq('driver_id', user_id)\
-                    .eq('status', 'scheduled')\
-                    .gt('start_time', now)\
-                    .execute()
+            def fetch_driver_trips():
+                # While the change feed keeps the upcoming trip index current, the driver's trips come from it
+                index = MatchingService.get_live_index()
+                if index is not None:
+                    driver_trips = index.driver_trips(user_id)
+                else:
+                    driver_trips = select(supabase_admin, Trip, 'card')\
+                        .eq('driver_id', user_id)\
+                        .eq('status', 'scheduled')\
+                        .gt('start_time', now)\
+                        .execute().data
                 
-                for trip_data in driver_query.data:
-                    trip = Trip.from_dict(trip_data)
-                    enriched_trip = TripService.enrich_trip_data(trip, user_id, is_driver=True)
-                    upcoming_trips.append(enriched_trip)
+                return [TripService.enrich_trip_data(Trip.from_dict(trip_data), user_id, is_driver=True)
+                        for trip_data in driver_trips]
             
-            # Fetch trips as passenger
-            if role in ['passenger', 'both']:
-                passenger_query = supabase_admin.table('ride_requests').select('*, trips(*)')\
+            def fetch_passenger_trips():
+                passenger_query = select(supabase_admin, RideRequest, 'id', embed(Trip, 'card'))\
                     .eq('passenger_id', user_id)\
                     .in_('status', ['accepted', 'pending'])\
                     .execute()
                 
+                enriched_trips = []
                 for req_data in passenger_query.data:
                     if not req_data['trips'] or req_data['trips']['status'] != 'scheduled' or req_data['trips']['start_time'] <= now:
                         continue
                     trip = Trip.from_dict(req_data['trips'])
-                    enriched_trip = TripService.enrich_trip_data(trip, user_id, is_driver=False)
-                    upcoming_trips.append(enriched_trip)
+                    enriched_trips.append(TripService.enrich_trip_data(trip, user_id, is_driver=False))
+                return enriched_trips
+            
+            # Fetch trips as driver and as passenger concurrently
+            fetchers = []
+            if role in ['driver', 'both']:
+                fetchers.append(fetch_driver_trips)
+            if role in ['passenger', 'both']:
+                fetchers.append(fetch_passenger_trips)
+            
+            upcoming_trips = []
+            for trips in run_concurrently(*fetchers):
+                upcoming_trips.extend(trips)
             
             # Sort by start_time
             upcoming_trips.sort(key=lambda x: x['start_time'])
@@ -738,21 +1143,19 @@ class TripService:
     def enrich_trip_data(trip, user_id, is_driver):
         """Enrich trip data with participants and metrics."""
         # Get driver info
-        driver_response = supabase_admin.table('users').select('id, name, profile_image_url')\
-            .eq('id', trip.driver_id).execute()
-        driver = driver_response.data[0] if driver_response.data else {'id': trip.driver_id, 'name': 'Unknown', 'profile_image_url': None}
+        driver = UserService.get_user_summary(trip.driver_id)
         
         # Get passengers (accepted only)
-        passengers_response = supabase_admin.table('ride_requests').select('seats_requested')\
-            .eq('trip_id', trip.id).eq('status', 'accepted').execute()
+        passengers_response = select(supabase_admin, RideRequest, 'seats')\
+            .eq('trip_id', trip.id).in_('status', RideRequest.SEAT_HOLDING_STATUSES).execute()
         passengers_count = sum(int(req['seats_requested']) for req in passengers_response.data)
         
-        # Calculate distance and duration
-        distance = TripService.calculate_distance(
-            float(trip.start_latitude), float(trip.start_longitude),
-            float(trip.end_latitude), float(trip.end_longitude)
-        )
-        duration = int(distance / 40.0 * 60)  # Assuming 40 km/h average speed
+        return TripService.build_enriched_trip(trip, driver, passengers_count, is_driver)
+    
+    @staticmethod
+    def build_enriched_trip(trip, driver, passengers_count, is_driver):
+        """Build the enriched trip payload from already fetched driver and passenger data."""
+        distance, duration = TripService.route_metrics(trip)
         
         return {
             'id': trip.id,
@@ -765,78 +1168,154 @@ class TripService:
             'vehicle_id': trip.vehicle_id,
             'creator_name': driver['name'],
             'creator_image_url': driver['profile_image_url'],
-            'distance': round(distance, 1),
+            'distance': distance,
             'duration': duration,
             'is_creator': is_driver
         }
     
     @staticmethod
-    def search_enriched_trips(user_id, filters):
-        """Search for scheduled trips with enriched data."""
+    def search_enriched_trips(user_id, filters, page_size=None, cursor=None, sort=None):
+        """
+        Search for scheduled trips with enriched data, ordered by sort (one of SEARCH_SORTS).
+        With a page_size, only the top page_size trips are selected and enriched, and a next_cursor is returned.
+        """
         try:
-            logger.info(f"Searching enriched trips with filters: {filters}")
-            
-            query = supabase_admin.table('trips').select('*, users:driver_id(id, name, profile_image_url, institute)')\
-                .eq('status', filters['status'])\
-                .gt('start_time', filters['start_time_after'])
-            
-            if filters.get('min_available_seats'):
-                query = query.gte('available_seats', int(filters['min_available_seats']))
-            if filters.get('max_price'):
-                query = query.lte('price', float(filters['max_price']))
-            
-            response = query.execute()
-            trips = response.data
-            
-            # Filter by location if provided
-            if filters.get('near_latitude') and filters.get('near_longitude'):
-                lat = float(filters['near_latitude'])
-                lng = float(filters['near_longitude'])
-                radius = float(filters['radius_km'])
+            logger.info(f"Searching enriched trips with filters: {filters}, sort: {sort}, cursor: {cursor}")
+            
+            near = bool(filters.get('near_latitude') and filters.get('near_longitude'))
+            sort_column = TripService.SEARCH_SORTS[sort or ('distance' if near else 'departure')]
+            next_cursor = None
+            paged = False
+            
+            # While the change feed keeps the upcoming trip index current, scheduled trips come from it instead of a table scan
+            index = MatchingService.get_live_index() if filters['status'] == 'scheduled' else None
+            trips = TripService.search_indexed_trips(index, user_id, filters) if index is not None else None
+            
+            if trips is None:
+                query = select(supabase_admin, Trip, 'search', embed(User, 'driver', via='driver_id'))\
+                    .eq('status', filters['status'])\
+                    .gt('start_time', filters['start_time_after'])\
+                    .neq('driver_id', user_id)  # Exclude user's own trips
                 
-                filtered_trips = []
-                for trip_data in trips:
-                    trip = Trip.from_dict(trip_data)
-                    distance = TripService.calculate_distance(
-                        lat, lng, float(trip.start_latitude), float(trip.start_longitude)
-                    )
-                    if distance <= radius and trip.driver_id != user_id:  # Exclude user's own trips
-                        enriched_trip = {
-                            'id': trip.id,
-                            'driver': {
-                                'id': trip_data['users']['id'],
-                                'name': trip_data['users']['name'],
-                                'profile_image_url': trip_data['users']['profile_image_url'],
-                                'institute': trip_data['users']['institute']
-                            },
-                            'departure_time': trip.start_time,
-                            'price': str(trip.price),  # String to match RidePreview
-                            'available_seats': trip.available_seats,
-                            'distance': f"{round(distance, 1)} km"  # String to match RidePreview
-                        }
-                        filtered_trips.append(enriched_trip)
-                trips = filtered_trips
+                if filters.get('min_available_seats'):
+                    query = query.gte('available_seats', int(filters['min_available_seats']))
+                if filters.get('max_price'):
+                    query = query.lte('price', float(filters['max_price']))
+                
+                # Filter by location if provided
+                if near:
+                    lat = float(filters['near_latitude'])
+                    lng = float(filters['near_longitude'])
+                    radius = float(filters['radius_km'])
+                    
+                    query = TripService.within_bounding_box(query, lat, lng, radius)
+                    trips = TripService.within_radius(query.execute().data, lat, lng, radius)
+                elif page_size:
+                    # Without a radius the database can page on the sort column directly
+                    trips, next_cursor = keyset_page(query, sort_column, page_size, cursor)
+                    paged = True
+                else:
+                    trips = query.execute().data
+            
+            # Pick the trips to return before formatting, so only those are enriched
+            if not paged:
+                sort_key = TripService.search_sort_key(sort_column)
+                if page_size:
+                    trips, next_cursor = top_k_page(trips, sort_column, page_size, cursor, sort_key)
+                else:
+                    trips = sorted(trips, key=lambda trip_data: (sort_key(trip_data), trip_data['id']))
+            
+            if index is not None:
+                trips = TripService.attach_drivers(trips)
+            
+            if near:
+                trips = [TripService.enrich_nearby_search_trip(trip_data) for trip_data in trips]
             else:
-                trips = [TripService.enrich_search_trip(Trip.from_dict(trip_data), trip_data['users']) 
-                        for trip_data in trips if trip_data['driver_id'] != user_id]
+                trips = [TripService.enrich_search_trip(Trip.from_dict(trip_data), trip_data['users']) for trip_data in trips]
             
             logger.info(f"Found {len(trips)} enriched trips")
-            return {
+            result = {
                 'success': True,
                 'trips': trips
             }
+            if page_size:
+                result['next_cursor'] = next_cursor
+            
+            return result
         
         except Exception as e:
             logger.error(f"Error searching enriched trips: {str(e)}")
             return {'success': False, 'message': str(e)}
+    
+    @staticmethod
+    def search_indexed_trips(index, user_id, filters):
+        """
+        Select the search_enriched_trips candidates from the upcoming trip index rather than the database:
+        copies of their 'search' columns, with distance_km from the search point when searching near one.
+        Returns None if start_time_after cannot be read, leaving it to the database query.
+        """
+        try:
+            # start_time is compared in whole seconds; a trip must depart strictly after start_time_after
+            start = to_epoch(filters['start_time_after']) + 1
+        except ValueError:
+            return None
+        min_seats = int(filters['min_available_seats']) if filters.get('min_available_seats') else None
+        max_price = float(filters['max_price']) if filters.get('max_price') else None
+        
+        near = bool(filters.get('near_latitude') and filters.get('near_longitude'))
+        if near:
+            lat = float(filters['near_latitude'])
+            lng = float(filters['near_longitude'])
+            radius = float(filters['radius_km'])
+            candidates = index.near(lat, lng, radius, start)
+        else:
+            candidates = index.departing(start)
+        
+        trips = []
+        for trip in candidates:
+            if trip['driver_id'] == user_id:  # Exclude user's own trips
+                continue
+            if min_seats is not None and int(trip['available_seats']) < min_seats:
+                continue
+            if max_price is not None and float(trip['price']) > max_price:
+                continue
+            trips.append({field: trip[field] for field in Trip.PROJECTIONS['search']})
+        
+        if near:
+            trips = list(TripService.within_radius(trips, lat, lng, radius))
+        return trips
+    
+    @staticmethod
+    def attach_drivers(trips):
+        """Add the 'driver' columns of each trip's driver under 'users', as the search query embeds them. Trips without a driver row are dropped."""
+        driver_ids = list({trip['driver_id'] for trip in trips})
+        drivers = {}
+        for i in range(0, len(driver_ids), ID_CHUNK_SIZE):
+            response = select(supabase_admin, User, 'driver').in_('id', driver_ids[i:i + ID_CHUNK_SIZE]).execute()
+            drivers.update((driver['id'], driver) for driver in response.data)
+        return [dict(trip, users=drivers[trip['driver_id']]) for trip in trips if trip['driver_id'] in drivers]
+    
+    @staticmethod
+    def enrich_nearby_search_trip(trip_data):
+        """Enrich a trip found by a radius search, reporting its distance from the search point."""
+        return {
+            'id': trip_data['id'],
+            'driver': {
+                'id': trip_data['users']['id'],
+                'name': trip_data['users']['name'],
+                'profile_image_url': trip_data['users']['profile_image_url'],
+                'institute': trip_data['users']['institute']
+            },
+            'departure_time': trip_data['start_time'],
+            'price': str(trip_data['price']),  # String to match RidePreview
+            'available_seats': trip_data['available_seats'],
+            'distance': f"{round(trip_data['distance_km'], 1)} km"  # String to match RidePreview
+        }
 
     @staticmethod
     def enrich_search_trip(trip, driver_data):
         """Enrich trip data for search results."""
-        distance = TripService.calculate_distance(
-            float(trip.start_latitude), float(trip.start_longitude),
-            float(trip.end_latitude), float(trip.end_longitude)
-        )
+        distance = TripService.route_metrics(trip)[0]
         return {
             'id': trip.id,
             'driver': {
@@ -848,5 +1327,5 @@ class TripService:
             'departure_time': trip.start_time,
             'price': str(trip.price),
             'available_seats': trip.available_seats,
-            'distance': f"{round(distance, 1)} km"
+            'distance': f"{distance} km"
         }
\ No newline at end of file
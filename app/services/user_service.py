@@ -1,14 +1,50 @@
 from datetime import datetime
 from app.utils.supabase_client import supabase, supabase_admin
 from app.models.user import User
+from app.utils.query import select
+from app.utils.cache import FeedCache
+from app.config import get_config
 import logging
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+config = get_config()
+
 class UserService:
     """Service for handling user operations."""
     
+    # Per-worker cache of user summaries, kept fresh by the change feed (see app.services.change_feed_service)
+    _summaries = FeedCache(config.FEED_CACHE_SIZE)
+    
+    @staticmethod
+    def get_user_summary(user_id):
+        """Get a user's summary (id, name, profile_image_url), or a placeholder for unknown users."""
+        summary = UserService._summaries.get(user_id)
+        if summary is None:
+            version = UserService._summaries.version()
+            response = select(supabase_admin, User, 'summary').eq('id', user_id).execute()
+            if not response.data:
+                return {'id': user_id, 'name': 'Unknown', 'profile_image_url': None}
+            summary = response.data[0]
+            UserService._summaries.set(user_id, summary, version)
+        return summary
+    
+    @staticmethod
+    def apply_user_changes(changes):
+        """Apply user changes from the change feed to the summary cache."""
+        for change in changes:
+            if change.type == 'DELETE':
+                UserService._summaries.evict(change.old_record.get('id'))
+            else:
+                user = change.record
+                UserService._summaries.replace(user.get('id'), {field: user.get(field) for field in User.PROJECTIONS['summary']})
+    
+    @staticmethod
+    def reset_summary_cache(enabled):
+        """Empty the summary cache, serving from it again only if enabled."""
+        UserService._summaries.reset(enabled)
+    
     @staticmethod
     def get_user_by_id(user_id):
         """Get a user by ID."""
@@ -16,7 +52,7 @@ class UserService:
             logger.info(f"Getting user by ID: {user_id}")
             
             # Use supabase_admin to bypass RLS policies
-            response = supabase_admin.table('users').select('*').eq('id', user_id).execute()
+            response = select(supabase_admin, User).eq('id', user_id).execute()
             
             if not response.data:
                 logger.info(f"User not found with ID: {user_id}")
@@ -41,7 +77,7 @@ class UserService:
             logger.info(f"Updating user with ID: {user_id}")
             
             # Check if user exists
-            response = supabase_admin.table('users').select('*').eq('id', user_id).execute()
+            response = select(supabase_admin, User, 'id').eq('id', user_id).execute()
             
             if not response.data:
                 logger.info(f"User not found with ID: {user_id}")
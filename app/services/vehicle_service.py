@@ -1,6 +1,8 @@
 from datetime import datetime
 from app.utils.supabase_client import supabase, supabase_admin
 from app.models.vehicle import Vehicle
+from app.utils.query import select
+from app.utils.sync import get_changes, sync_cursor
 import logging
 
 # Set up logging
@@ -10,20 +12,37 @@ class VehicleService:
     """Service for handling vehicle operations."""
     
     @staticmethod
-    def get_user_vehicles(user_id):
-        """Get all vehicles for a user."""
+    def get_user_vehicles(user_id, since=None):
+        """
+        Get all vehicles for a user.
+        With a since cursor, only vehicles changed after it are returned, plus the ids of deleted ones.
+        """
         try:
+            if since:
+                logger.info(f"Getting vehicles changes for user: {user_id} since: {since}")
+                
+                vehicles, deleted, cursor = get_changes(supabase_admin, Vehicle, user_id, since)
+                logger.info(f"Found {len(vehicles)} changed and {len(deleted)} deleted vehicles for user: {user_id}")
+                
+                return {
+                    'success': True,
+                    'vehicles': vehicles,
+                    'deleted': deleted,
+                    'cursor': cursor
+                }
+            
             logger.info(f"Getting vehicles for user: {user_id}")
             
             # Use supabase_admin to bypass RLS policies
-            response = supabase_admin.table('vehicles').select('*').eq('user_id', user_id).execute()
+            response = select(supabase_admin, Vehicle).eq('user_id', user_id).is_('deleted_at', 'null').execute()
             
-            vehicles = [Vehicle.from_dict(vehicle).to_dict() for vehicle in response.data]
+            vehicles = [Vehicle.row_to_dict(vehicle) for vehicle in response.data]
             logger.info(f"Found {len(vehicles)} vehicles for user: {user_id}")
             
             return {
                 'success': True,
-                'vehicles': vehicles
+                'vehicles': vehicles,
+                'cursor': sync_cursor(vehicles)
             }
             
         except Exception as e:
@@ -37,10 +56,11 @@ class VehicleService:
             logger.info(f"Getting vehicle by ID: {vehicle_id}, user_id: {user_id}")
             
             # Use supabase_admin to bypass RLS policies
-            query = supabase_admin.table('vehicles').select('*').eq('id', vehicle_id)
+            query = select(supabase_admin, Vehicle).eq('id', vehicle_id)
             
+            # Deleted vehicles still resolve for the trips that reference them, but not for their owner
             if user_id:
-                query = query.eq('user_id', user_id)
+                query = query.eq('user_id', user_id).is_('deleted_at', 'null')
             
             response = query.execute()
             
@@ -48,12 +68,11 @@ class VehicleService:
                 logger.info(f"Vehicle not found: {vehicle_id}")
                 return {'success': False, 'message': 'Vehicle not found'}
             
-            vehicle = Vehicle.from_dict(response.data[0])
             logger.info(f"Found vehicle: {vehicle_id}")
             
             return {
                 'success': True,
-                'vehicle': vehicle.to_dict()
+                'vehicle': Vehicle.row_to_dict(response.data[0])
             }
             
         except Exception as e:
@@ -106,7 +125,7 @@ class VehicleService:
             logger.info(f"Updating vehicle: {vehicle_id} for user: {user_id}")
             
             # Check if vehicle exists and belongs to user
-            response = supabase_admin.table('vehicles').select('*').eq('id', vehicle_id).eq('user_id', user_id).execute()
+            response = select(supabase_admin, Vehicle, 'id').eq('id', vehicle_id).eq('user_id', user_id).is_('deleted_at', 'null').execute()
             
             if not response.data:
                 logger.info(f"Vehicle not found or does not belong to user: {vehicle_id}")
@@ -146,15 +165,21 @@ class VehicleService:
             logger.info(f"Deleting vehicle: {vehicle_id} for user: {user_id}")
             
             # Check if vehicle exists and belongs to user
-            response = supabase_admin.table('vehicles').select('*').eq('id', vehicle_id).eq('user_id', user_id).execute()
+            response = select(supabase_admin, Vehicle, 'id').eq('id', vehicle_id).eq('user_id', user_id).is_('deleted_at', 'null').execute()
             
             if not response.data:
                 logger.info(f"Vehicle not found or does not belong to user: {vehicle_id}")
                 return {'success': False, 'message': 'Vehicle not found or does not belong to user'}
             
-            # Delete vehicle
+            # Soft-delete vehicle so delta syncs can report it
+            now = datetime.utcnow().isoformat()
+            delete_data = {
+                'deleted_at': now,
+                'updated_at': now
+            }
+            
             # Use supabase_admin to bypass RLS policies
-            response = supabase_admin.table('vehicles').delete().eq('id', vehicle_id).eq('user_id', user_id).execute()
+            response = supabase_admin.table('vehicles').update(delete_data).eq('id', vehicle_id).eq('user_id', user_id).execute()
             
             if not response.data:
                 logger.error("Failed to delete vehicle")
@@ -0,0 +1,132 @@
+import math
+from app.utils.spatial import CorridorIndex, trip_segment, score_segment
+from app.utils.timestamps import to_epoch
+
+# Extra cost, in detour kilometres, of moving a passenger off the trip they requested
+REASSIGN_PENALTY_KM = 1.0
+
+# Cheapest alternative trips kept per request; more rarely fill extra seats but slow the repair pass
+MAX_OPTIONS = 8
+
+def assignment_options(trips, requests, corridor_km, max_detour_km, time_tolerance_s, max_options=MAX_OPTIONS):
+    """
+    List up to max_options trips each request could be assigned to, cheapest first, as (cost, trip_id, detour_km) tuples.
+    The requested trip is always an option. Other trips must carry the ride within the corridor and
+    detour bounds and depart within time_tolerance_s of the requested trip.
+    """
+    # One corridor index per departure-time bucket, so a request only looks at trips leaving around its time
+    bucket_s = max(time_tolerance_s, 1)
+    indexes = {}
+    departures = {}
+    segments = {}
+    for trip in trips:
+        departures[trip['id']] = to_epoch(trip['start_time'])
+        segments[trip['id']] = trip_segment(trip)
+        indexes.setdefault(departures[trip['id']] // bucket_s, CorridorIndex(corridor_km)).add(trip)
+    
+    options = {}
+    
+    for request in requests:
+        pickup = (float(request['pickup_latitude']), float(request['pickup_longitude']))
+        dropoff = (float(request['dropoff_latitude']), float(request['dropoff_longitude']))
+        requested = request['trip_id']
+        desired = departures.get(requested)
+        
+        request_options = []
+        if requested in segments:
+            # The passenger chose this trip, so it stays an option even outside the corridor
+            score = score_segment(segments[requested], pickup, dropoff, math.inf, math.inf)
+            request_options.append((0.0, requested, round(score[2], 2) if score else 0.0))
+        
+        if desired is None:
+            buckets = indexes.values()
+        else:
+            buckets = [indexes[bucket] for bucket in range(desired // bucket_s - 1, desired // bucket_s + 2) if bucket in indexes]
+        
+        for index in buckets:
+            for trip in index.candidates(pickup[0], pickup[1], dropoff[0], dropoff[1]):
+                trip_id = trip['id']
+                if trip_id == requested:
+                    continue
+                if desired is not None and abs(departures[trip_id] - desired) > time_tolerance_s:
+                    continue
+                score = score_segment(segments[trip_id], pickup, dropoff, corridor_km, max_detour_km)
+                if score:
+                    request_options.append((score[2] + REASSIGN_PENALTY_KM, trip_id, round(score[2], 2)))
+        
+        request_options.sort()
+        options[request['id']] = request_options[:max_options]
+    
+    return options
+
+def assign_requests(trips, requests, accepted_seats, corridor_km, max_detour_km, max_trip_detour_km, time_tolerance_s):
+    """
+    Assign pending ride requests to trips, maximizing seats filled.
+    
+    Greedy with one repair pass: requests with the fewest options (then the most seats) are placed first,
+    each on its cheapest trip with enough free seats and detour budget. An unplaced request may then take
+    seats freed by moving one already placed request to another of its options.
+    Seats free on a trip are its available_seats less accepted_seats; the detours of the passengers placed
+    on a trip may add up to max_trip_detour_km.
+    
+    Returns (assignments, unassigned request ids), assignments maps request id -> (trip_id, detour_km).
+    """
+    options = assignment_options(trips, requests, corridor_km, max_detour_km, time_tolerance_s)
+    seats = {request['id']: int(request['seats_requested'] or 1) for request in requests}
+    free = {trip['id']: int(trip['available_seats']) - accepted_seats.get(trip['id'], 0) for trip in trips}
+    budget = {trip['id']: max_trip_detour_km for trip in trips}
+    riders = {trip['id']: set() for trip in trips}
+    assignments = {}
+    
+    def fits(request_id, trip_id, detour):
+        return free[trip_id] >= seats[request_id] and budget[trip_id] >= detour
+    
+    def place(request_id, trip_id, detour):
+        free[trip_id] -= seats[request_id]
+        budget[trip_id] -= detour
+        riders[trip_id].add(request_id)
+        assignments[request_id] = (trip_id, detour)
+    
+    def unplace(request_id):
+        trip_id, detour = assignments.pop(request_id)
+        free[trip_id] += seats[request_id]
+        budget[trip_id] += detour
+        riders[trip_id].discard(request_id)
+    
+    order = sorted(options, key=lambda request_id: (len(options[request_id]), -seats[request_id]))
+    unassigned = []
+    
+    for request_id in order:
+        for _, trip_id, detour in options[request_id]:
+            if fits(request_id, trip_id, detour):
+                place(request_id, trip_id, detour)
+                break
+        else:
+            unassigned.append(request_id)
+    
+    # Repair pass: free seats on a full trip by moving one of its passengers elsewhere
+    still_unassigned = []
+    for request_id in unassigned:
+        placed = False
+        for _, trip_id, detour in options[request_id]:
+            for other_id in sorted(riders[trip_id], key=lambda rider: -seats[rider]):
+                other_trip, other_detour = assignments[other_id]
+                if free[trip_id] + seats[other_id] < seats[request_id]:
+                    continue
+                
+                unplace(other_id)
+                if fits(request_id, trip_id, detour):
+                    moved = next(((alt_trip, alt_detour) for _, alt_trip, alt_detour in options[other_id]
+                                  if alt_trip != trip_id and fits(other_id, alt_trip, alt_detour)), None)
+                    if moved:
+                        place(other_id, *moved)
+                        place(request_id, trip_id, detour)
+                        placed = True
+                        break
+                place(other_id, other_trip, other_detour)
+            if placed:
+                break
+        if not placed:
+            still_unassigned.append(request_id)
+    
+    return assignments, still_unassigned
@@ -1,4 +1,5 @@
 import jwt
+import inspect
 from datetime import datetime, timedelta
 from functools import wraps
 from flask import request, jsonify, current_app
@@ -44,32 +45,52 @@ def decode_token(token):
         logger.warning(f"Invalid token: {str(e)}")
         return None
 
+def authenticate_request():
+    """Validate the bearer token on the current request and return (user_id, error_response)."""
+    token = None
+    
+    # Get token from Authorization header
+    auth_header = request.headers.get('Authorization')
+    if auth_header and auth_header.startswith('Bearer '):
+        token = auth_header.split(' ')[1]
+        logger.info(f"Found token in Authorization header: {token[:10]}...")
+    
+    if not token:
+        logger.warning("No token found in request")
+        return None, (jsonify({'error': 'Unauthorized', 'message': 'Token is missing'}), 401)
+    
+    # Decode token
+    payload = decode_token(token)
+    if not payload:
+        logger.warning("Token validation failed")
+        return None, (jsonify({'error': 'Unauthorized', 'message': 'Token is invalid or expired'}), 401)
+    
+    logger.info(f"Token validated for user: {payload['sub']}")
+    return payload['sub'], None
+
 def token_required(f):
-    """Decorator to require a valid JWT token for a route."""
+    """Decorator to require a valid JWT token for a route. Supports both sync and async views."""
+    if inspect.iscoroutinefunction(f):
+        @wraps(f)
+        async def decorated_async(*args, **kwargs):
+            user_id, error_response = authenticate_request()
+            if error_response:
+                return error_response
+            
+            # Add user_id to kwargs
+            kwargs['user_id'] = user_id
+            return await f(*args, **kwargs)
+        
+        return decorated_async
+    
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
-        
-        # Get token from Authorization header
-        auth_header = request.headers.get('Authorization')
-        if auth_header and auth_header.startswith('Bearer '):
-            token = auth_header.split(' ')[1]
-            logger.info(f"Found token in Authorization header: {token[:10]}...")
-        
-        if not token:
-            logger.warning("No token found in request")
-            return jsonify({'error': 'Unauthorized', 'message': 'Token is missing'}), 401
-        
-        # Decode token
-        payload = decode_token(token)
-        if not payload:
-            logger.warning("Token validation failed")
-            return jsonify({'error': 'Unauthorized', 'message': 'Token is invalid or expired'}), 401
+        user_id, error_response = authenticate_request()
+        if error_response:
+            return error_response
         
         # Add user_id to kwargs
-        kwargs['user_id'] = payload['sub']
-        logger.info(f"Token validated for user: {payload['sub']}")
-        
+        kwargs['user_id'] = user_id
         return f(*args, **kwargs)
     
     return decorated 
\ No newline at end of file
@@ -0,0 +1,42 @@
+import threading
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class PeriodicTask:
+    """
+    Run a zero-argument callable every interval seconds on a daemon thread.
+    Failures are logged and the task keeps its schedule; stop() ends it after the current run.
+    """
+    
+    def __init__(self, name, interval, func):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """Start the task thread; the first run happens immediately."""
+        if self._thread is not None:
+            return self
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        logger.info(f"Started periodic task {self.name} every {self.interval}s")
+        return self
+    
+    def stop(self, timeout=None):
+        """Ask the task to stop and wait for the current run to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+    
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.func()
+            except Exception as e:
+                logger.error(f"Periodic task {self.name} failed: {str(e)}")
+            self._stop.wait(self.interval)
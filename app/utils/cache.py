@@ -0,0 +1,82 @@
+from collections import OrderedDict
+import threading
+
+class FeedCache:
+    """
+    Bounded LRU cache of database rows that the change feed keeps fresh, instead of a TTL.
+    
+    Entries are only served while the cache is enabled, i.e. while the change feed is connected; a disabled
+    cache misses on every get and ignores sets. Readers take version() before querying and pass it to set(),
+    so a row read before a concurrent change is applied never overwrites the change.
+    """
+    
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.enabled = False
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = 0
+        self._hits = 0
+        self._misses = 0
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def version(self):
+        """Return a token for set(); it changes whenever an entry is changed or dropped by the feed."""
+        return self._version
+    
+    def get(self, key):
+        """Return the cached value, or None."""
+        with self._lock:
+            value = self._entries.get(key) if self.enabled else None
+            if value is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+    
+    def set(self, key, value, version):
+        """Cache a value read from the database, unless the feed changed anything since version()."""
+        with self._lock:
+            if not self.enabled or version != self._version:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def replace(self, key, value):
+        """Update an entry from the feed if it is cached."""
+        with self._lock:
+            self._version += 1
+            if key in self._entries:
+                self._entries[key] = value
+    
+    def evict(self, key):
+        """Drop an entry after the feed reports a change to it."""
+        with self._lock:
+            self._version += 1
+            self._entries.pop(key, None)
+    
+    def clear(self):
+        """Drop every entry after a change the feed cannot attribute to one."""
+        self.reset(self.enabled)
+    
+    def reset(self, enabled):
+        """Drop every entry, and start or stop serving them."""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            self.enabled = enabled
+    
+    def stats(self):
+        """Return size and hit counters."""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'hits': self._hits,
+                'misses': self._misses
+            }
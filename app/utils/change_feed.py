@@ -0,0 +1,306 @@
+import asyncio
+import queue
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urlparse
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+CHANGE_TYPES = ('INSERT', 'UPDATE', 'DELETE')
+
+# One row change; DELETEs carry only old_record, which holds just the primary key unless the
+# table has REPLICA IDENTITY FULL
+Change = namedtuple('Change', ('table', 'type', 'record', 'old_record'))
+
+def parse_change(payload):
+    """Turn a realtime row change payload into a Change, or None for any other message."""
+    if not isinstance(payload, dict) or payload.get('type') not in CHANGE_TYPES:
+        return None
+    return Change(payload.get('table'), payload['type'], payload.get('record') or {}, payload.get('old_record') or {})
+
+def row_id(change):
+    """Return the primary key of the changed row."""
+    return (change.old_record if change.type == 'DELETE' else change.record).get('id')
+
+# Consumers between start() and stop() in this process
+_running = set()
+_running_lock = threading.Lock()
+
+def feed_connected(table):
+    """
+    Whether a running consumer has the feed connected and handles the table's changes.
+    Code that announces its own writes can leave them to the feed then, and must announce them itself otherwise.
+    """
+    with _running_lock:
+        consumers = list(_running)
+    return any(consumer.connected and table in consumer.handlers for consumer in consumers)
+
+def realtime_url(supabase_url, api_key):
+    """Return the realtime websocket URL of a Supabase project."""
+    host = urlparse(supabase_url).netloc
+    return f"wss://{host}/realtime/v1/websocket?apikey={api_key}&vsn=1.0.0"
+
+class TableHandler:
+    """
+    What the consumer does with one table's changes.
+    
+    apply(changes) receives each batch, coalesced to the latest change per row and in arrival order.
+    resync() runs once the feed is subscribed after every (re)connect, and after changes were dropped;
+    it must rebuild the state from the database. suspend() runs when the feed goes down, so state that
+    is only correct while changes arrive can stop being served.
+    """
+    
+    def __init__(self, apply, resync=None, suspend=None):
+        self.apply = apply
+        self.resync = resync or (lambda: None)
+        self.suspend = suspend or (lambda: None)
+
+class RealtimeFeed:
+    """Row changes of some tables from the Supabase realtime server, over one websocket."""
+    
+    def __init__(self, url, schema='public', heartbeat_interval=30):
+        self.url = url
+        self.schema = schema
+        self.heartbeat_interval = heartbeat_interval
+        self._loop = None
+        self._socket = None
+    
+    def run(self, tables, on_connect, on_change):
+        """Subscribe to the tables and deliver changes until the connection closes."""
+        from realtime.connection import Socket
+        
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        try:
+            socket = Socket(self.url, auto_reconnect=False, hb_interval=self.heartbeat_interval)
+            socket.connect()
+            self._socket = socket
+            
+            def callback(payload):
+                change = parse_change(payload)
+                if change is not None:
+                    on_change(change)
+            
+            for table in tables:
+                socket.set_channel(f"realtime:{self.schema}:{table}").on('*', callback).join()
+            on_connect()
+            socket.listen()
+        finally:
+            self._socket = None
+            self._loop = None
+            loop.close()
+        raise ConnectionError('Realtime connection closed')
+    
+    def close(self):
+        """Close the connection from another thread, ending run()."""
+        loop, socket = self._loop, self._socket
+        if loop is not None and socket is not None:
+            asyncio.run_coroutine_threadsafe(socket.ws_connection.close(), loop)
+
+class LocalFeed:
+    """
+    In-process change feed for local runs and benchmarks.
+    push() changes as the database would; disconnect() drops the connection so the consumer reconnects and resyncs.
+    """
+    
+    _DISCONNECT = object()
+    _CLOSE = object()
+    
+    def __init__(self):
+        self._queue = queue.Queue()
+    
+    def push(self, table, type, record=None, old_record=None):
+        """Emit one row change."""
+        self._queue.put(Change(table, type, record or {}, old_record or {}))
+    
+    def disconnect(self):
+        """Simulate a dropped connection."""
+        self._queue.put(self._DISCONNECT)
+    
+    def run(self, tables, on_connect, on_change):
+        """Deliver pushed changes of the tables until disconnected or closed."""
+        on_connect()
+        while True:
+            item = self._queue.get()
+            if item is self._DISCONNECT:
+                raise ConnectionError('Local feed disconnected')
+            if item is self._CLOSE:
+                return
+            if item.table in tables:
+                on_change(item)
+    
+    def close(self):
+        """End run()."""
+        self._queue.put(self._CLOSE)
+
+class ChangeFeedConsumer:
+    """
+    Apply database row changes to in-process indexes and caches, one TableHandler per table.
+    
+    A reader thread keeps the feed connected, reconnecting with exponential backoff, and puts changes on a
+    bounded queue. When the queue stays full for put_timeout seconds the reader stops waiting: the change
+    is dropped and a resync is scheduled, so a slow applier costs a rebuild rather than unbounded memory.
+    An applier thread takes up to batch_size queued changes at a time, keeps only the latest change per
+    row and hands each table's changes to its handler. Resyncs and suspends also run on the applier
+    thread, so they never interleave with a batch; changes queued before a resync are discarded because
+    the rebuilt state already includes them.
+    """
+    
+    def __init__(self, feed, handlers, queue_size=10000, batch_size=500, put_timeout=1.0, max_backoff=30):
+        self.feed = feed
+        self.handlers = handlers
+        self.queue = queue.Queue(queue_size)
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+        self.max_backoff = max_backoff
+        self.connected = False
+        self._backoff = 1
+        self._stop = threading.Event()
+        self._resync = threading.Event()
+        self._suspend = threading.Event()
+        self._threads = []
+        self._stats = {
+            'received': 0, 'applied': 0, 'coalesced': 0, 'batches': 0, 'dropped': 0,
+            'connects': 0, 'resyncs': 0, 'errors': 0
+        }
+        self._last_applied_at = None
+    
+    def start(self):
+        """Start the reader and applier threads."""
+        if self._threads:
+            return self
+        self._threads = [
+            threading.Thread(target=self._read, name='change-feed-reader', daemon=True),
+            threading.Thread(target=self._apply_loop, name='change-feed-applier', daemon=True)
+        ]
+        for thread in self._threads:
+            thread.start()
+        with _running_lock:
+            _running.add(self)
+        logger.info(f"Started change feed consumer for {', '.join(self.handlers)}")
+        return self
+    
+    def stop(self, timeout=None):
+        """Disconnect and wait for both threads to finish."""
+        with _running_lock:
+            _running.discard(self)
+        self._stop.set()
+        self.feed.close()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+    
+    def _read(self):
+        while not self._stop.is_set():
+            try:
+                self.feed.run(tuple(self.handlers), self._on_connect, self._on_change)
+            except Exception as e:
+                if not self._stop.is_set():
+                    logger.warning(f"Change feed disconnected: {str(e)}")
+            self.connected = False
+            self._suspend.set()
+            if self._stop.wait(self._backoff):
+                return
+            self._backoff = min(self._backoff * 2, self.max_backoff)
+    
+    def _on_connect(self):
+        # Subscribed: rebuild everything changes may have been missed for while disconnected
+        self.connected = True
+        self._backoff = 1
+        self._stats['connects'] += 1
+        self._resync.set()
+        logger.info('Change feed connected')
+    
+    def _on_change(self, change):
+        self._stats['received'] += 1
+        try:
+            self.queue.put(change, timeout=self.put_timeout)
+        except queue.Full:
+            self._stats['dropped'] += 1
+            self._resync.set()
+    
+    def _drain(self):
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                return
+    
+    def _next_batch(self):
+        try:
+            batch = [self.queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    
+    def _run_handlers(self, action):
+        for table, handler in self.handlers.items():
+            try:
+                getattr(handler, action)()
+            except Exception as e:
+                self._stats['errors'] += 1
+                logger.error(f"Change feed {action} of {table} failed: {str(e)}")
+    
+    def _apply_loop(self):
+        while not self._stop.is_set():
+            if self._suspend.is_set():
+                self._suspend.clear()
+                self._drain()
+                self._run_handlers('suspend')
+            if self._resync.is_set():
+                self._resync.clear()
+                self._drain()
+                started = time.perf_counter()
+                self._run_handlers('resync')
+                self._stats['resyncs'] += 1
+                logger.info(f"Change feed resync took {(time.perf_counter() - started) * 1000:.1f} ms")
+            
+            batch = self._next_batch()
+            if batch:
+                self._apply(batch)
+    
+    def _apply(self, batch):
+        # Latest change per row, ordered by when that change arrived
+        latest = {}
+        for change in batch:
+            key = (change.table, row_id(change))
+            if key[1] is None:
+                key = (change.table, id(change))
+            latest.pop(key, None)
+            latest[key] = change
+        
+        by_table = {}
+        for change in latest.values():
+            by_table.setdefault(change.table, []).append(change)
+        
+        for table, changes in by_table.items():
+            try:
+                self.handlers[table].apply(changes)
+            except Exception as e:
+                # The handler's state may be half updated; rebuild it
+                self._stats['errors'] += 1
+                self._resync.set()
+                logger.error(f"Applying {len(changes)} {table} changes failed: {str(e)}")
+        
+        self._stats['batches'] += 1
+        self._stats['applied'] += len(latest)
+        self._stats['coalesced'] += len(batch) - len(latest)
+        self._last_applied_at = time.time()
+    
+    def stats(self):
+        """Return connection state and throughput counters."""
+        return dict(
+            self._stats,
+            connected=self.connected,
+            queued=self.queue.qsize(),
+            last_applied_at=self._last_applied_at
+        )
@@ -0,0 +1,208 @@
+import gzip
+import threading
+import time
+import zlib
+from flask import request, current_app
+import logging
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard is optional
+    zstandard = None
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+def no_compression(f):
+    """Decorator to opt a route out of response compression."""
+    f.no_compression = True
+    return f
+
+def parse_accept_encoding(header):
+    """Parse an Accept-Encoding header into a dict of coding -> q-value."""
+    codings = {}
+    for part in (header or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        coding, _, params = part.partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[coding.strip().lower()] = q
+    return codings
+
+class Compression:
+    """
+    Compress responses with brotli, zstd or gzip, negotiated via Accept-Encoding.
+    
+    Responses smaller than COMPRESS_MIN_SIZE are sent as-is. Streamed responses are
+    compressed chunk by chunk and flushed after every chunk when COMPRESS_STREAMS is set.
+    Per-encoding byte and CPU counters are kept for tuning the compression levels.
+    """
+    
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._stats = {}
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Register the after_request hook and default settings on an app."""
+        app.config.setdefault('COMPRESS_ENABLED', True)
+        app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+        app.config.setdefault('COMPRESS_STREAMS', True)
+        app.config.setdefault('COMPRESS_ALGORITHMS', ['br', 'zstd', 'gzip'])
+        app.config.setdefault('COMPRESS_MIMETYPES', ['application/json', 'application/x-ndjson', 'text/csv', 'text/plain'])
+        app.config.setdefault('COMPRESS_GZIP_LEVEL', 6)
+        app.config.setdefault('COMPRESS_BR_LEVEL', 4)
+        app.config.setdefault('COMPRESS_ZSTD_LEVEL', 3)
+        
+        app.extensions['compression'] = self
+        app.after_request(self.after_request)
+    
+    def available_algorithms(self, config):
+        """Return the configured algorithms whose libraries are installed, in preference order."""
+        installed = {'gzip': True, 'br': brotli is not None, 'zstd': zstandard is not None}
+        return [algorithm for algorithm in config['COMPRESS_ALGORITHMS'] if installed.get(algorithm)]
+    
+    def choose_algorithm(self, accept_encoding, config):
+        """Pick the algorithm with the highest client q-value, breaking ties by server preference."""
+        codings = parse_accept_encoding(accept_encoding)
+        best, best_q = None, 0.0
+        for algorithm in self.available_algorithms(config):
+            q = codings.get(algorithm, codings.get('*', 0.0))
+            if q > best_q:
+                best, best_q = algorithm, q
+        return best
+    
+    def after_request(self, response):
+        """Compress the response if the client accepts it and it is worth compressing."""
+        config = current_app.config
+        response.vary.add('Accept-Encoding')
+        
+        if not config['COMPRESS_ENABLED'] or not self.should_compress(response, config):
+            return response
+        
+        algorithm = self.choose_algorithm(request.headers.get('Accept-Encoding'), config)
+        if not algorithm:
+            return response
+        
+        if response.is_streamed:
+            if not config['COMPRESS_STREAMS']:
+                return response
+            response.response = self.compress_stream(response.response, algorithm, config)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < config['COMPRESS_MIN_SIZE']:
+                return response
+            
+            start = time.thread_time()
+            compressed = self.compress(data, algorithm, config)
+            self.record(algorithm, len(data), len(compressed), time.thread_time() - start)
+            
+            response.set_data(compressed)
+        
+        response.headers['Content-Encoding'] = algorithm
+        
+        # Strong validators describe the uncompressed bytes
+        if response.headers.get('ETag', '').startswith('"'):
+            response.headers['ETag'] = 'W/' + response.headers['ETag']
+        
+        return response
+    
+    def should_compress(self, response, config):
+        """Check whether a response is eligible for compression."""
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
+            return False
+        if 'Content-Encoding' in response.headers or response.direct_passthrough:
+            return False
+        if response.mimetype not in config['COMPRESS_MIMETYPES']:
+            return False
+        if 'no-transform' in response.headers.get('Cache-Control', ''):
+            return False
+        
+        view = current_app.view_functions.get(request.endpoint)
+        return not getattr(view, 'no_compression', False)
+    
+    def compress(self, data, algorithm, config):
+        """Compress a complete body."""
+        if algorithm == 'br':
+            return brotli.compress(data, quality=config['COMPRESS_BR_LEVEL'])
+        if algorithm == 'zstd':
+            return zstandard.ZstdCompressor(level=config['COMPRESS_ZSTD_LEVEL']).compress(data)
+        return gzip.compress(data, compresslevel=config['COMPRESS_GZIP_LEVEL'], mtime=0)
+    
+    def compress_stream(self, chunks, algorithm, config):
+        """Compress an iterable body, flushing after every chunk so clients see data immediately."""
+        if algorithm == 'br':
+            compressor = brotli.Compressor(quality=config['COMPRESS_BR_LEVEL'])
+            process, flush, finish = compressor.process, compressor.flush, compressor.finish
+        elif algorithm == 'zstd':
+            compressor = zstandard.ZstdCompressor(level=config['COMPRESS_ZSTD_LEVEL']).compressobj()
+            process = compressor.compress
+            flush = lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+            finish = compressor.flush
+        else:
+            compressor = zlib.compressobj(config['COMPRESS_GZIP_LEVEL'], zlib.DEFLATED, 31)
+            process = compressor.compress
+            flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+            finish = compressor.flush
+        
+        bytes_in = bytes_out = 0
+        cpu = 0.0
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                if not chunk:
+                    # Pass empty blocks through; they let the server send headers before the first data
+                    yield b''
+                    continue
+                start = time.thread_time()
+                out = process(chunk) + flush()
+                cpu += time.thread_time() - start
+                bytes_in += len(chunk)
+                bytes_out += len(out)
+                yield out
+            
+            start = time.thread_time()
+            out = finish()
+            cpu += time.thread_time() - start
+            bytes_out += len(out)
+            yield out
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close:
+                close()
+            self.record(algorithm, bytes_in, bytes_out, cpu)
+    
+    def record(self, algorithm, bytes_in, bytes_out, cpu_seconds):
+        """Add one compressed response to the per-algorithm counters."""
+        with self._lock:
+            stats = self._stats.setdefault(algorithm, {'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'cpu_seconds': 0.0})
+            stats['responses'] += 1
+            stats['bytes_in'] += bytes_in
+            stats['bytes_out'] += bytes_out
+            stats['cpu_seconds'] += cpu_seconds
+    
+    def stats(self):
+        """Return per-algorithm compression metrics for this worker."""
+        with self._lock:
+            result = {}
+            for algorithm, stats in self._stats.items():
+                result[algorithm] = dict(stats)
+                result[algorithm]['bytes_saved'] = stats['bytes_in'] - stats['bytes_out']
+                result[algorithm]['ratio'] = round(stats['bytes_out'] / stats['bytes_in'], 3) if stats['bytes_in'] else None
+                result[algorithm]['cpu_ms_per_mb'] = round(stats['cpu_seconds'] * 1000 / (stats['bytes_in'] / 1048576), 2) if stats['bytes_in'] else None
+            return result
@@ -0,0 +1,58 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from app.config import get_config
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+config = get_config()
+
+def run_concurrently(*calls, max_workers=None):
+    """
+    Run independent zero-argument callables concurrently and return their results in order.
+    At most max_workers calls (MAX_CONCURRENT_QUERIES by default) run at the same time.
+    If any call raises, the first exception (in call order) is re-raised once all calls finish.
+    """
+    if not calls:
+        return []
+    
+    if len(calls) == 1:
+        return [calls[0]()]
+    
+    if max_workers is None:
+        max_workers = config.MAX_CONCURRENT_QUERIES
+    max_workers = max(1, min(max_workers, len(calls)))
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(call) for call in calls]
+    
+    # The executor has waited for every call, so result() never blocks here
+    results = []
+    for future in futures:
+        error = future.exception()
+        if error is not None:
+            logger.error(f"Concurrent call failed: {str(error)}")
+            raise error
+        results.append(future.result())
+    
+    return results
+
+async def gather_bounded(*awaitables, limit=None):
+    """
+    Await independent awaitables concurrently and return their results in order.
+    At most limit awaitables (MAX_CONCURRENT_QUERIES by default) are in flight at the same time.
+    The first exception raised is propagated to the caller.
+    """
+    if not awaitables:
+        return []
+    
+    if limit is None:
+        limit = config.MAX_CONCURRENT_QUERIES
+    semaphore = asyncio.Semaphore(max(1, limit))
+    
+    async def run(awaitable):
+        async with semaphore:
+            return await awaitable
+    
+    return await asyncio.gather(*(run(awaitable) for awaitable in awaitables))
@@ -0,0 +1,23 @@
+import base64
+import json
+
+def encode_cursor(values):
+    """Encode a dict of position values as an opaque, URL-safe cursor string."""
+    raw = json.dumps(values, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, *required):
+    """
+    Decode a cursor produced by encode_cursor.
+    Raises ValueError if it is malformed or missing any of the required keys.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    
+    if not isinstance(values, dict) or any(key not in values for key in required):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    
+    return values
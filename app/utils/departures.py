@@ -0,0 +1,210 @@
+import bisect
+import math
+import threading
+from datetime import datetime
+from app.utils.geo import KM_PER_DEGREE
+from app.utils.spatial import CorridorIndex
+from app.utils.timestamps import to_epoch
+
+def now_epoch():
+    """
+    Return the current time in the epoch seconds used for departures. Trip start times are naive
+    timestamps compared against datetime.now(), so both are converted the same way.
+    """
+    return to_epoch(datetime.now().isoformat())
+
+class DepartureIndex:
+    """
+    Trip ids ordered by departure time in epoch seconds, split into buckets of bucket_seconds.
+    
+    Each bucket is a sorted list of (departure, trip_id) and the bucket numbers are kept sorted, so adding
+    a trip only shifts one bucket's entries, a [start, end] window is found by bisection, and expiring
+    the past drops whole buckets from the front. Not thread-safe; UpcomingTripIndex serializes access.
+    """
+    
+    def __init__(self, bucket_seconds):
+        self.bucket_seconds = bucket_seconds
+        self.buckets = {}
+        self.bucket_keys = []
+        self.departures = {}
+    
+    def __len__(self):
+        return len(self.departures)
+    
+    def add(self, trip_id, departure):
+        """Index a trip's departure, replacing any previous one."""
+        self.remove(trip_id)
+        key = departure // self.bucket_seconds
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = []
+            bisect.insort(self.bucket_keys, key)
+        bisect.insort(bucket, (departure, trip_id))
+        self.departures[trip_id] = departure
+    
+    def remove(self, trip_id):
+        """Drop a trip if present."""
+        departure = self.departures.pop(trip_id, None)
+        if departure is None:
+            return
+        key = departure // self.bucket_seconds
+        bucket = self.buckets[key]
+        del bucket[bisect.bisect_left(bucket, (departure, trip_id))]
+        if not bucket:
+            del self.buckets[key]
+            del self.bucket_keys[bisect.bisect_left(self.bucket_keys, key)]
+    
+    def between(self, start=None, end=None):
+        """Return the (departure, trip_id) pairs departing in [start, end], either end open when None, in departure order."""
+        entries = []
+        for bucket, low, high in self._window(start, end):
+            entries.extend(bucket[low:high])
+        return entries
+    
+    def count(self, start=None, end=None):
+        """Return how many trips depart in [start, end], without listing them."""
+        return sum(high - low for _, low, high in self._window(start, end))
+    
+    def _window(self, start, end):
+        """Yield (bucket, low, high): the slices of the buckets that hold the departures in [start, end]."""
+        first = 0 if start is None else bisect.bisect_left(self.bucket_keys, start // self.bucket_seconds)
+        last = len(self.bucket_keys) if end is None else bisect.bisect_right(self.bucket_keys, end // self.bucket_seconds)
+        for position in range(first, last):
+            bucket = self.buckets[self.bucket_keys[position]]
+            # Only the first and last buckets can hold departures outside the window
+            low = bisect.bisect_left(bucket, (start,)) if start is not None and position == first else 0
+            high = bisect.bisect_left(bucket, (end + 1,)) if end is not None and position == last - 1 else len(bucket)
+            yield bucket, low, high
+    
+    def expire(self, now):
+        """Drop the trips departing at or before now. Returns their ids."""
+        expired = []
+        while self.bucket_keys and self.bucket_keys[0] <= now // self.bucket_seconds:
+            key = self.bucket_keys[0]
+            bucket = self.buckets[key]
+            cut = bisect.bisect_left(bucket, (now + 1,))
+            expired.extend(trip_id for _, trip_id in bucket[:cut])
+            if cut < len(bucket):
+                del bucket[:cut]
+                break
+            del self.buckets[key]
+            del self.bucket_keys[0]
+        
+        for trip_id in expired:
+            del self.departures[trip_id]
+        return expired
+
+class UpcomingTripIndex:
+    """
+    Upcoming scheduled trips indexed by corridor (CorridorIndex), by start point on the same grid,
+    by departure time (DepartureIndex) and by driver. Trips are dicts with at least the Trip 'card' columns; expire() drops the ones
+    that have departed. Returned trip dicts are shared, copy them before changing them.
+    """
+    
+    def __init__(self, corridor_km, bucket_seconds):
+        self.corridors = CorridorIndex(corridor_km)
+        self.departures = DepartureIndex(bucket_seconds)
+        self.starts = {}
+        self.by_driver = {}
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self.departures)
+    
+    def add(self, trip):
+        """Index a trip dict, replacing any previous version of it."""
+        departure = to_epoch(trip['start_time'])
+        with self._lock:
+            self._remove(trip['id'])
+            self.corridors.add(trip)
+            self.departures.add(trip['id'], departure)
+            self.starts.setdefault(self.start_cell(trip), set()).add(trip['id'])
+            self.by_driver.setdefault(trip['driver_id'], set()).add(trip['id'])
+    
+    def remove(self, trip_id):
+        """Drop a trip from the index if present."""
+        with self._lock:
+            self._remove(trip_id)
+    
+    def _remove(self, trip_id):
+        trip = self.corridors.get(trip_id)
+        if trip is None:
+            return
+        self.corridors.remove(trip_id)
+        self.departures.remove(trip_id)
+        for groups, key in ((self.starts, self.start_cell(trip)), (self.by_driver, trip['driver_id'])):
+            group = groups.get(key)
+            if group is not None:
+                group.discard(trip_id)
+                if not group:
+                    del groups[key]
+    
+    def start_cell(self, trip):
+        """Return the grid cell of a trip's start point."""
+        return self.corridors.cell(float(trip['start_latitude']), float(trip['start_longitude']))
+    
+    def get(self, trip_id):
+        """Return an indexed trip dict, or None."""
+        return self.corridors.get(trip_id)
+    
+    def expire(self, now):
+        """Drop the trips departing at or before now (epoch seconds). Returns how many."""
+        with self._lock:
+            expired = self.departures.expire(now)
+            for trip_id in expired:
+                self._remove(trip_id)
+        return len(expired)
+    
+    def in_window(self, trips, start, end):
+        """Keep the trips of a list departing in [start, end], either end open when None."""
+        if start is None and end is None:
+            return trips
+        departures = self.departures.departures
+        return [
+            trip for trip in trips
+            if (start is None or departures[trip['id']] >= start) and (end is None or departures[trip['id']] <= end)
+        ]
+    
+    def departing(self, start=None, end=None):
+        """Return the trips departing in [start, end] epoch seconds, in departure order."""
+        with self._lock:
+            return [self.corridors.get(trip_id) for _, trip_id in self.departures.between(start, end)]
+    
+    def candidates(self, pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, start=None, end=None):
+        """Return the trips departing in [start, end] whose corridor may contain both the pickup and the dropoff."""
+        with self._lock:
+            return self.in_window(self.corridors.candidates(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng), start, end)
+    
+    def near(self, lat, lng, radius_km, start=None, end=None):
+        """
+        Return the trips departing in [start, end] that may start within radius_km of a point, i.e. in the
+        cells of its bounding box. Whichever of the window and the cells holds fewer trips is listed first.
+        """
+        lat_delta = radius_km / KM_PER_DEGREE
+        lng_delta = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+        low_row, low_col = self.corridors.cell(lat - lat_delta, lng - lng_delta)
+        high_row, high_col = self.corridors.cell(lat + lat_delta, lng + lng_delta)
+        
+        def in_box(cell):
+            return low_row <= cell[0] <= high_row and low_col <= cell[1] <= high_col
+        
+        with self._lock:
+            if (high_row - low_row + 1) * (high_col - low_col + 1) <= len(self.starts):
+                cells = [(row, col) for row in range(low_row, high_row + 1) for col in range(low_col, high_col + 1) if (row, col) in self.starts]
+            else:
+                # The box covers more cells than hold trips; visiting the occupied ones is cheaper
+                cells = [cell for cell in self.starts if in_box(cell)]
+            
+            if (start is not None or end is not None) and self.departures.count(start, end) < sum(len(self.starts[cell]) for cell in cells):
+                trips = [self.corridors.get(trip_id) for _, trip_id in self.departures.between(start, end)]
+                return [trip for trip in trips if in_box(self.start_cell(trip))]
+            
+            trips = [self.corridors.get(trip_id) for cell in cells for trip_id in self.starts[cell]]
+            return self.in_window(trips, start, end)
+    
+    def driver_trips(self, driver_id, start=None, end=None):
+        """Return a driver's trips departing in [start, end], in departure order."""
+        with self._lock:
+            trips = self.in_window([self.corridors.get(trip_id) for trip_id in self.by_driver.get(driver_id, ())], start, end)
+            trips.sort(key=lambda trip: (self.departures.departures[trip['id']], trip['id']))
+            return trips
@@ -0,0 +1,48 @@
+import hashlib
+from flask import request, current_app
+from app.utils.json_provider import json_response
+
+def rows_etag(rows, deleted=(), cursor=None):
+    """
+    Build a weak ETag from the id and updated_at of each row (and of nested rows such
+    as an embedded vehicle), so it can be computed without serializing the response.
+    Delta syncs also pass their deleted ids and next cursor, which the rows do not reflect.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for row_id in deleted:
+        digest.update(f"-{row_id};".encode('utf-8'))
+    if cursor is not None:
+        digest.update(f"@{cursor};".encode('utf-8'))
+    for row in rows:
+        if not row:
+            continue
+        digest.update(f"{row.get('id')}|{row.get('updated_at')};".encode('utf-8'))
+        for value in row.values():
+            if isinstance(value, dict) and 'updated_at' in value:
+                digest.update(f"{value.get('id')}|{value.get('updated_at')};".encode('utf-8'))
+    digest.update(str(len(rows)).encode('utf-8'))
+    return digest.hexdigest()
+
+def conditional_json_response(result, rows=None):
+    """
+    Return a JSON response carrying an ETag, or 304 Not Modified when it matches If-None-Match.
+    When rows is given, a weak ETag is derived from their updated_at values and the body is
+    only serialized on a miss. Otherwise a strong ETag is computed from the serialized body.
+    """
+    if not result.get('success'):
+        return json_response(result)
+    
+    if rows is not None:
+        etag, weak, body = rows_etag(rows, result.get('deleted') or (), result.get('cursor')), True, None
+    else:
+        body = current_app.json.dumps_bytes(result)
+        etag, weak = hashlib.blake2b(body, digest_size=16).hexdigest(), False
+    
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = json_response(result if body is None else body)
+    
+    response.set_etag(etag, weak=weak)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,206 @@
+import glob
+import json
+import os
+import queue
+import socket
+import threading
+import uuid
+from app.config import get_config
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+config = get_config()
+
+class Subscription:
+    """
+    One consumer's view of the event bus: a bounded queue fed with the events of its topics.
+    When the consumer falls behind, the oldest queued event is dropped so the newest state still gets through.
+    """
+    
+    def __init__(self, bus, maxsize):
+        self.bus = bus
+        self.topics = set()
+        self.queue = queue.Queue(maxsize)
+        self.dropped = 0
+    
+    def add(self, *topics):
+        """Start receiving events for more topics."""
+        self.bus.add_topics(self, topics)
+        return self
+    
+    def deliver(self, event):
+        """Queue an event without blocking the publisher."""
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+    
+    def get(self, timeout):
+        """Return the next event, or None if none arrives within timeout seconds."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+    
+    def close(self):
+        """Stop receiving events."""
+        self.bus.unsubscribe(self)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+class LocalSocketBroker:
+    """
+    Stand-in for a real message broker between the worker processes of one host.
+    Every process binds a Unix datagram socket in a shared directory; publishing sends the message to all of them.
+    Sockets of exited workers are removed on the first failed send.
+    """
+    
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = None
+        self._socket = None
+    
+    def start(self, on_message):
+        """Bind this process's socket and deliver incoming messages to on_message on a daemon thread."""
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock")
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._socket.bind(self.path)
+        
+        def receive():
+            while True:
+                try:
+                    data = self._socket.recv(65536)
+                except OSError:
+                    return
+                try:
+                    on_message(data)
+                except Exception as e:
+                    logger.error(f"Failed to dispatch broker message: {str(e)}")
+        
+        threading.Thread(target=receive, name='event-broker', daemon=True).start()
+        logger.info(f"Event broker listening on {self.path}")
+    
+    def publish(self, data):
+        """Send a message to every live process, never blocking on a slow one."""
+        sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sender.setblocking(False)
+        try:
+            for path in glob.glob(os.path.join(self.directory, '*.sock')):
+                try:
+                    sender.sendto(data, path)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # The worker that bound this socket is gone
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+                except BlockingIOError:
+                    logger.warning(f"Event broker queue full, dropped message for {path}")
+        finally:
+            sender.close()
+
+class EventBus:
+    """
+    In-process pub/sub fan-out of JSON-serializable events to subscriptions by topic.
+    With a broker, published events go through it so subscribers in every worker process receive them.
+    """
+    
+    def __init__(self, broker=None, queue_size=100):
+        self.broker = broker
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._topics = {}
+        self._subscriptions = set()
+        self._pid = None
+        self._published = 0
+        self._delivered = 0
+    
+    def _ensure_broker(self):
+        # Start the broker lazily, and again in a forked worker
+        if self.broker is not None and self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self.broker.start(self._on_broker_message)
+                    self._pid = os.getpid()
+    
+    def _on_broker_message(self, data):
+        message = json.loads(data)
+        self.dispatch(message['topics'], message['event'])
+    
+    def subscribe(self, *topics):
+        """Create a subscription to some topics; close it when done."""
+        self._ensure_broker()
+        subscription = Subscription(self, self.queue_size)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription.add(*topics)
+    
+    def add_topics(self, subscription, topics):
+        with self._lock:
+            for topic in topics:
+                subscription.topics.add(topic)
+                self._topics.setdefault(topic, set()).add(subscription)
+    
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+            for topic in subscription.topics:
+                subscribers = self._topics.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._topics[topic]
+    
+    def publish(self, topics, event):
+        """Publish one event to several topics; each subscription receives it at most once."""
+        self._published += 1
+        if self.broker is not None:
+            self._ensure_broker()
+            self.broker.publish(json.dumps({'topics': list(topics), 'event': event}, separators=(',', ':')).encode('utf-8'))
+        else:
+            self.dispatch(topics, event)
+    
+    def dispatch(self, topics, event):
+        """Deliver an event to this process's subscriptions of any of the topics."""
+        with self._lock:
+            subscriptions = set()
+            for topic in topics:
+                subscriptions.update(self._topics.get(topic, ()))
+        for subscription in subscriptions:
+            subscription.deliver(event)
+        self._delivered += len(subscriptions)
+    
+    def connection_count(self):
+        """Return the number of open subscriptions in this process."""
+        return len(self._subscriptions)
+    
+    def stats(self):
+        """Return fan-out counters for this worker."""
+        with self._lock:
+            return {
+                'subscriptions': len(self._subscriptions),
+                'topics': len(self._topics),
+                'published': self._published,
+                'delivered': self._delivered,
+                'dropped': sum(subscription.dropped for subscription in self._subscriptions)
+            }
+
+def create_event_bus():
+    """Build the event bus described by the EVENTS_* settings."""
+    broker = LocalSocketBroker(config.EVENTS_BROKER_DIR) if config.EVENTS_BROKER == 'local' else None
+    return EventBus(broker, config.SSE_QUEUE_SIZE)
+
+event_bus = create_event_bus()
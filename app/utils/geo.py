@@ -0,0 +1,7 @@
+import math
+
+KM_PER_DEGREE = 111.32
+
+def to_plane(lat, lng, ref_lat):
+    """Project a point to kilometres on a local equirectangular plane, accurate at city scale."""
+    return (lng * KM_PER_DEGREE * math.cos(math.radians(ref_lat)), lat * KM_PER_DEGREE)
@@ -0,0 +1,74 @@
+from datetime import date, datetime, time
+from decimal import Decimal
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+import logging
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+def _default(obj):
+    """Serialize types the JSON encoders do not handle natively."""
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return str(obj)
+    return DefaultJSONProvider.default(obj)
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider backed by orjson, falling back to the stdlib encoder when orjson
+    is not installed or is disabled with JSON_USE_ORJSON=false.
+    datetime values are written as ISO 8601 strings and Decimal values as strings.
+    """
+    
+    default = staticmethod(_default)
+    
+    def __init__(self, app):
+        super().__init__(app)
+        self.use_orjson = orjson is not None and app.config.get('JSON_USE_ORJSON', True)
+        logger.info(f"JSON provider using {'orjson' if self.use_orjson else 'stdlib json'}")
+    
+    def dumps_bytes(self, obj, indent=False):
+        """Serialize obj to UTF-8 encoded JSON bytes."""
+        if not self.use_orjson:
+            return self.dumps(obj, indent=2 if indent else None).encode('utf-8')
+        
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option)
+    
+    def dumps(self, obj, **kwargs):
+        """Serialize obj to a JSON string. Custom encoder arguments use the stdlib encoder."""
+        if self.use_orjson and not kwargs:
+            return self.dumps_bytes(obj).decode('utf-8')
+        return super().dumps(obj, **kwargs)
+    
+    def loads(self, s, **kwargs):
+        """Deserialize JSON from a string or bytes."""
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+    
+    def response(self, *args, **kwargs):
+        """Build a JSON response, serializing straight to bytes."""
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumps_bytes(obj, indent=indent), mimetype=self.mimetype)
+
+def json_response(body, status=200):
+    """
+    Return a JSON response for a route. body may be a payload to serialize or
+    bytes that were already serialized (e.g. by dumps_bytes), which are sent as-is.
+    """
+    if not isinstance(body, (bytes, bytearray)):
+        body = current_app.json.dumps_bytes(body)
+    return current_app.response_class(body, status=status, mimetype='application/json')
@@ -0,0 +1,168 @@
+from array import array
+import math
+import threading
+import time
+from app.utils.geo import KM_PER_DEGREE
+
+class PositionRing:
+    """
+    Fixed-size ring buffer of (timestamp, latitude, longitude) positions.
+    The three columns are preallocated double arrays, so appending never allocates and the
+    oldest position is overwritten once the ring is full.
+    """
+    
+    __slots__ = ('capacity', 'timestamps', 'latitudes', 'longitudes', 'head', 'count')
+    
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.latitudes = array('d', bytes(8 * capacity))
+        self.longitudes = array('d', bytes(8 * capacity))
+        self.head = 0
+        self.count = 0
+    
+    def __len__(self):
+        return self.count
+    
+    def append(self, timestamp, latitude, longitude):
+        """Store a position in the next slot."""
+        i = self.head
+        self.timestamps[i] = timestamp
+        self.latitudes[i] = latitude
+        self.longitudes[i] = longitude
+        self.head = (i + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+    
+    def latest(self):
+        """Return the newest (timestamp, latitude, longitude), or None when empty."""
+        if not self.count:
+            return None
+        i = self.head - 1
+        return (self.timestamps[i], self.latitudes[i], self.longitudes[i])
+    
+    def since(self, timestamp):
+        """Return the positions newer than timestamp, oldest first."""
+        positions = []
+        for k in range(1, self.count + 1):
+            i = (self.head - k) % self.capacity
+            if self.timestamps[i] <= timestamp:
+                break
+            positions.append((self.timestamps[i], self.latitudes[i], self.longitudes[i]))
+        positions.reverse()
+        return positions
+
+class LiveTrack:
+    """The live positions of one in-progress trip, and who may see them."""
+    
+    __slots__ = ('trip_id', 'driver_id', 'participant_ids', 'ring', 'lock', 'last_sample', 'started_at', 'checked_at')
+    
+    def __init__(self, trip_id, driver_id, participant_ids, capacity):
+        self.started_at = time.time()
+        # When the trip was last seen in progress (time.monotonic())
+        self.checked_at = time.monotonic()
+        self.trip_id = trip_id
+        self.driver_id = driver_id
+        self.participant_ids = frozenset(participant_ids) | {driver_id}
+        self.ring = PositionRing(capacity)
+        self.lock = threading.Lock()
+        self.last_sample = None
+
+class LiveLocationStore:
+    """
+    Per-worker live positions of in-progress trips, one LiveTrack per trip.
+    
+    Every accepted ping goes into the trip's ring. With sampling on, a ping is also queued for
+    persistence when sample_interval seconds have passed or the driver moved sample_distance_m
+    metres since the last queued one; take_samples() hands the queue over in one swap. The sample
+    queue and the counters are shared by every track, so they have their own lock.
+    """
+    
+    def __init__(self, capacity, sample=False, sample_interval=30, sample_distance_m=200):
+        self.capacity = capacity
+        self.sample = sample
+        self.sample_interval = sample_interval
+        self.sample_distance_km = sample_distance_m / 1000
+        self.tracks = {}
+        self._lock = threading.Lock()
+        self._samples_lock = threading.Lock()
+        self._samples = []
+        self._stats = {'pings': 0, 'accepted': 0, 'out_of_order': 0, 'sampled': 0}
+    
+    def start(self, trip_id, driver_id, participant_ids):
+        """Start tracking a trip, keeping the positions of a track that already exists."""
+        with self._lock:
+            track = self.tracks.get(trip_id)
+            if track is None:
+                track = self.tracks[trip_id] = LiveTrack(trip_id, driver_id, participant_ids, self.capacity)
+            else:
+                track.participant_ids = frozenset(participant_ids) | {driver_id}
+                track.checked_at = time.monotonic()
+            return track
+    
+    def get(self, trip_id):
+        """Return the track of a trip, or None when this worker is not tracking it."""
+        return self.tracks.get(trip_id)
+    
+    def end(self, trip_id):
+        """Stop tracking a trip and free its ring."""
+        with self._lock:
+            self.tracks.pop(trip_id, None)
+    
+    def record(self, track, pings):
+        """
+        Append pings, (timestamp, latitude, longitude) tuples in the order sent, to a track.
+        Pings not newer than the latest position are skipped. Returns the number accepted.
+        """
+        accepted = 0
+        samples = []
+        with track.lock:
+            latest = track.ring.latest()
+            latest_timestamp = latest[0] if latest else float('-inf')
+            for timestamp, latitude, longitude in pings:
+                if timestamp <= latest_timestamp:
+                    continue
+                track.ring.append(timestamp, latitude, longitude)
+                latest_timestamp = timestamp
+                accepted += 1
+                if self.sample and self._due_for_sample(track.last_sample, timestamp, latitude, longitude):
+                    track.last_sample = (timestamp, latitude, longitude)
+                    samples.append((track.trip_id, track.driver_id, timestamp, latitude, longitude))
+        
+        with self._samples_lock:
+            self._samples.extend(samples)
+            self._stats['sampled'] += len(samples)
+            self._stats['pings'] += len(pings)
+            self._stats['accepted'] += accepted
+            self._stats['out_of_order'] += len(pings) - accepted
+        return accepted
+    
+    def _due_for_sample(self, last, timestamp, latitude, longitude):
+        if last is None or timestamp - last[0] >= self.sample_interval:
+            return True
+        # Equirectangular distance, plenty accurate over a few hundred metres
+        d_lat = (latitude - last[1]) * KM_PER_DEGREE
+        d_lng = (longitude - last[2]) * KM_PER_DEGREE * math.cos(math.radians(latitude))
+        return d_lat * d_lat + d_lng * d_lng >= self.sample_distance_km * self.sample_distance_km
+    
+    def take_samples(self):
+        """Return and clear the positions queued for persistence."""
+        with self._samples_lock:
+            samples, self._samples = self._samples, []
+        return samples
+    
+    def sweep(self, idle_before):
+        """Stop tracking trips whose latest ping, if any, is older than the idle_before timestamp. Returns how many."""
+        with self._lock:
+            idle = [
+                trip_id for trip_id, track in self.tracks.items()
+                if (track.ring.latest() or (track.started_at,))[0] < idle_before
+            ]
+            for trip_id in idle:
+                del self.tracks[trip_id]
+        return len(idle)
+    
+    def stats(self):
+        """Return tracking and ingestion counters for this worker."""
+        with self._samples_lock:
+            return dict(self._stats, tracks=len(self.tracks), pending_samples=len(self._samples))
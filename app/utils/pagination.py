@@ -0,0 +1,88 @@
+import heapq
+from app.config import get_config
+from app.utils.cursor import encode_cursor, decode_cursor
+
+config = get_config()
+
+def parse_page_size(value):
+    """Parse a limit parameter, defaulting to PAGE_SIZE_DEFAULT and clamped to PAGE_SIZE_MAX."""
+    if value in (None, ''):
+        return config.PAGE_SIZE_DEFAULT
+    
+    size = int(value)
+    if size < 1:
+        raise ValueError(f"Invalid limit: {value}")
+    return min(size, config.PAGE_SIZE_MAX)
+
+def decode_page_cursor(cursor, sort_column):
+    """Decode a keyset cursor, rejecting cursors issued for a different sort column."""
+    values = decode_cursor(cursor, 'c', 'v', 'id')
+    if values['c'] != sort_column:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return values
+
+def page_args(args, sort_column, required=True):
+    """
+    Read and validate the limit and cursor request parameters. Raises ValueError if either is invalid.
+    When pagination is optional and neither was given, returns (None, None).
+    """
+    limit, cursor = args.get('limit'), args.get('cursor')
+    if not required and limit is None and cursor is None:
+        return None, None
+    
+    if cursor:
+        decode_page_cursor(cursor, sort_column)
+    return parse_page_size(limit), cursor or None
+
+def quote_filter_value(value):
+    """Quote a value for use inside a PostgREST or=(...) filter."""
+    escaped = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{escaped}"'
+
+def keyset_query(query, sort_column, page_size, cursor=None, desc=False):
+    """
+    Order a query by (sort_column, id) and restrict it to the rows after cursor.
+    One extra row is requested so keyset_result can tell whether another page exists.
+    """
+    if cursor:
+        values = decode_page_cursor(cursor, sort_column)
+        op = 'lt' if desc else 'gt'
+        value, row_id = quote_filter_value(values['v']), quote_filter_value(values['id'])
+        query = query.or_(f"{sort_column}.{op}.{value},and({sort_column}.eq.{value},id.{op}.{row_id})")
+    
+    return query.order(sort_column, desc=desc).order('id', desc=desc).limit(page_size + 1)
+
+def keyset_result(rows, sort_column, page_size):
+    """Trim rows fetched by keyset_query to one page. Returns (rows, next_cursor), next_cursor is None on the last page."""
+    if len(rows) <= page_size:
+        return rows, None
+    
+    rows = rows[:page_size]
+    last = rows[-1]
+    return rows, encode_cursor({'c': sort_column, 'v': last[sort_column], 'id': last['id']})
+
+def keyset_page(query, sort_column, page_size, cursor=None, desc=False):
+    """Fetch one keyset page of a query. Returns (rows, next_cursor)."""
+    response = keyset_query(query, sort_column, page_size, cursor, desc).execute()
+    return keyset_result(response.data, sort_column, page_size)
+
+def top_k_page(items, sort_column, page_size, cursor=None, key=None):
+    """
+    Select one page of items, ordered by (key(item), item['id']), that come after cursor.
+    A bounded heap keeps only page_size + 1 candidates during the scan, so nothing is fully sorted.
+    key defaults to item[sort_column]. Returns (page, next_cursor).
+    """
+    key = key or (lambda item: item[sort_column])
+    keyed = ((key(item), item['id'], item) for item in items)
+    
+    if cursor:
+        values = decode_page_cursor(cursor, sort_column)
+        after = (values['v'], values['id'])
+        keyed = (entry for entry in keyed if (entry[0], entry[1]) > after)
+    
+    best = heapq.nsmallest(page_size + 1, keyed, key=lambda entry: (entry[0], entry[1]))
+    if len(best) <= page_size:
+        return [entry[2] for entry in best], None
+    
+    last = best[page_size - 1]
+    return [entry[2] for entry in best[:page_size]], encode_cursor({'c': sort_column, 'v': last[0], 'id': last[1]})
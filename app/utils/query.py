@@ -0,0 +1,37 @@
+def columns(model, use_case='full'):
+    """
+    Return the select() column list declared in model.PROJECTIONS for a use case.
+    Raises ValueError for undeclared use cases so ad-hoc projections cannot creep into services.
+    """
+    try:
+        return ', '.join(model.PROJECTIONS[use_case])
+    except KeyError:
+        raise ValueError(f"No '{use_case}' projection declared for {model.__name__}")
+
+def embed(model, use_case='full', via=None):
+    """
+    Return an embedded resource clause for a related model, e.g. users:driver_id(id, name).
+    via names the foreign key column when the relation is ambiguous.
+    """
+    if via:
+        return f"{model.TABLE}:{via}({columns(model, use_case)})"
+    return f"{model.TABLE}({columns(model, use_case)})"
+
+def iter_pages(fetch_page, page_size):
+    """
+    Yield successive non-empty pages from fetch_page(start, end), an inclusive row range,
+    stopping after the first short page. Only one page is held in memory at a time.
+    """
+    start = 0
+    while True:
+        rows = fetch_page(start, start + page_size - 1)
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        start += page_size
+
+def select(client, model, use_case='full', *embeds):
+    """Start a select on the model's table that fetches only the columns declared for a use case."""
+    clause = ', '.join((columns(model, use_case),) + embeds)
+    return client.table(model.TABLE).select(clause)
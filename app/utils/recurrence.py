@@ -0,0 +1,47 @@
+from datetime import datetime
+from dateutil.rrule import rrulestr
+
+# Recurrence frequencies a trip schedule may use
+SUPPORTED_FREQUENCIES = ('DAILY', 'WEEKLY')
+
+def parse_departure(value):
+    """
+    Parse a departure timestamp into a naive local datetime, the form trip start times are stored in.
+    Raises ValueError if it is not ISO 8601.
+    """
+    try:
+        departure = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        raise ValueError(f'Invalid departure time: {value}')
+    if departure.tzinfo is not None:
+        departure = departure.astimezone().replace(tzinfo=None)
+    return departure.replace(microsecond=0)
+
+def parse_recurrence(rule, first_departure):
+    """
+    Parse an RRULE string (e.g. 'FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR') anchored at first_departure.
+    Occurrences keep first_departure's time of day. Only daily and weekly rules are accepted.
+    Raises ValueError for anything else.
+    """
+    if not isinstance(rule, str) or not rule.strip():
+        raise ValueError('Missing recurrence rule')
+    
+    rule = rule.strip()
+    if rule.upper().startswith('RRULE:'):
+        rule = rule[6:]
+    parts = dict(part.partition('=')[::2] for part in rule.upper().split(';') if part)
+    if parts.get('FREQ') not in SUPPORTED_FREQUENCIES:
+        raise ValueError('Recurrence rule must be FREQ=DAILY or FREQ=WEEKLY')
+    if parts.keys() & {'DTSTART', 'BYHOUR', 'BYMINUTE', 'BYSECOND'}:
+        raise ValueError('Recurrence rule may not set DTSTART or a time of day; it comes from first_departure')
+    
+    try:
+        recurrence = rrulestr(rule, dtstart=first_departure)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f'Invalid recurrence rule: {str(e)}')
+    
+    return recurrence
+
+def occurrences_between(recurrence, after, until):
+    """Return the occurrences of a parsed rule in the window (after, until]."""
+    return [occurrence for occurrence in recurrence.between(after, until, inc=True) if occurrence > after]
@@ -0,0 +1,148 @@
+import math
+import threading
+from app.utils.geo import KM_PER_DEGREE, to_plane
+
+class CorridorIndex:
+    """
+    Grid index of trip corridors, the band of corridor_km around each trip's start->end segment.
+    
+    Each trip is registered in every grid cell its corridor may touch, so the trips whose corridor
+    could contain both a pickup and a dropoff are the intersection of two cell buckets.
+    Candidates still need exact scoring; the index only rules trips out.
+    """
+    
+    def __init__(self, corridor_km):
+        self.corridor_km = corridor_km
+        self.cell_km = 2 * corridor_km
+        self.cell_degrees = self.cell_km / KM_PER_DEGREE
+        self.cells = {}
+        self.trips = {}
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self.trips)
+    
+    def cell(self, lat, lng):
+        """Return the grid cell containing a point."""
+        return (math.floor(lat / self.cell_degrees), math.floor(lng / self.cell_degrees))
+    
+    def corridor_cells(self, trip):
+        """Return the cells covered by a trip's corridor, sampling the segment every half cell."""
+        start_lat, start_lng = float(trip['start_latitude']), float(trip['start_longitude'])
+        end_lat, end_lng = float(trip['end_latitude']), float(trip['end_longitude'])
+        
+        # Any corridor point is within corridor_km + cell_km / 4 of a sample. One ring of cells covers that
+        # in latitude; cells are square in degrees, so longitude may need more as cells narrow towards the poles
+        cos_lat = max(math.cos(math.radians((start_lat + end_lat) / 2)), 0.01)
+        lng_ring = math.ceil((self.corridor_km + self.cell_km / 4) / (self.cell_km * cos_lat))
+        
+        length_km = math.hypot((end_lat - start_lat) * KM_PER_DEGREE, (end_lng - start_lng) * KM_PER_DEGREE * cos_lat)
+        steps = max(1, math.ceil(length_km / (self.cell_km / 2)))
+        
+        cells = set()
+        for step in range(steps + 1):
+            fraction = step / steps
+            row, col = self.cell(start_lat + (end_lat - start_lat) * fraction, start_lng + (end_lng - start_lng) * fraction)
+            for d_row in (-1, 0, 1):
+                for d_col in range(-lng_ring, lng_ring + 1):
+                    cells.add((row + d_row, col + d_col))
+        return cells
+    
+    def add(self, trip):
+        """Index a trip dict, replacing any previous version of it."""
+        cells = self.corridor_cells(trip)
+        with self._lock:
+            self._remove(trip['id'])
+            for cell in cells:
+                self.cells.setdefault(cell, set()).add(trip['id'])
+            self.trips[trip['id']] = (trip, cells)
+    
+    def remove(self, trip_id):
+        """Drop a trip from the index if present."""
+        with self._lock:
+            self._remove(trip_id)
+    
+    def _remove(self, trip_id):
+        entry = self.trips.pop(trip_id, None)
+        if not entry:
+            return
+        for cell in entry[1]:
+            bucket = self.cells.get(cell)
+            if bucket is not None:
+                bucket.discard(trip_id)
+                if not bucket:
+                    del self.cells[cell]
+    
+    def get(self, trip_id):
+        """Return an indexed trip dict, or None."""
+        entry = self.trips.get(trip_id)
+        return entry[0] if entry else None
+    
+    def candidates(self, pickup_lat, pickup_lng, dropoff_lat, dropoff_lng):
+        """Return the trip dicts whose corridor may contain both the pickup and the dropoff."""
+        with self._lock:
+            pickup_bucket = self.cells.get(self.cell(pickup_lat, pickup_lng), set())
+            dropoff_bucket = self.cells.get(self.cell(dropoff_lat, dropoff_lng), set())
+            return [self.trips[trip_id][0] for trip_id in pickup_bucket & dropoff_bucket]
+
+def trip_segment(trip):
+    """
+    Project a trip's start->end segment onto a local plane centred on its start latitude.
+    Returns a tuple of precomputed terms, reusable across many score_segment calls.
+    """
+    ref_lat = float(trip['start_latitude'])
+    ax, ay = to_plane(ref_lat, float(trip['start_longitude']), ref_lat)
+    bx, by = to_plane(float(trip['end_latitude']), float(trip['end_longitude']), ref_lat)
+    dx, dy = bx - ax, by - ay
+    scale = KM_PER_DEGREE * math.cos(math.radians(ref_lat))
+    return scale, ax, ay, bx, by, dx, dy, (dx * dx + dy * dy) or 1e-12, math.hypot(dx, dy)
+
+def score_segment(segment, pickup, dropoff, corridor_km, max_detour_km):
+    """
+    Score a pickup->dropoff ride, each a (lat, lng) pair, against a trip_segment.
+    The trip must pass within corridor_km of both points, reach the pickup before the dropoff,
+    and the detour must stay within max_detour_km.
+    Returns (pickup_distance_km, dropoff_distance_km, detour_km), or None if the ride does not fit.
+    """
+    # Plain arithmetic rather than geo helpers: this runs for every candidate in batch assignment
+    scale, ax, ay, bx, by, dx, dy, length_sq, direct = segment
+    
+    px, py = pickup[1] * scale, pickup[0] * KM_PER_DEGREE
+    pickup_t = ((px - ax) * dx + (py - ay) * dy) / length_sq
+    pickup_t = 0.0 if pickup_t < 0.0 else 1.0 if pickup_t > 1.0 else pickup_t
+    pickup_distance = math.hypot(px - ax - pickup_t * dx, py - ay - pickup_t * dy)
+    if pickup_distance > corridor_km:
+        return None
+    
+    qx, qy = dropoff[1] * scale, dropoff[0] * KM_PER_DEGREE
+    dropoff_t = ((qx - ax) * dx + (qy - ay) * dy) / length_sq
+    dropoff_t = 0.0 if dropoff_t < 0.0 else 1.0 if dropoff_t > 1.0 else dropoff_t
+    dropoff_distance = math.hypot(qx - ax - dropoff_t * dx, qy - ay - dropoff_t * dy)
+    if dropoff_distance > corridor_km:
+        return None
+    
+    # The trip must be heading from the pickup towards the dropoff
+    if pickup_t > dropoff_t:
+        return None
+    
+    detour = math.hypot(px - ax, py - ay) + math.hypot(qx - px, qy - py) + math.hypot(bx - qx, by - qy) - direct
+    if detour > max_detour_km:
+        return None
+    
+    return pickup_distance, dropoff_distance, detour
+
+def score_corridor_match(trip, pickup, dropoff, corridor_km, max_detour_km):
+    """
+    Score how well a trip serves a ride from pickup to dropoff, or return None if it does not fit (see score_segment).
+    score_km adds the passenger's distances to the route and the driver's detour; lower is better.
+    """
+    score = score_segment(trip_segment(trip), pickup, dropoff, corridor_km, max_detour_km)
+    if score is None:
+        return None
+    
+    return {
+        'pickup_distance_km': round(score[0], 2),
+        'dropoff_distance_km': round(score[1], 2),
+        'detour_km': round(score[2], 2),
+        'score_km': round(sum(score), 2)
+    }
@@ -0,0 +1,46 @@
+import json
+import time
+from flask import Response
+from app.config import get_config
+
+config = get_config()
+
+def format_event(data, event=None):
+    """Format one Server-Sent Events message."""
+    lines = [f"event: {event}"] if event else []
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return '\n'.join(lines) + '\n\n'
+
+def event_stream(subscription, initial=()):
+    """
+    Yield SSE messages: the initial (event, data) pairs, then every event the subscription receives.
+    A comment line is sent after SSE_HEARTBEAT_INTERVAL quiet seconds so proxies keep the connection open.
+    The stream ends after SSE_MAX_DURATION seconds; clients reconnect and get a fresh snapshot.
+    """
+    deadline = time.monotonic() + config.SSE_MAX_DURATION
+    try:
+        yield f"retry: {config.SSE_RETRY_MS}\n\n"
+        for event, data in initial:
+            yield format_event(data, event)
+        
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            data = subscription.get(min(config.SSE_HEARTBEAT_INTERVAL, remaining))
+            if data is None:
+                yield ': heartbeat\n\n'
+            else:
+                yield format_event(data, data.get('type'))
+    finally:
+        subscription.close()
+
+def sse_response(subscription, initial=()):
+    """Stream a subscription to the client as text/event-stream."""
+    response = Response(event_stream(subscription, initial), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    
+    # Also unsubscribe when the client goes away before the stream starts
+    response.call_on_close(subscription.close)
+    return response
@@ -1,4 +1,6 @@
 import os
+from contextlib import asynccontextmanager
+from postgrest import AsyncPostgrestClient
 from supabase import create_client, Client
 from app.config import get_config
 
@@ -31,6 +33,33 @@ def get_supabase_admin_client() -> Client:
     
     return create_client(url, service_key)
 
+@asynccontextmanager
+async def async_supabase_admin():
+    """
+    Get an async PostgREST client using the service role key.
+    Flask runs every async view in its own event loop, so a client is opened
+    per request and closed when the block exits.
+    """
+    url = config.SUPABASE_URL
+    service_key = config.SUPABASE_SERVICE_KEY
+    
+    if not url or not service_key:
+        raise ValueError("Supabase URL and service key must be set in environment variables")
+    
+    client = AsyncPostgrestClient(
+        f"{url}/rest/v1",
+        headers={
+            'apikey': service_key,
+            'Authorization': f"Bearer {service_key}",
+            'Accept': 'application/json',
+            'Content-Type': 'application/json'
+        }
+    )
+    try:
+        yield client
+    finally:
+        await client.aclose()
+
 # Default clients
 supabase = get_supabase_client()
 supabase_admin = get_supabase_admin_client() 
\ No newline at end of file
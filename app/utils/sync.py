@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+from app.utils.cursor import encode_cursor, decode_cursor
+from app.utils.query import select
+from app.config import get_config
+
+config = get_config()
+
+def parse_since(since):
+    """Return the updated_at watermark stored in a sync cursor. Raises ValueError if invalid."""
+    watermark = decode_cursor(since, 'updated_at')['updated_at']
+    try:
+        datetime.fromisoformat(watermark)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid cursor: {since}")
+    return watermark
+
+def sync_cursor(rows, since=None):
+    """Return the cursor for the newest updated_at among rows, or echo since when nothing newer changed."""
+    watermark = max((row['updated_at'] for row in rows if row.get('updated_at')), key=datetime.fromisoformat, default=None)
+    if watermark is None or (since and datetime.fromisoformat(watermark) <= datetime.fromisoformat(parse_since(since))):
+        return since
+    return encode_cursor({'updated_at': watermark})
+
+def get_changes(client, model, user_id, since):
+    """
+    Fetch a user's rows of a soft-deleted table that changed after a sync cursor.
+    Returns (changed rows as dicts, ids deleted since the cursor, next cursor).
+    
+    updated_at is stamped by app servers before the row commits, so a row can become visible after
+    one with a later stamp was already synced. Rows from SYNC_SAFETY_WINDOW seconds before the cursor
+    are therefore sent again; clients apply changes and deletions by id, so repeats are harmless.
+    """
+    watermark = datetime.fromisoformat(parse_since(since)) - timedelta(seconds=config.SYNC_SAFETY_WINDOW)
+    response = select(client, model, 'sync')\
+        .eq('user_id', user_id)\
+        .gt('updated_at', watermark.isoformat())\
+        .order('updated_at')\
+        .execute()
+    
+    changed, deleted = [], []
+    for row in response.data:
+        if row.get('deleted_at'):
+            deleted.append(row['id'])
+        else:
+            row.pop('deleted_at', None)
+            changed.append(model.row_to_dict(row))
+    
+    return changed, deleted, sync_cursor(response.data, since)
@@ -0,0 +1,15 @@
+from datetime import datetime, timezone
+
+def parse_timestamp(value):
+    """
+    Parse an ISO 8601 timestamp as returned by PostgREST into an aware datetime.
+    Naive timestamps are taken to be UTC.
+    """
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+def to_epoch(value):
+    """Convert an ISO 8601 timestamp to integer seconds since the epoch."""
+    return int(parse_timestamp(value).timestamp())
@@ -0,0 +1,196 @@
+from abc import ABC, abstractmethod
+import csv
+import heapq
+import math
+import mmap
+import os
+import struct
+from app.utils.geo import KM_PER_DEGREE
+from app.utils.recurrence import parse_departure
+from app.config import get_config
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+config = get_config()
+
+# Zone matrix file: a fixed header, then one uint16 minutes value per (bucket, origin zone, destination zone)
+MATRIX_MAGIC = b'OTMZTT01'
+MATRIX_HEADER = struct.Struct('<8s3d4I')  # magic, min_lat, min_lng, cell_degrees, rows, cols, buckets, bucket_minutes
+UNKNOWN_MINUTES = 0xFFFF
+
+def departure_minute(departure):
+    """
+    Return the minute of the day of a departure, a datetime or ISO 8601 string, or None when not given or unreadable.
+    Timezone-aware departures count in local time, as parse_departure reads them, like the naive times schedules pass.
+    """
+    if not departure:
+        return None
+    if isinstance(departure, str):
+        try:
+            departure = parse_departure(departure)
+        except ValueError:
+            return None
+    elif departure.tzinfo is not None:
+        departure = departure.astimezone().replace(tzinfo=None)
+    return departure.hour * 60 + departure.minute
+
+class TravelTimeEstimator(ABC):
+    """
+    Estimate the driving minutes of a route. Implementations get the start and end coordinates,
+    their great-circle distance_km, and the departure (datetime, ISO 8601 string or None).
+    """
+    
+    name = 'base'
+    
+    @abstractmethod
+    def estimate_minutes(self, start_lat, start_lng, end_lat, end_lng, distance_km, departure=None):
+        pass
+
+class ConstantSpeedEstimator(TravelTimeEstimator):
+    """Great-circle distance at a constant average speed."""
+    
+    name = 'constant'
+    
+    def __init__(self, speed_kmh):
+        self.speed_kmh = speed_kmh
+    
+    def estimate_minutes(self, start_lat, start_lng, end_lat, end_lng, distance_km, departure=None):
+        return int(distance_km / self.speed_kmh * 60)
+
+class ZoneMatrixEstimator(TravelTimeEstimator):
+    """
+    Look up driving minutes in a precomputed zone-to-zone matrix per time-of-day bucket.
+    
+    Zones are the cells of a grid over the covered area. The matrix file is memory-mapped read-only,
+    so worker processes share its pages through the OS page cache instead of each loading a copy,
+    and a lookup is two grid divisions and one array index. Trips within one zone, outside the grid,
+    between unconnected zones or without a departure time are estimated by the fallback.
+    """
+    
+    name = 'zone_matrix'
+    
+    def __init__(self, path, fallback):
+        self.path = path
+        self.fallback = fallback
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.min_lat, self.min_lng, self.cell_degrees, self.rows, self.cols, self.buckets, self.bucket_minutes = \
+            MATRIX_HEADER.unpack_from(self._mmap, 0)
+        if magic != MATRIX_MAGIC:
+            raise ValueError(f"{path} is not a zone travel time matrix")
+        self.zones = self.rows * self.cols
+        self._minutes = memoryview(self._mmap)[MATRIX_HEADER.size:].cast('H')
+        if len(self._minutes) != self.buckets * self.zones * self.zones:
+            raise ValueError(f"{path} is truncated")
+    
+    def zone(self, lat, lng):
+        """Return the zone index of a point, or None outside the grid."""
+        row = math.floor((lat - self.min_lat) / self.cell_degrees)
+        col = math.floor((lng - self.min_lng) / self.cell_degrees)
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return row * self.cols + col
+        return None
+    
+    def estimate_minutes(self, start_lat, start_lng, end_lat, end_lng, distance_km, departure=None):
+        origin, destination = self.zone(start_lat, start_lng), self.zone(end_lat, end_lng)
+        minute = departure_minute(departure)
+        if origin is not None and destination is not None and origin != destination and minute is not None:
+            bucket = (minute // self.bucket_minutes) % self.buckets
+            minutes = self._minutes[(bucket * self.zones + origin) * self.zones + destination]
+            if minutes != UNKNOWN_MINUTES:
+                return minutes
+        return self.fallback.estimate_minutes(start_lat, start_lng, end_lat, end_lng, distance_km, departure)
+
+def load_road_graph(path, buckets):
+    """
+    Read a road graph CSV with columns from_id, from_lat, from_lng, to_id, to_lat, to_lng, length_m,
+    speed_kmh and optionally oneway (1/0) and speed_kmh_0 .. speed_kmh_<buckets-1> per time-of-day bucket.
+    Returns (nodes, edges): node id -> (lat, lng), and node id -> [(node id, minutes per bucket)].
+    """
+    nodes = {}
+    edges = {}
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            nodes[row['from_id']] = (float(row['from_lat']), float(row['from_lng']))
+            nodes[row['to_id']] = (float(row['to_lat']), float(row['to_lng']))
+            length_km = float(row['length_m']) / 1000
+            speeds = [float(row.get(f'speed_kmh_{bucket}') or row['speed_kmh']) for bucket in range(buckets)]
+            minutes = [length_km / speed * 60 for speed in speeds]
+            edges.setdefault(row['from_id'], []).append((row['to_id'], minutes))
+            if row.get('oneway', '0') not in ('1', 'true', 'yes'):
+                edges.setdefault(row['to_id'], []).append((row['from_id'], minutes))
+    return nodes, edges
+
+def build_zone_matrix(graph_path, out_path, min_lat, min_lng, max_lat, max_lng, cell_km, bucket_minutes=180):
+    """
+    Build a zone travel time matrix file from a road graph CSV (see load_road_graph), offline.
+    Each zone is represented by the graph node nearest its centre; the minutes between two zones are
+    the shortest path between their nodes, per time-of-day bucket. Returns the number of zones.
+    """
+    buckets = 24 * 60 // bucket_minutes
+    cell_degrees = cell_km / KM_PER_DEGREE
+    rows = max(1, math.ceil((max_lat - min_lat) / cell_degrees))
+    cols = max(1, math.ceil((max_lng - min_lng) / cell_degrees))
+    zones = rows * cols
+    nodes, edges = load_road_graph(graph_path, buckets)
+    
+    # The node nearest each zone centre stands for the zone
+    zone_nodes = {}
+    best = {}
+    for node_id, (lat, lng) in nodes.items():
+        row, col = math.floor((lat - min_lat) / cell_degrees), math.floor((lng - min_lng) / cell_degrees)
+        if 0 <= row < rows and 0 <= col < cols:
+            zone = row * cols + col
+            centre = (min_lat + (row + 0.5) * cell_degrees, min_lng + (col + 0.5) * cell_degrees)
+            offset = (lat - centre[0]) ** 2 + (lng - centre[1]) ** 2
+            if zone not in best or offset < best[zone]:
+                best[zone], zone_nodes[zone] = offset, node_id
+    node_zone = {node_id: zone for zone, node_id in zone_nodes.items()}
+    logger.info(f"Building {rows}x{cols} zone matrix, {len(zone_nodes)} zones on the road graph, {buckets} buckets")
+    
+    matrix = bytearray(struct.pack('<H', UNKNOWN_MINUTES) * (buckets * zones * zones))
+    cells = memoryview(matrix).cast('H')
+    for bucket in range(buckets):
+        for origin, source in zone_nodes.items():
+            # Dijkstra from the origin zone's node
+            times = {source: 0.0}
+            heap = [(0.0, source)]
+            while heap:
+                elapsed, node_id = heapq.heappop(heap)
+                if elapsed > times[node_id]:
+                    continue
+                for next_id, minutes in edges.get(node_id, ()):
+                    candidate = elapsed + minutes[bucket]
+                    if candidate < times.get(next_id, math.inf):
+                        times[next_id] = candidate
+                        heapq.heappush(heap, (candidate, next_id))
+            
+            base = (bucket * zones + origin) * zones
+            for node_id, elapsed in times.items():
+                destination = node_zone.get(node_id)
+                if destination is not None and destination != origin:
+                    cells[base + destination] = min(round(elapsed), UNKNOWN_MINUTES - 1)
+    
+    # Write next to the target and rename, so running workers never map a half-written file
+    partial_path = f"{out_path}.partial"
+    with open(partial_path, 'wb') as f:
+        f.write(MATRIX_HEADER.pack(MATRIX_MAGIC, min_lat, min_lng, cell_degrees, rows, cols, buckets, bucket_minutes))
+        f.write(matrix)
+    os.replace(partial_path, out_path)
+    return zones
+
+def create_estimator():
+    """Build the travel time estimator described by the TRAVEL_TIME_* settings."""
+    fallback = ConstantSpeedEstimator(config.TRAVEL_TIME_AVERAGE_SPEED_KMH)
+    if config.TRAVEL_TIME_ESTIMATOR == 'zone_matrix':
+        try:
+            estimator = ZoneMatrixEstimator(config.TRAVEL_TIME_MATRIX_PATH, fallback)
+            logger.info(f"Loaded {estimator.rows}x{estimator.cols} zone travel time matrix from {estimator.path}")
+            return estimator
+        except (OSError, ValueError) as e:
+            logger.error(f"Cannot load travel time matrix, using constant speed: {str(e)}")
+    return fallback
+
+travel_time_estimator = create_estimator()
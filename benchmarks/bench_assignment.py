@@ -0,0 +1,86 @@
+"""
+Benchmark batch assignment of pending ride requests to trips, e.g. shuttles to a campus event.
+
+    python benchmarks/bench_assignment.py --trips 500 --requests 3000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.assignment import assign_requests
+
+CAMPUS = (12.9716, 77.5946)
+SPREAD = 0.2  # degrees, roughly 20 km either way
+
+def make_data(trip_count, request_count, rng):
+    """Trips from around the city to the campus, each request asking for a random trip."""
+    trips = []
+    for i in range(trip_count):
+        trips.append({
+            'id': f"trip-{i}",
+            'start_latitude': CAMPUS[0] + rng.uniform(-SPREAD, SPREAD),
+            'start_longitude': CAMPUS[1] + rng.uniform(-SPREAD, SPREAD),
+            'end_latitude': CAMPUS[0],
+            'end_longitude': CAMPUS[1],
+            'start_time': f"2030-03-20T{8 + i % 3:02d}:{rng.randrange(60):02d}:00+00:00",
+            'available_seats': rng.choice([3, 4, 6])
+        })
+    
+    requests = []
+    for i in range(request_count):
+        trip = rng.choice(trips)
+        fraction = rng.uniform(0, 0.8)
+        requests.append({
+            'id': f"request-{i}",
+            'trip_id': trip['id'],
+            # Pickups near some point on the way in, dropoff at the campus
+            'pickup_latitude': trip['start_latitude'] + (CAMPUS[0] - trip['start_latitude']) * fraction + rng.gauss(0, 0.01),
+            'pickup_longitude': trip['start_longitude'] + (CAMPUS[1] - trip['start_longitude']) * fraction + rng.gauss(0, 0.01),
+            'dropoff_latitude': CAMPUS[0] + rng.gauss(0, 0.002),
+            'dropoff_longitude': CAMPUS[1] + rng.gauss(0, 0.002),
+            'seats_requested': rng.choice([1, 1, 1, 2])
+        })
+    return trips, requests
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trips', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--corridor-km', type=float, default=2.0)
+    parser.add_argument('--max-detour-km', type=float, default=5.0)
+    parser.add_argument('--max-trip-detour-km', type=float, default=10.0)
+    parser.add_argument('--tolerance-min', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    
+    trips, requests = make_data(args.trips, args.requests, random.Random(args.seed))
+    capacity = sum(trip['available_seats'] for trip in trips)
+    requested = sum(request['seats_requested'] for request in requests)
+    seats = {request['id']: request['seats_requested'] for request in requests}
+    
+    # Baseline: first come, first served on the requested trip only
+    free = {trip['id']: trip['available_seats'] for trip in trips}
+    baseline = 0
+    for request in requests:
+        if free[request['trip_id']] >= request['seats_requested']:
+            free[request['trip_id']] -= request['seats_requested']
+            baseline += request['seats_requested']
+    
+    started = time.perf_counter()
+    assignments, unassigned = assign_requests(
+        trips, requests, {}, args.corridor_km, args.max_detour_km, args.max_trip_detour_km, args.tolerance_min * 60
+    )
+    elapsed = time.perf_counter() - started
+    
+    filled = sum(seats[request_id] for request_id in assignments)
+    moved = sum(1 for request_id, (trip_id, _) in assignments.items() if trip_id != requests[int(request_id.split('-')[1])]['trip_id'])
+    print(f"{len(trips)} trips ({capacity} seats), {len(requests)} requests ({requested} seats)")
+    print(f"Requested trip only: {baseline} seats filled")
+    print(f"Optimizer:           {filled} seats filled, {moved} passengers moved, {len(unassigned)} unassigned, {elapsed * 1000:.0f} ms")
+
+if __name__ == '__main__':
+    main()
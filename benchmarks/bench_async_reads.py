@@ -0,0 +1,59 @@
+"""
+Compare requests per second of the sync and async read paths.
+
+Runs against the Supabase project configured in .env, so use a staging project:
+
+    python benchmarks/bench_async_reads.py --user-id <uuid> --requests 200 --concurrency 8
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app
+from app.utils.auth import generate_access_token
+
+ENDPOINTS = [
+    '/api/trips/upcoming',
+    '/api/ride-requests?is_driver=true',
+    '/api/ratings',
+]
+
+def run(app, path, headers, total, concurrency):
+    """Issue total GET requests with the given concurrency and return requests per second."""
+    def hit(_):
+        with app.test_client() as client:
+            return client.get(path, headers=headers).status_code
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        statuses = list(executor.map(hit, range(total)))
+    elapsed = time.perf_counter() - start
+    
+    errors = sum(1 for status in statuses if status != 200)
+    return total / elapsed, errors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--user-id', required=True)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+    
+    app = create_app()
+    headers = {'Authorization': f"Bearer {generate_access_token(args.user_id)}"}
+    
+    print(f"{'endpoint':40} {'sync rps':>10} {'async rps':>10} {'speedup':>8}")
+    for path in ENDPOINTS:
+        app.config['ASYNC_READS_ENABLED'] = False
+        sync_rps, sync_errors = run(app, path, headers, args.requests, args.concurrency)
+        app.config['ASYNC_READS_ENABLED'] = True
+        async_rps, async_errors = run(app, path, headers, args.requests, args.concurrency)
+        print(f"{path:40} {sync_rps:10.1f} {async_rps:10.1f} {async_rps / sync_rps:7.2f}x"
+              + (f"  ({sync_errors} sync / {async_errors} async errors)" if sync_errors or async_errors else ''))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Compare the driver dashboard endpoint with the four calls the home screen used to make.
+
+Runs against the Supabase project configured in .env, so use a staging project:
+
+    python benchmarks/bench_dashboard.py --user-id <uuid> --iterations 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app
+from app.utils.auth import generate_access_token
+
+SEPARATE_ENDPOINTS = [
+    '/api/trips/upcoming?role=driver',
+    '/api/trips/stats',
+    '/api/ride-requests?is_driver=true',
+    '/api/vehicles',
+]
+DASHBOARD_ENDPOINT = '/api/dashboard/driver'
+
+def timed_get(app, path, headers):
+    """Issue one GET and return (milliseconds, response size in bytes)."""
+    with app.test_client() as client:
+        start = time.perf_counter()
+        response = client.get(path, headers=headers)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+    if response.status_code != 200:
+        raise RuntimeError(f"{path} returned {response.status_code}")
+    return elapsed_ms, len(response.get_data())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--user-id', required=True)
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+    
+    app = create_app()
+    headers = {'Authorization': f"Bearer {generate_access_token(args.user_id)}"}
+    
+    sequential, parallel, dashboard = [], [], []
+    separate_bytes = dashboard_bytes = 0
+    with ThreadPoolExecutor(max_workers=len(SEPARATE_ENDPOINTS)) as executor:
+        for _ in range(args.iterations):
+            # The four calls one after another, as a client on one connection would
+            timings = [timed_get(app, path, headers) for path in SEPARATE_ENDPOINTS]
+            sequential.append(sum(ms for ms, _ in timings))
+            separate_bytes = sum(size for _, size in timings)
+            
+            # The four calls at once, the best case for a client
+            start = time.perf_counter()
+            list(executor.map(lambda path: timed_get(app, path, headers), SEPARATE_ENDPOINTS))
+            parallel.append((time.perf_counter() - start) * 1000)
+            
+            ms, dashboard_bytes = timed_get(app, DASHBOARD_ENDPOINT, headers)
+            dashboard.append(ms)
+    
+    print(f"{'variant':28} {'p50 ms':>8} {'p95 ms':>8} {'bytes':>8}")
+    for label, samples, size in [('4 calls, sequential', sequential, separate_bytes),
+                                 ('4 calls, parallel', parallel, separate_bytes),
+                                 ('dashboard', dashboard, dashboard_bytes)]:
+        samples = sorted(samples)
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        print(f"{label:28} {statistics.median(samples):8.1f} {p95:8.1f} {size:8d}")
+
+if __name__ == '__main__':
+    main()
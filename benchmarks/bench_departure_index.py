@@ -0,0 +1,90 @@
+"""
+Benchmark departure-window queries on the upcoming trip index.
+
+Compares scanning every upcoming trip and comparing ISO start times, as the scheduled-trip filters do,
+with the time-bucketed UpcomingTripIndex, for narrow windows, for a window plus a search radius,
+and for expiring departed trips.
+
+    python benchmarks/bench_departure_index.py --trips 50000 --queries 2000 --window-hours 2
+"""
+import argparse
+from datetime import datetime, timedelta
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.departures import UpcomingTripIndex
+from app.utils.timestamps import to_epoch
+
+CENTER = (12.9716, 77.5946)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trips', type=int, default=50000)
+    parser.add_argument('--days', type=int, default=14, help='departures spread over this many days')
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--window-hours', type=float, default=2.0)
+    parser.add_argument('--radius-km', type=float, default=5.0)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    base = datetime(2030, 1, 1)
+    trips = []
+    for i in range(args.trips):
+        trips.append({
+            'id': f"trip-{i}",
+            'driver_id': f"driver-{i % 5000}",
+            'start_latitude': CENTER[0] + rng.uniform(-0.2, 0.2),
+            'start_longitude': CENTER[1] + rng.uniform(-0.2, 0.2),
+            'end_latitude': CENTER[0] + rng.uniform(-0.2, 0.2),
+            'end_longitude': CENTER[1] + rng.uniform(-0.2, 0.2),
+            'start_time': (base + timedelta(seconds=rng.randrange(args.days * 86400))).isoformat()
+        })
+    
+    started = time.perf_counter()
+    index = UpcomingTripIndex(2.0, 3600)
+    for trip in trips:
+        index.add(trip)
+    print(f"build: {len(index)} trips in {(time.perf_counter() - started) * 1000:.1f} ms")
+    
+    windows = []
+    for _ in range(args.queries):
+        window_start = base + timedelta(seconds=rng.randrange(args.days * 86400))
+        windows.append((window_start, window_start + timedelta(hours=args.window_hours)))
+    
+    started = time.perf_counter()
+    scanned = 0
+    for window_start, window_end in windows:
+        after, before = window_start.isoformat(), window_end.isoformat()
+        scanned += sum(1 for trip in trips if after <= trip['start_time'] <= before)
+    scan_s = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    found = 0
+    for window_start, window_end in windows:
+        found += len(index.departing(to_epoch(window_start.isoformat()), to_epoch(window_end.isoformat())))
+    index_s = time.perf_counter() - started
+    assert found == scanned
+    print(f"window: {args.queries} queries, scan {scan_s / args.queries * 1000:.3f} ms/query, "
+          f"index {index_s / args.queries * 1000:.3f} ms/query ({scan_s / index_s:.0f}x), {found / args.queries:.0f} trips/query")
+    
+    started = time.perf_counter()
+    near = 0
+    for window_start, window_end in windows:
+        lat, lng = CENTER[0] + rng.uniform(-0.1, 0.1), CENTER[1] + rng.uniform(-0.1, 0.1)
+        near += len(index.near(lat, lng, args.radius_km, to_epoch(window_start.isoformat()), to_epoch(window_end.isoformat())))
+    print(f"window + radius: {(time.perf_counter() - started) / args.queries * 1000:.3f} ms/query, "
+          f"{near / args.queries:.0f} candidates/query")
+    
+    started = time.perf_counter()
+    expired = 0
+    for day in range(1, args.days + 1):
+        expired += index.expire(to_epoch((base + timedelta(days=day)).isoformat()))
+    print(f"expire: {expired} trips over {args.days} daily sweeps in {(time.perf_counter() - started) * 1000:.1f} ms, {len(index)} left")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark JSON serialization of trip search results with the stdlib and orjson providers.
+
+    python benchmarks/bench_json.py --trips 1000
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from app.utils.json_provider import FastJSONProvider
+
+def make_search_results(count):
+    """Build a /api/trips/search/enriched style payload."""
+    departure = datetime(2030, 3, 20, 10, 0)
+    return {
+        'success': True,
+        'trips': [{
+            'id': f"5f0c6f1e-0000-4000-8000-{i:012d}",
+            'driver': {
+                'id': f"driver-{i % 100}",
+                'name': 'Jane Driver',
+                'profile_image_url': 'https://example.com/avatars/jane.png',
+                'institute': 'Example University'
+            },
+            'departure_time': departure + timedelta(minutes=i),
+            'price': Decimal('15.50'),
+            'available_seats': 3,
+            'distance': f"{i % 10}.4 km"
+        } for i in range(count)]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trips', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    
+    payload = make_search_results(args.trips)
+    
+    app = Flask(__name__)
+    stdlib = DefaultJSONProvider(app)
+    stdlib.default = FastJSONProvider.default
+    
+    app.config['JSON_USE_ORJSON'] = False
+    fallback = FastJSONProvider(app)
+    app.config['JSON_USE_ORJSON'] = True
+    fast = FastJSONProvider(app)
+    
+    print(f"Serializing {args.trips} search results")
+    for label, fn in [
+        ('DefaultJSONProvider.dumps', lambda: stdlib.dumps(payload).encode('utf-8')),
+        ('FastJSONProvider (stdlib fallback)', lambda: fallback.dumps_bytes(payload)),
+        ('FastJSONProvider (orjson)', lambda: fast.dumps_bytes(payload)),
+    ]:
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        print(f"{label:36} {best * 1000:8.2f} ms {len(fn()):9d} bytes")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark live location ingestion into the per-trip ring buffers.
+
+Simulates drivers sending pings every second from many concurrent trips, in request-sized
+batches, and measures ingestion and latest-position read rates on one worker.
+
+    python benchmarks/bench_live_location.py --trips 500 --pings 200000 --batch 5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.live_location import LiveLocationStore
+
+CENTER = (12.9716, 77.5946)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trips', type=int, default=500)
+    parser.add_argument('--pings', type=int, default=200000)
+    parser.add_argument('--batch', type=int, default=5, help='pings per request')
+    parser.add_argument('--buffer', type=int, default=256)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    store = LiveLocationStore(args.buffer, sample=True)
+    tracks = [store.start(f"trip-{i}", f"driver-{i}", [f"passenger-{i}"]) for i in range(args.trips)]
+    positions = [[CENTER[0] + rng.uniform(-0.2, 0.2), CENTER[1] + rng.uniform(-0.2, 0.2), 0.0] for _ in tracks]
+    
+    requests = []
+    for _ in range(args.pings // args.batch):
+        i = rng.randrange(args.trips)
+        batch = []
+        for _ in range(args.batch):
+            position = positions[i]
+            position[0] += rng.uniform(-0.0002, 0.0002)
+            position[1] += rng.uniform(-0.0002, 0.0002)
+            position[2] += 1.0
+            batch.append((position[2], position[0], position[1]))
+        requests.append((tracks[i], batch))
+    
+    started = time.perf_counter()
+    for track, batch in requests:
+        store.record(track, batch)
+    elapsed = time.perf_counter() - started
+    pings = len(requests) * args.batch
+    print(f"ingest: {pings} pings in {elapsed * 1000:.1f} ms ({pings / elapsed:,.0f} pings/s, "
+          f"{len(requests) / elapsed:,.0f} batches/s), {len(store.take_samples())} samples queued for persistence")
+    
+    reads = 100000
+    started = time.perf_counter()
+    for k in range(reads):
+        store.get(f"trip-{k % args.trips}").ring.latest()
+    elapsed = time.perf_counter() - started
+    print(f"latest: {reads} reads in {elapsed * 1000:.1f} ms ({reads / elapsed:,.0f} reads/s)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark corridor matching against synthetic trips around a city.
+
+Compares scoring every trip with scoring only the CorridorIndex candidates.
+
+    python benchmarks/bench_matching.py --trips 5000 --queries 500
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.spatial import CorridorIndex, score_corridor_match
+
+CENTER = (12.9716, 77.5946)
+SPREAD = 0.25  # degrees, roughly 25 km either way
+
+def random_point(rng):
+    return (CENTER[0] + rng.uniform(-SPREAD, SPREAD), CENTER[1] + rng.uniform(-SPREAD, SPREAD))
+
+def make_trips(count, rng):
+    """Build trip dicts shaped like the 'card' projection."""
+    trips = []
+    for i in range(count):
+        start, end = random_point(rng), random_point(rng)
+        trips.append({
+            'id': f"trip-{i}",
+            'start_latitude': start[0],
+            'start_longitude': start[1],
+            'end_latitude': end[0],
+            'end_longitude': end[1]
+        })
+    return trips
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trips', type=int, default=5000)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--corridor-km', type=float, default=2.0)
+    parser.add_argument('--max-detour-km', type=float, default=5.0)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    trips = make_trips(args.trips, rng)
+    queries = [(random_point(rng), random_point(rng)) for _ in range(args.queries)]
+    
+    started = time.perf_counter()
+    index = CorridorIndex(args.corridor_km)
+    for trip in trips:
+        index.add(trip)
+    build_ms = (time.perf_counter() - started) * 1000
+    print(f"Indexed {len(index)} trips into {len(index.cells)} cells in {build_ms:.1f} ms")
+    
+    def run(label, candidates_for):
+        timings, found, scanned = [], 0, 0
+        for pickup, dropoff in queries:
+            started = time.perf_counter()
+            candidates = candidates_for(pickup, dropoff)
+            matches = [trip for trip in candidates
+                       if score_corridor_match(trip, pickup, dropoff, args.corridor_km, args.max_detour_km)]
+            timings.append((time.perf_counter() - started) * 1000)
+            found += len(matches)
+            scanned += len(candidates)
+        timings.sort()
+        print(f"{label:12} mean {sum(timings) / len(timings):7.3f} ms  p95 {timings[int(len(timings) * 0.95)]:7.3f} ms  "
+              f"scored {scanned / len(queries):8.1f}/query  matches {found}")
+        return found
+    
+    brute = run('full scan', lambda pickup, dropoff: trips)
+    indexed = run('index', lambda pickup, dropoff: index.candidates(pickup[0], pickup[1], dropoff[0], dropoff[1]))
+    if brute != indexed:
+        print(f"WARNING: index found {indexed} matches, full scan found {brute}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Micro-benchmark for converting rows to response dictionaries.
+
+    python benchmarks/bench_models.py --rows 10000
+"""
+import argparse
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.models.trip import Trip
+
+def make_rows(count):
+    """Build trip rows shaped like a PostgREST response for the full projection."""
+    return [{
+        'id': f"trip-{i}",
+        'driver_id': f"driver-{i % 100}",
+        'vehicle_id': f"vehicle-{i % 100}",
+        'start_latitude': 37.7749,
+        'start_longitude': -122.4194,
+        'start_address': 'San Francisco, CA',
+        'end_latitude': 37.3352,
+        'end_longitude': -121.8811,
+        'end_address': 'San Jose, CA',
+        'start_time': '2030-03-20T10:00:00+00:00',
+        'end_time': None,
+        'status': 'scheduled',
+        'available_seats': 3,
+        'price': 15.5,
+        'description': '',
+        'created_at': '2030-03-01T10:00:00+00:00',
+        'updated_at': '2030-03-01T10:00:00+00:00'
+    } for i in range(count)]
+
+def measure(label, fn, repeat):
+    best = min(timeit.repeat(fn, number=1, repeat=repeat))
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:36} {best * 1000:9.2f} ms {peak / 1024:10.0f} KiB peak")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    
+    rows = make_rows(args.rows)
+    partial_rows = [{k: v for k, v in row.items() if k != 'description'} for row in rows]
+    
+    print(f"Converting {args.rows} trip rows")
+    measure('from_dict().to_dict()', lambda: [Trip.from_dict(row).to_dict() for row in rows], args.repeat)
+    measure('row_to_dict() pass-through', lambda: [Trip.row_to_dict(row) for row in rows], args.repeat)
+    measure('row_to_dict() partial rows', lambda: [Trip.row_to_dict(row) for row in partial_rows], args.repeat)
+    measure('from_dict() objects only', lambda: [Trip.from_dict(row) for row in rows], args.repeat)
+
+if __name__ == '__main__':
+    main()
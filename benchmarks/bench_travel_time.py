@@ -0,0 +1,105 @@
+"""
+Benchmark the zone matrix travel time estimator.
+
+Writes a synthetic road grid (arterials every few blocks, slower in the rush-hour buckets) as a road
+graph CSV, builds the matrix from it as `flask build-travel-matrix` would, then maps the file and
+measures estimate_minutes against the constant speed estimator.
+
+    python benchmarks/bench_travel_time.py --blocks 60 --cell-km 1.0 --lookups 200000
+"""
+import argparse
+import csv
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.geo import KM_PER_DEGREE
+from app.utils.travel_time import ConstantSpeedEstimator, ZoneMatrixEstimator, build_zone_matrix
+
+CENTER = (12.9716, 77.5946)
+BLOCK_KM = 0.25
+
+def write_grid_graph(path, blocks, bucket_minutes, rng):
+    """Write a blocks x blocks street grid; every fifth street is an arterial, all roads slow down at rush hour."""
+    buckets = 24 * 60 // bucket_minutes
+    rush = {
+        bucket for bucket in range(buckets)
+        if any(minute // 60 in (8, 17) for minute in range(bucket * bucket_minutes, (bucket + 1) * bucket_minutes))
+    }
+    step = BLOCK_KM / KM_PER_DEGREE
+    origin = (CENTER[0] - blocks * step / 2, CENTER[1] - blocks * step / 2)
+    
+    def node(row, col):
+        return f"{row}:{col}", origin[0] + row * step, origin[1] + col * step
+    
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['from_id', 'from_lat', 'from_lng', 'to_id', 'to_lat', 'to_lng', 'length_m', 'speed_kmh'] +
+                        [f'speed_kmh_{bucket}' for bucket in range(buckets)])
+        edges = 0
+        for row in range(blocks):
+            for col in range(blocks):
+                for next_row, next_col, street in ((row + 1, col, col), (row, col + 1, row)):
+                    if next_row >= blocks or next_col >= blocks:
+                        continue
+                    speed = 50.0 if street % 5 == 0 else 25.0
+                    speeds = [speed * (0.5 if bucket in rush else 1.0) * rng.uniform(0.9, 1.1) for bucket in range(buckets)]
+                    writer.writerow([*node(row, col), *node(next_row, next_col), BLOCK_KM * 1000, speed] +
+                                    [f"{s:.1f}" for s in speeds])
+                    edges += 1
+    return origin, (origin[0] + blocks * step, origin[1] + blocks * step), edges
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--blocks', type=int, default=60, help='streets per side of the grid')
+    parser.add_argument('--cell-km', type=float, default=1.0)
+    parser.add_argument('--bucket-minutes', type=int, default=180)
+    parser.add_argument('--lookups', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp(prefix='travel-time-')
+    graph_path = os.path.join(workdir, 'roads.csv')
+    matrix_path = os.path.join(workdir, 'matrix.bin')
+    low, high, edges = write_grid_graph(graph_path, args.blocks, args.bucket_minutes, rng)
+    
+    started = time.perf_counter()
+    zones = build_zone_matrix(graph_path, matrix_path, low[0], low[1], high[0], high[1], args.cell_km, args.bucket_minutes)
+    print(f"build: {edges} road segments, {zones} zones in {time.perf_counter() - started:.1f}s, "
+          f"{os.path.getsize(matrix_path) / 1e6:.1f} MB on disk")
+    
+    constant = ConstantSpeedEstimator(40.0)
+    started = time.perf_counter()
+    matrix = ZoneMatrixEstimator(matrix_path, constant)
+    print(f"load: mapped in {(time.perf_counter() - started) * 1000:.2f} ms")
+    
+    queries = []
+    for _ in range(args.lookups):
+        start = (rng.uniform(low[0], high[0]), rng.uniform(low[1], high[1]))
+        end = (rng.uniform(low[0], high[0]), rng.uniform(low[1], high[1]))
+        distance = math.hypot(end[0] - start[0], (end[1] - start[1]) * math.cos(math.radians(start[0]))) * KM_PER_DEGREE
+        departure = f"2026-10-19T{rng.randrange(24):02d}:{rng.randrange(60):02d}:00"
+        queries.append((*start, *end, distance, departure))
+    
+    for estimator in (constant, matrix):
+        started = time.perf_counter()
+        total = 0
+        for query in queries:
+            total += estimator.estimate_minutes(*query)
+        elapsed = time.perf_counter() - started
+        print(f"{estimator.name}: {len(queries)} estimates in {elapsed * 1000:.1f} ms "
+              f"({len(queries) / elapsed:,.0f}/s), mean {total / len(queries):.1f} min")
+    
+    rush_hour = [query[:5] + ('2026-10-19T08:30:00',) for query in queries[:1000]]
+    night = [query[:5] + ('2026-10-19T02:30:00',) for query in queries[:1000]]
+    print(f"zone_matrix: mean {sum(matrix.estimate_minutes(*q) for q in rush_hour) / 1000:.1f} min at 08:30, "
+          f"{sum(matrix.estimate_minutes(*q) for q in night) / 1000:.1f} min at 02:30")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,291 @@
+"""
+Tests of the change feed consumer, driven through an in-process LocalFeed.
+
+The first tests use recording handlers to check how the consumer batches, drops and resyncs. The rest
+use the service handlers of ChangeFeedService, with the matching index rebuilt from a dict of trip rows
+instead of Supabase.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+import pytest
+from app.models.trip import Trip
+from app.services import trip_service
+from app.services.change_feed_service import ChangeFeedService
+from app.services.matching_service import MatchingService
+from app.services.rating_service import RatingService
+from app.services.ride_request_service import RideRequestService
+from app.services.trip_service import TripService
+from app.services.user_service import UserService
+from app.utils.change_feed import ChangeFeedConsumer, LocalFeed, TableHandler, feed_connected
+from app.utils.departures import UpcomingTripIndex
+from app.utils.events import event_bus
+from app.config import get_config
+
+config = get_config()
+
+def wait_for(predicate, timeout=5):
+    """Poll until predicate() is true; the consumer applies changes on its own threads."""
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError('Timed out waiting for the change feed consumer')
+        time.sleep(0.01)
+
+def trip_row(trip_id, status='scheduled', hours=24):
+    return {
+        'id': trip_id, 'driver_id': 'driver-1', 'vehicle_id': 'vehicle-1',
+        'start_latitude': 12.97, 'start_longitude': 77.59, 'start_address': 'MG Road',
+        'end_latitude': 12.93, 'end_longitude': 77.62, 'end_address': 'Koramangala',
+        'start_time': (datetime.now() + timedelta(hours=hours)).replace(microsecond=0).isoformat(),
+        'status': status, 'available_seats': 3, 'price': 50,
+        'updated_at': datetime.utcnow().isoformat()
+    }
+
+def ride_request_row(request_id, trip_id, status='pending'):
+    return {
+        'id': request_id, 'trip_id': trip_id, 'passenger_id': 'passenger-1', 'status': status,
+        'seats_requested': 1, 'updated_at': datetime.utcnow().isoformat()
+    }
+
+class Recorder:
+    """Handler recording the batches, resyncs and suspends the consumer hands to one table."""
+    
+    def __init__(self):
+        self.batches = []
+        self.resyncs = 0
+        self.suspends = 0
+    
+    def handler(self):
+        return TableHandler(self.batches.append, resync=self.resync, suspend=self.suspend)
+    
+    def resync(self):
+        self.resyncs += 1
+    
+    def suspend(self):
+        self.suspends += 1
+
+class Gate:
+    """Handler of a 'gate' table whose apply() holds the applier thread until opened, so changes pile up in the queue."""
+    
+    def __init__(self):
+        self.entered = threading.Event()
+        self.opened = threading.Event()
+    
+    def apply(self, changes):
+        self.entered.set()
+        self.opened.wait(5)
+    
+    def hold(self, feed):
+        feed.push('gate', 'INSERT', {'id': 'gate'})
+        assert self.entered.wait(5)
+
+class BulkUpdate:
+    """Stands in for supabase_admin in cascade_ride_requests: every update chain reports one affected row."""
+    
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+    
+    def execute(self):
+        return type('Response', (), {'count': 1})()
+
+@pytest.fixture
+def start_consumer():
+    """Start a consumer of a fresh LocalFeed; it is stopped after the test."""
+    consumers = []
+    
+    def start(handlers, **options):
+        feed = LocalFeed()
+        consumer = ChangeFeedConsumer(feed, handlers, **options).start()
+        consumers.append(consumer)
+        return feed, consumer
+    
+    yield start
+    for consumer in consumers:
+        consumer.stop(timeout=5)
+
+@pytest.fixture
+def trips_table(monkeypatch):
+    """Trip rows the matching index is rebuilt from on resync, standing in for the trips table."""
+    rows = {}
+    
+    def build_index():
+        index = UpcomingTripIndex(config.MATCH_CORRIDOR_KM, config.MATCH_DEPARTURE_BUCKET_SECONDS)
+        now = datetime.now().isoformat()
+        for trip in rows.values():
+            if trip['status'] == 'scheduled' and trip['start_time'] > now:
+                index.add({field: trip.get(field) for field in Trip.PROJECTIONS['card']})
+        return index
+    
+    monkeypatch.setattr(MatchingService, 'build_index', build_index)
+    monkeypatch.setattr(MatchingService, '_index', None)
+    monkeypatch.setattr(MatchingService, '_index_live', False)
+    yield rows
+    RatingService.reset_received_cache(False)
+    UserService.reset_summary_cache(False)
+
+def test_coalesces_changes_to_a_row(start_consumer):
+    trips, gate = Recorder(), Gate()
+    feed, consumer = start_consumer({'trips': trips.handler(), 'gate': TableHandler(gate.apply)})
+    wait_for(lambda: trips.resyncs == 1)
+    
+    gate.hold(feed)
+    feed.push('trips', 'INSERT', {'id': 't1', 'price': 10})
+    feed.push('trips', 'UPDATE', {'id': 't2', 'price': 5})
+    feed.push('trips', 'UPDATE', {'id': 't1', 'price': 11})
+    feed.push('trips', 'DELETE', old_record={'id': 't2'})
+    wait_for(lambda: consumer.queue.qsize() == 4)
+    gate.opened.set()
+    wait_for(lambda: trips.batches)
+    
+    # Only the latest change per row is applied, in the order those changes arrived
+    assert [(change.type, change.record.get('id') or change.old_record.get('id'), change.record.get('price'))
+            for change in trips.batches[0]] == [('UPDATE', 't1', 11), ('DELETE', 't2', None)]
+    stats = consumer.stats()
+    assert stats['coalesced'] == 2
+    assert stats['applied'] == 3  # the gate change and the two rows
+
+def test_full_queue_drops_changes_and_resyncs(start_consumer):
+    trips, gate = Recorder(), Gate()
+    feed, consumer = start_consumer({'trips': trips.handler(), 'gate': TableHandler(gate.apply)}, queue_size=2, put_timeout=0.01)
+    wait_for(lambda: trips.resyncs == 1)
+    
+    gate.hold(feed)
+    for i in range(5):
+        feed.push('trips', 'INSERT', {'id': f"t{i}"})
+    wait_for(lambda: consumer.stats()['dropped'] == 3)
+    assert consumer.stats()['queued'] == 2
+    
+    gate.opened.set()
+    wait_for(lambda: trips.resyncs == 2)
+    
+    # The changes still queued predate the resync, which already covers them
+    feed.push('trips', 'INSERT', {'id': 'after'})
+    wait_for(lambda: trips.batches)
+    assert [[change.record['id'] for change in batch] for batch in trips.batches] == [['after']]
+    assert consumer.stats()['queued'] == 0
+
+def test_disconnect_suspends_and_reconnect_resyncs(start_consumer):
+    trips = Recorder()
+    feed, consumer = start_consumer({'trips': trips.handler()})
+    wait_for(lambda: trips.resyncs == 1)
+    assert consumer.connected
+    
+    feed.disconnect()
+    wait_for(lambda: trips.suspends == 1)
+    assert trips.resyncs == 1
+    
+    # The consumer reconnects after its first backoff of one second
+    wait_for(lambda: trips.resyncs == 2)
+    assert consumer.connected
+    assert consumer.stats()['connects'] == 2
+
+def test_trip_changes_keep_the_matching_index_current(start_consumer, trips_table):
+    trips_table['t1'] = trip_row('t1')
+    trips_table['t2'] = trip_row('t2', status='cancelled')
+    feed, consumer = start_consumer(ChangeFeedService.build_handlers())
+    wait_for(lambda: MatchingService.get_live_index() is not None)
+    index = MatchingService.get_live_index()
+    assert index.get('t1') is not None
+    assert index.get('t2') is None
+    
+    with event_bus.subscribe('trip_status:t1') as subscription:
+        feed.push('trips', 'INSERT', trip_row('t3'))
+        feed.push('trips', 'UPDATE', trip_row('t1', status='cancelled'), {'id': 't1'})
+        feed.push('trips', 'INSERT', trip_row('t4', hours=-1))
+        wait_for(lambda: consumer.stats()['applied'] == 3)
+        
+        index = MatchingService.get_live_index()
+        assert index.get('t3') is not None
+        assert index.get('t1') is None
+        assert index.get('t4') is None  # already departed
+        
+        event = subscription.get(timeout=1)
+        assert event['type'] == 'trip.status'
+        assert event['status'] == 'cancelled'
+        assert event['ride_request_status'] == 'cancelled'
+
+def test_trip_index_resyncs_after_reconnect(start_consumer, trips_table):
+    trips_table['t1'] = trip_row('t1')
+    feed, consumer = start_consumer(ChangeFeedService.build_handlers())
+    wait_for(lambda: MatchingService.get_live_index() is not None)
+    
+    feed.disconnect()
+    wait_for(lambda: MatchingService.get_live_index() is None)
+    
+    # Changes made while disconnected are never delivered; the rebuild picks them up
+    trips_table['t1']['status'] = 'cancelled'
+    trips_table['t2'] = trip_row('t2')
+    wait_for(lambda: MatchingService.get_live_index() is not None)
+    index = MatchingService.get_live_index()
+    assert index.get('t1') is None
+    assert index.get('t2') is not None
+
+def test_ride_request_changes_reach_event_streams(start_consumer, trips_table):
+    feed, consumer = start_consumer(ChangeFeedService.build_handlers())
+    wait_for(lambda: consumer.connected and consumer.stats()['resyncs'] == 1)
+    
+    with event_bus.subscribe('trip:t1') as subscription:
+        feed.push('ride_requests', 'INSERT', ride_request_row('r1', 't1'))
+        assert subscription.get(timeout=5)['type'] == 'ride_request.created'
+        feed.push('ride_requests', 'DELETE', old_record={'id': 'r1'})
+        feed.push('ride_requests', 'UPDATE', ride_request_row('r2', 't1', status='accepted'))
+        event = subscription.get(timeout=5)
+        assert (event['type'], event['ride_request_id'], event['status']) == ('ride_request.status', 'r2', 'accepted')
+
+def test_rating_changes_evict_received_ratings(start_consumer, trips_table):
+    feed, consumer = start_consumer(ChangeFeedService.build_handlers())
+    wait_for(lambda: RatingService._received.enabled)
+    
+    cache = RatingService._received
+    cache.set('u1', [{'id': 'ra1', 'rated_user_id': 'u1', 'rating': 4}], cache.version())
+    cache.set('u2', [{'id': 'ra2', 'rated_user_id': 'u2', 'rating': 5}], cache.version())
+    feed.push('ratings', 'INSERT', {'id': 'ra3', 'rated_user_id': 'u1', 'rating': 2})
+    wait_for(lambda: 'u1' not in cache._entries)
+    assert cache.get('u2') is not None
+    
+    # A DELETE naming only the rating cannot be attributed to a user
+    feed.push('ratings', 'DELETE', old_record={'id': 'ra2'})
+    wait_for(lambda: len(cache) == 0)
+    
+    feed.disconnect()
+    wait_for(lambda: not cache.enabled)
+
+def test_user_changes_refresh_summaries(start_consumer, trips_table):
+    feed, consumer = start_consumer(ChangeFeedService.build_handlers())
+    wait_for(lambda: UserService._summaries.enabled)
+    
+    cache = UserService._summaries
+    cache.set('u1', {'id': 'u1', 'name': 'Asha', 'profile_image_url': None}, cache.version())
+    feed.push('users', 'UPDATE', {'id': 'u1', 'name': 'Asha R', 'profile_image_url': 'a.png', 'password_hash': 'x'})
+    wait_for(lambda: cache.get('u1')['name'] == 'Asha R')
+    assert cache.get('u1') == {'id': 'u1', 'name': 'Asha R', 'profile_image_url': 'a.png'}
+    
+    feed.push('users', 'DELETE', old_record={'id': 'u1'})
+    wait_for(lambda: cache.get('u1') is None)
+    
+    feed.disconnect()
+    wait_for(lambda: not cache.enabled)
+
+def test_services_publish_events_while_the_feed_is_down(start_consumer, monkeypatch):
+    monkeypatch.setattr(trip_service, 'supabase_admin', BulkUpdate())
+    request = ride_request_row('r1', 't1')
+    
+    def published():
+        RideRequestService.publish_event('ride_request.status', request)
+        TripService.cascade_ride_requests(['t1'], 'cancelled', request['updated_at'])
+        return [event and event['type'] for event in (requests.get(timeout=0.2), trips.get(timeout=0.2))]
+    
+    with event_bus.subscribe('trip:t1') as requests, event_bus.subscribe('trip_status:t1') as trips:
+        assert published() == ['ride_request.status', 'trip.status']
+        
+        # A connected feed delivers both changes itself
+        feed, consumer = start_consumer({'ride_requests': Recorder().handler(), 'trips': Recorder().handler()})
+        wait_for(lambda: consumer.connected)
+        assert feed_connected('ride_requests') and not feed_connected('ratings')
+        assert published() == [None, None]
+        
+        # While it reconnects, changes would be lost unless the services publish them
+        feed.disconnect()
+        wait_for(lambda: not consumer.connected)
+        assert published() == ['ride_request.status', 'trip.status']